@@ -13,7 +13,9 @@ from app import models
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", get_settings().database_url)
+# alembic -x url=postgresql+asyncpg://... upgrade head — миграция другой БД (шарда)
+database_url = context.get_x_argument(as_dictionary=True).get("url") or get_settings().database_url
+config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,57 @@
+"""add keyset pagination indexes
+
+Revision ID: 5b1e7c9d2f40
+Revises: 28816f09a30c
+Create Date: 2026-10-18 10:12:41.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e7c9d2f40'
+down_revision: Union[str, Sequence[str], None] = '28816f09a30c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY нельзя выполнять внутри транзакции, а таблица может быть большой
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_incoming_sms_to_number_received_at_id',
+            'incoming_sms',
+            ['to_number', sa.text('received_at DESC'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_incoming_sms_from_number_received_at_id',
+            'incoming_sms',
+            ['from_number', sa.text('received_at DESC'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_incoming_sms_from_number_received_at_id',
+            table_name='incoming_sms',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_incoming_sms_to_number_received_at_id',
+            table_name='incoming_sms',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,98 @@
+"""add sms_number_counters maintained by triggers
+
+Revision ID: 9a3f61c0d8e2
+Revises: 5b1e7c9d2f40
+Create Date: 2026-10-18 11:02:17.604931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3f61c0d8e2'
+down_revision: Union[str, Sequence[str], None] = '5b1e7c9d2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sms_number_counters',
+    sa.Column('scope', sa.String(length=8), nullable=False),
+    sa.Column('number', sa.String(length=32), nullable=False),
+    sa.Column('total', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('scope', 'number')
+    )
+
+    # Statement-level триггеры с transition tables: один upsert на номер за INSERT,
+    # а не на каждую строку. ORDER BY задает единый порядок блокировок счетчиков.
+    op.execute("""
+        CREATE FUNCTION incoming_sms_counters_on_insert() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO sms_number_counters (scope, number, total)
+            SELECT scope, number, total FROM (
+                SELECT 'to' AS scope, to_number AS number, count(*) AS total
+                FROM new_rows GROUP BY to_number
+                UNION ALL
+                SELECT 'from', from_number, count(*)
+                FROM new_rows GROUP BY from_number
+            ) AS delta
+            ORDER BY scope, number
+            ON CONFLICT (scope, number)
+            DO UPDATE SET total = sms_number_counters.total + EXCLUDED.total;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE FUNCTION incoming_sms_counters_on_delete() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE sms_number_counters AS c
+            SET total = c.total - delta.total
+            FROM (
+                SELECT 'to' AS scope, to_number AS number, count(*) AS total
+                FROM old_rows GROUP BY to_number
+                UNION ALL
+                SELECT 'from', from_number, count(*)
+                FROM old_rows GROUP BY from_number
+                ORDER BY 1, 2
+            ) AS delta
+            WHERE c.scope = delta.scope AND c.number = delta.number;
+            RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER incoming_sms_counters_insert
+        AFTER INSERT ON incoming_sms
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION incoming_sms_counters_on_insert()
+    """)
+    op.execute("""
+        CREATE TRIGGER incoming_sms_counters_delete
+        AFTER DELETE ON incoming_sms
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION incoming_sms_counters_on_delete()
+    """)
+
+    # Заполняем счетчики по уже накопленным данным
+    op.execute("""
+        INSERT INTO sms_number_counters (scope, number, total)
+        SELECT 'to', to_number, count(*) FROM incoming_sms GROUP BY to_number
+        UNION ALL
+        SELECT 'from', from_number, count(*) FROM incoming_sms GROUP BY from_number
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS incoming_sms_counters_delete ON incoming_sms")
+    op.execute("DROP TRIGGER IF EXISTS incoming_sms_counters_insert ON incoming_sms")
+    op.execute("DROP FUNCTION IF EXISTS incoming_sms_counters_on_delete()")
+    op.execute("DROP FUNCTION IF EXISTS incoming_sms_counters_on_insert()")
+    op.drop_table('sms_number_counters')
@@ -0,0 +1,48 @@
+"""add otp_code/otp_sender columns with partial indexes
+
+Revision ID: a83d5f2c1e74
+Revises: f1a6c3e85d09
+Create Date: 2026-10-18 15:02:41.318406
+
+Коды извлекаются при приеме (app.services.otp); уже сохраненные строки
+не пересчитываются, у них otp_code остается NULL.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83d5f2c1e74'
+down_revision: Union[str, Sequence[str], None] = 'f1a6c3e85d09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('incoming_sms', sa.Column('otp_code', sa.String(length=16), nullable=True))
+    op.add_column('incoming_sms', sa.Column('otp_sender', sa.String(length=64), nullable=True))
+    op.create_index(
+        'ix_incoming_sms_otp_to_number_received_at_id',
+        'incoming_sms',
+        ['to_number', sa.text('received_at DESC'), 'id'],
+        unique=False,
+        postgresql_where=sa.text('otp_code IS NOT NULL'),
+    )
+    op.create_index(
+        'ix_incoming_sms_otp_to_number_sender_received_at_id',
+        'incoming_sms',
+        ['to_number', 'otp_sender', sa.text('received_at DESC'), 'id'],
+        unique=False,
+        postgresql_where=sa.text('otp_code IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_incoming_sms_otp_to_number_sender_received_at_id', table_name='incoming_sms')
+    op.drop_index('ix_incoming_sms_otp_to_number_received_at_id', table_name='incoming_sms')
+    op.drop_column('incoming_sms', 'otp_sender')
+    op.drop_column('incoming_sms', 'otp_code')
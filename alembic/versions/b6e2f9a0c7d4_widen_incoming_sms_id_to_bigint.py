@@ -0,0 +1,34 @@
+"""widen incoming_sms.id to bigint
+
+Revision ID: b6e2f9a0c7d4
+Revises: d5c8e0a4b913
+Create Date: 2026-10-18 18:20:41.512307
+
+При шардировании (app.core.sharding) каждый шард выдает id из своего
+диапазона шириной 2**48, чтобы id оставались уникальными глобально;
+в integer такие диапазоны не помещаются. Смена типа переписывает все
+секции под ACCESS EXCLUSIVE — на большой таблице выполнять в окно обслуживания.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2f9a0c7d4'
+down_revision: Union[str, Sequence[str], None] = 'd5c8e0a4b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE incoming_sms ALTER COLUMN id TYPE bigint")
+    op.execute("ALTER SEQUENCE incoming_sms_id_seq AS bigint")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # MAXVALUE возвращается к границе integer; id шардов за ней не переживут даунгрейд
+    op.execute("ALTER SEQUENCE incoming_sms_id_seq AS integer MINVALUE 1 MAXVALUE 2147483647")
+    op.execute("ALTER TABLE incoming_sms ALTER COLUMN id TYPE integer")
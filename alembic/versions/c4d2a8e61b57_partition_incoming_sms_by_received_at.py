@@ -0,0 +1,159 @@
+"""partition incoming_sms by received_at
+
+Revision ID: c4d2a8e61b57
+Revises: 9a3f61c0d8e2
+Create Date: 2026-10-18 12:31:09.872113
+
+Переводит incoming_sms на декларативное RANGE-секционирование по received_at
+(по одной секции на месяц плюс DEFAULT-секция для строк вне диапазона).
+
+* Первичный ключ становится (id, received_at): уникальные индексы секционированной
+  таблицы обязаны включать ключ секционирования.
+* Глобальная уникальность provider_message_id переезжает в таблицу
+  incoming_sms_message_keys: BEFORE INSERT триггер занимает ключ и молча
+  пропускает строку-дубликат, поэтому INSERT ... ON CONFLICT DO NOTHING
+  (без указания колонок) ведет себя как раньше.
+* Избыточные индексы не переносятся: ix_incoming_sms_id покрыт первичным ключом,
+  ix_incoming_sms_to_number/from_number — составными индексами под пагинацию.
+
+Данные копируются в одной транзакции, на больших таблицах миграцию стоит
+запускать в окно обслуживания. Новые секции создает python -m app.cli.partitions.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2a8e61b57'
+down_revision: Union[str, Sequence[str], None] = '9a3f61c0d8e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MONTHS_AHEAD = 3
+
+COUNTER_TRIGGERS = (
+    """
+    CREATE TRIGGER incoming_sms_counters_insert
+    AFTER INSERT ON incoming_sms
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION incoming_sms_counters_on_insert()
+    """,
+    """
+    CREATE TRIGGER incoming_sms_counters_delete
+    AFTER DELETE ON incoming_sms
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION incoming_sms_counters_on_delete()
+    """,
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE incoming_sms RENAME TO incoming_sms_legacy")
+    op.execute("ALTER TABLE incoming_sms_legacy RENAME CONSTRAINT incoming_sms_pkey TO incoming_sms_legacy_pkey")
+    op.execute("ALTER SEQUENCE incoming_sms_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE incoming_sms (LIKE incoming_sms_legacy INCLUDING DEFAULTS)
+        PARTITION BY RANGE (received_at)
+    """)
+    op.execute("ALTER TABLE incoming_sms ADD CONSTRAINT incoming_sms_pkey PRIMARY KEY (id, received_at)")
+    op.execute("ALTER SEQUENCE incoming_sms_id_seq OWNED BY incoming_sms.id")
+
+    # Помесячные секции от самой старой строки до MONTHS_AHEAD месяцев вперед (UTC)
+    op.execute(f"""
+        DO $$
+        DECLARE
+            month_start date := date_trunc(
+                'month',
+                coalesce((SELECT min(received_at) FROM incoming_sms_legacy), now()) AT TIME ZONE 'UTC'
+            )::date;
+            last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC')
+                                + interval '{MONTHS_AHEAD} months')::date;
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF incoming_sms FOR VALUES FROM (%L) TO (%L)',
+                    'incoming_sms_p' || to_char(month_start, 'YYYY_MM'),
+                    month_start::text || ' 00:00:00+00',
+                    (month_start + interval '1 month')::date::text || ' 00:00:00+00'
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END;
+        $$
+    """)
+    op.execute("CREATE TABLE incoming_sms_default PARTITION OF incoming_sms DEFAULT")
+
+    op.create_table('incoming_sms_message_keys',
+    sa.Column('provider_message_id', sa.String(length=64), nullable=False),
+    sa.Column('received_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('provider_message_id')
+    )
+    op.create_index(op.f('ix_incoming_sms_message_keys_received_at'), 'incoming_sms_message_keys', ['received_at'], unique=False)
+
+    op.execute("INSERT INTO incoming_sms SELECT * FROM incoming_sms_legacy")
+    op.execute("""
+        INSERT INTO incoming_sms_message_keys (provider_message_id, received_at)
+        SELECT provider_message_id, received_at FROM incoming_sms_legacy
+    """)
+    op.execute("DROP TABLE incoming_sms_legacy")
+
+    op.create_index(op.f('ix_incoming_sms_provider_message_id'), 'incoming_sms', ['provider_message_id'], unique=False)
+    op.create_index(op.f('ix_incoming_sms_received_at'), 'incoming_sms', ['received_at'], unique=False)
+    op.create_index(op.f('ix_incoming_sms_status'), 'incoming_sms', ['status'], unique=False)
+    op.create_index('ix_incoming_sms_to_number_received_at_id', 'incoming_sms', ['to_number', sa.text('received_at DESC'), 'id'], unique=False)
+    op.create_index('ix_incoming_sms_from_number_received_at_id', 'incoming_sms', ['from_number', sa.text('received_at DESC'), 'id'], unique=False)
+
+    op.execute("""
+        CREATE FUNCTION incoming_sms_claim_message_key() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO incoming_sms_message_keys (provider_message_id, received_at)
+            VALUES (NEW.provider_message_id, NEW.received_at)
+            ON CONFLICT (provider_message_id) DO NOTHING;
+            IF NOT FOUND THEN
+                RETURN NULL;  -- дубликат: строка пропускается, как при ON CONFLICT DO NOTHING
+            END IF;
+            RETURN NEW;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER incoming_sms_claim_message_key
+        BEFORE INSERT ON incoming_sms
+        FOR EACH ROW EXECUTE FUNCTION incoming_sms_claim_message_key()
+    """)
+    for trigger in COUNTER_TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE incoming_sms RENAME TO incoming_sms_partitioned")
+    op.execute("ALTER TABLE incoming_sms_partitioned RENAME CONSTRAINT incoming_sms_pkey TO incoming_sms_partitioned_pkey")
+    op.execute("ALTER SEQUENCE incoming_sms_id_seq OWNED BY NONE")
+
+    op.execute("CREATE TABLE incoming_sms (LIKE incoming_sms_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE incoming_sms ADD CONSTRAINT incoming_sms_pkey PRIMARY KEY (id)")
+    op.execute("ALTER SEQUENCE incoming_sms_id_seq OWNED BY incoming_sms.id")
+    op.execute("INSERT INTO incoming_sms SELECT * FROM incoming_sms_partitioned")
+
+    op.execute("DROP TABLE incoming_sms_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS incoming_sms_claim_message_key()")
+    op.drop_index(op.f('ix_incoming_sms_message_keys_received_at'), table_name='incoming_sms_message_keys')
+    op.drop_table('incoming_sms_message_keys')
+
+    op.create_index(op.f('ix_incoming_sms_from_number'), 'incoming_sms', ['from_number'], unique=False)
+    op.create_index(op.f('ix_incoming_sms_id'), 'incoming_sms', ['id'], unique=False)
+    op.create_index(op.f('ix_incoming_sms_provider_message_id'), 'incoming_sms', ['provider_message_id'], unique=True)
+    op.create_index(op.f('ix_incoming_sms_received_at'), 'incoming_sms', ['received_at'], unique=False)
+    op.create_index(op.f('ix_incoming_sms_status'), 'incoming_sms', ['status'], unique=False)
+    op.create_index(op.f('ix_incoming_sms_to_number'), 'incoming_sms', ['to_number'], unique=False)
+    op.create_index('ix_incoming_sms_to_number_received_at_id', 'incoming_sms', ['to_number', sa.text('received_at DESC'), 'id'], unique=False)
+    op.create_index('ix_incoming_sms_from_number_received_at_id', 'incoming_sms', ['from_number', sa.text('received_at DESC'), 'id'], unique=False)
+    for trigger in COUNTER_TRIGGERS:
+        op.execute(trigger)
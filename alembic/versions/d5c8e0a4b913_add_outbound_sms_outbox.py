@@ -0,0 +1,54 @@
+"""add outbound_sms outbox
+
+Revision ID: d5c8e0a4b913
+Revises: a83d5f2c1e74
+Create Date: 2026-10-18 16:10:52.044718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5c8e0a4b913'
+down_revision: Union[str, Sequence[str], None] = 'a83d5f2c1e74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbound_sms',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('to_number', sa.String(length=32), nullable=False),
+    sa.Column('from_number', sa.String(length=32), nullable=True),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('provider_message_id', sa.String(length=64), nullable=True),
+    sa.Column('provider_status', sa.String(length=32), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outbound_sms_status'), 'outbound_sms', ['status'], unique=False)
+    op.create_index(
+        'ix_outbound_sms_due',
+        'outbound_sms',
+        ['next_attempt_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'sending')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbound_sms_due', table_name='outbound_sms')
+    op.drop_index(op.f('ix_outbound_sms_status'), table_name='outbound_sms')
+    op.drop_table('outbound_sms')
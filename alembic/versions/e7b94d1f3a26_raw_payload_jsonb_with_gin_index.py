@@ -0,0 +1,53 @@
+"""raw_payload jsonb with gin index
+
+Revision ID: e7b94d1f3a26
+Revises: c4d2a8e61b57
+Create Date: 2026-10-18 13:47:55.120384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b94d1f3a26'
+down_revision: Union[str, Sequence[str], None] = 'c4d2a8e61b57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        'incoming_sms',
+        'raw_payload',
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_type=sa.JSON(),
+        existing_nullable=False,
+        postgresql_using='raw_payload::jsonb',
+    )
+    # jsonb_path_ops: индекс компактнее и быстрее для containment-запросов (@>)
+    op.create_index(
+        'ix_incoming_sms_raw_payload',
+        'incoming_sms',
+        ['raw_payload'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'raw_payload': 'jsonb_path_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_incoming_sms_raw_payload', table_name='incoming_sms')
+    op.alter_column(
+        'incoming_sms',
+        'raw_payload',
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=False,
+        postgresql_using='raw_payload::json',
+    )
@@ -0,0 +1,47 @@
+"""add generated text_tsv column for full-text search
+
+Revision ID: f1a6c3e85d09
+Revises: e7b94d1f3a26
+Create Date: 2026-10-18 14:26:03.559817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a6c3e85d09'
+down_revision: Union[str, Sequence[str], None] = 'e7b94d1f3a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Конфигурация 'simple' без стемминга: тексты SMS на разных языках,
+    # а искать нужно коды и названия отправителей как есть
+    op.add_column(
+        'incoming_sms',
+        sa.Column(
+            'text_tsv',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple'::regconfig, text)", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        'ix_incoming_sms_text_tsv',
+        'incoming_sms',
+        ['text_tsv'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_incoming_sms_text_tsv', table_name='incoming_sms')
+    op.drop_column('incoming_sms', 'text_tsv')
@@ -8,7 +8,8 @@ logger = logging.getLogger("app.errors")
 
 
 async def unhandled_exception_handler(request: Request, exc: Exception):
-    request_id = request.headers.get("x-request-id") or getattr(request.state, "request_id", None)
+    # Обработчик вызывается снаружи RequestIdMiddleware, contextvar уже сброшен
+    request_id = request.scope.get("request_id") or request.headers.get("x-request-id")
 
     logger.exception(
         "Unhandled exception",
@@ -0,0 +1,46 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.core.config import Settings, get_settings
+from app.services.health import HealthMonitor, get_health_monitor
+
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/livez")
+async def livez(monitor: HealthMonitor = Depends(get_health_monitor)) -> JSONResponse:
+    """
+    Liveness: процесс и цикл проверок не зависли. Зависимости не учитываются.
+    """
+    alive, state = monitor.live()
+    return JSONResponse(state, status_code=200 if alive else 503)
+
+
+@router.get("/readyz")
+async def readyz(monitor: HealthMonitor = Depends(get_health_monitor)) -> JSONResponse:
+    """
+    Readiness по последним результатам фоновых проверок (без запросов к БД).
+    """
+    ready, report = monitor.ready()
+    return JSONResponse(report, status_code=200 if ready else 503)
+
+
+@router.get("/health")
+async def health_check(
+    settings: Settings = Depends(get_settings),
+    monitor: HealthMonitor = Depends(get_health_monitor),
+) -> dict[str, Any]:
+    """
+    Сводка состояния для людей и старых проверок; всегда 200.
+    """
+    report = monitor.report()
+    database = monitor.check("database")
+    return {
+        "status": report["status"],
+        "settings": settings.app_env,
+        "db_connected": database.ok if database is not None else None,
+        "checks": report["checks"],
+    }
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_metrics
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Метрики в текстовом формате Prometheus.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,7 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.v1 import twilio, sms
+from app.api.v1 import twilio, sms, stats, outbox, onlinesim
 
 api_v1_router = APIRouter()
 api_v1_router.include_router(sms.router)
-api_v1_router.include_router(twilio.router)
\ No newline at end of file
+api_v1_router.include_router(twilio.router)
+api_v1_router.include_router(stats.router)
+api_v1_router.include_router(outbox.router)
+api_v1_router.include_router(onlinesim.router)
\ No newline at end of file
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.core.config import Settings, get_settings
+from app.schemas.outbox import (
+    OutboundSmsBatchResponse,
+    OutboundSmsInDB,
+    OutboxSmsBatchCreate,
+    OutboxSmsCreate,
+)
+from app.services.outbox import OutboxService, OutboxWorkerPool, get_outbox_service, get_outbox_worker_pool
+
+
+router = APIRouter(prefix="/api/v1/outbox", tags=["outbox"])
+
+
+def _as_row(message: OutboxSmsCreate) -> dict[str, str | None]:
+    return {"to_number": message.to, "body": message.body, "from_number": message.from_}
+
+
+@router.post("/sms", response_model=OutboundSmsInDB, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_sms(
+    request: OutboxSmsCreate,
+    settings: Settings = Depends(get_settings),
+    outbox: OutboxService = Depends(get_outbox_service),
+    workers: OutboxWorkerPool = Depends(get_outbox_worker_pool),
+) -> OutboundSmsInDB:
+    """
+    Ставит SMS в очередь на отправку и сразу отвечает 202.
+
+    Отправляют фоновые воркеры с повторами при временных ошибках Twilio;
+    состояние доступно через GET /api/v1/outbox/sms/{id}.
+    """
+    [created] = await outbox.enqueue([_as_row(request)], max_attempts=settings.outbox_max_attempts)
+    workers.wakeup()
+    return OutboundSmsInDB.model_validate(created)
+
+
+@router.post("/sms/batch", response_model=OutboundSmsBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_sms_batch(
+    request: OutboxSmsBatchCreate,
+    settings: Settings = Depends(get_settings),
+    outbox: OutboxService = Depends(get_outbox_service),
+    workers: OutboxWorkerPool = Depends(get_outbox_worker_pool),
+) -> OutboundSmsBatchResponse:
+    """
+    Ставит пачку SMS в очередь одним INSERT.
+    """
+    if len(request.messages) > settings.outbox_batch_max_messages:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many messages (max {settings.outbox_batch_max_messages})",
+        )
+    created = await outbox.enqueue(
+        [_as_row(m) for m in request.messages],
+        max_attempts=settings.outbox_max_attempts,
+    )
+    workers.wakeup()
+    return OutboundSmsBatchResponse(items=[OutboundSmsInDB.model_validate(m) for m in created])
+
+
+@router.get("/sms/{outbound_id}", response_model=OutboundSmsInDB)
+async def get_outbound_sms(
+    outbound_id: int,
+    outbox: OutboxService = Depends(get_outbox_service),
+) -> OutboundSmsInDB:
+    message = await outbox.get(outbound_id)
+    if message is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Outbound SMS not found")
+    return OutboundSmsInDB.model_validate(message)
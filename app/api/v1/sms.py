@@ -1,15 +1,40 @@
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Form
-from typing import Annotated
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any
+from pydantic import ValidationError
 
 from app.core.config import get_settings, Settings
+from app.core.responses import FastJSONResponse
+from app.core.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    decode_rank_cursor,
+    encode_cursor,
+    encode_rank_cursor,
+)
 from app.core.twilio_auth import validate_twilio_signature
 from app.schemas.sms import (
     TwilioWebhookPayload,
     SmsInDB,
     SmsListItem,
     SmsListResponse,
+    SmsOtpResponse,
+    SmsSearchItem,
+    SmsSearchResponse,
+    SearchOrder,
+    TotalMode,
 )
+from app.services.sms_cache import SmsResponseCache, etag_matches, get_sms_response_cache
+from app.services.sms_export import MEDIA_TYPES, ExportFormat, encode_export
+from app.services.sms_ingest import IngestQueueFullError, SmsIngestQueue, get_sms_ingest_queue
+from app.services.sms_notifier import SmsNotifier, get_sms_notifier
 from app.services.sms_service import SmsService, get_sms_service
 
 
@@ -19,66 +44,75 @@ logger = logging.getLogger("app.api.sms")
 router = APIRouter(prefix="/api/v1", tags=["sms"])
 
 
+def get_payload_filter(
+    payload: str | None = Query(
+        None,
+        description='JSON-объект для поиска по полям Twilio payload, например {"FromCountry": "US"}',
+    ),
+) -> dict[str, Any] | None:
+    if not payload:
+        return None
+    try:
+        parsed = json.loads(payload)
+    except ValueError:
+        parsed = None
+    if not isinstance(parsed, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="payload must be a JSON object",
+        )
+    return parsed
+
+
 @router.post(
     "/webhooks/twilio/sms",
     response_model=SmsInDB,
     status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-www-form-urlencoded": {
+                    "schema": TwilioWebhookPayload.model_json_schema(),
+                },
+            },
+        },
+    },
 )
 async def twilio_sms_webhook(
     request: Request,
-    MessageSid: Annotated[str, Form()],
-    AccountSid: Annotated[str, Form()],
-    From: Annotated[str, Form()],
-    To: Annotated[str, Form()],
-    Body: Annotated[str, Form()],
-    NumMedia: Annotated[str, Form()] = "0",
-    MessageStatus: Annotated[str | None, Form()] = None,
-    SmsStatus: Annotated[str | None, Form()] = None,
-    SmsSid: Annotated[str | None, Form()] = None,
-    SmsMessageSid: Annotated[str | None, Form()] = None,
     settings: Settings = Depends(get_settings),
     sms_service: SmsService = Depends(get_sms_service),
+    ingest_queue: SmsIngestQueue = Depends(get_sms_ingest_queue),
 ) -> SmsInDB:
     """
     Webhook endpoint для приема входящих SMS от Twilio.
     
     Twilio отправляет данные в формате application/x-www-form-urlencoded.
+    Тело разбирается один раз: по всем присланным параметрам (включая
+    дополнительные вроде FromCountry) проверяется подпись, из них же строятся
+    TwilioWebhookPayload и сохраняемый raw_payload.
+    В режиме sms_ingest_mode=batched сообщение сохраняется через write-behind очередь.
     """
-    # Собираем все form-параметры для валидации подписи
-    form_data = {
-        "MessageSid": MessageSid,
-        "AccountSid": AccountSid,
-        "From": From,
-        "To": To,
-        "Body": Body,
-        "NumMedia": NumMedia,
-    }
-    if MessageStatus:
-        form_data["MessageStatus"] = MessageStatus
-    if SmsStatus:
-        form_data["SmsStatus"] = SmsStatus
-    if SmsSid:
-        form_data["SmsSid"] = SmsSid
-    if SmsMessageSid:
-        form_data["SmsMessageSid"] = SmsMessageSid
-    
-    # Валидируем подпись Twilio
-    await validate_twilio_signature(request, form_data, settings)
-    
-    # Создаем payload объект
-    payload = TwilioWebhookPayload(
-        MessageSid=MessageSid,
-        AccountSid=AccountSid,
-        From=From,
-        To=To,
-        Body=Body,
-        NumMedia=NumMedia,
-        MessageStatus=MessageStatus,
-        SmsStatus=SmsStatus,
-        SmsSid=SmsSid,
-        SmsMessageSid=SmsMessageSid,
-    )
-    
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("application/x-www-form-urlencoded"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected application/x-www-form-urlencoded body",
+        )
+    try:
+        params = parse_qsl((await request.body()).decode(), keep_blank_values=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body is not valid UTF-8")
+
+    await validate_twilio_signature(request, params, settings)
+
+    raw_payload = dict(params)
+    try:
+        payload = TwilioWebhookPayload.model_validate(raw_payload)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
     logger.info(
         "Received Twilio SMS webhook",
         extra={
@@ -88,22 +122,270 @@ async def twilio_sms_webhook(
         },
     )
     
-    sms = await sms_service.save_incoming_sms(
-        payload=payload,
-        raw_payload=payload.model_dump(),
-    )
+    if settings.sms_ingest_mode == "batched":
+        try:
+            sms = await ingest_queue.submit(payload=payload, raw_payload=raw_payload)
+        except IngestQueueFullError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="SMS ingest queue is full",
+                headers={"Retry-After": "1"},
+            )
+    else:
+        sms = await sms_service.save_incoming_sms(payload=payload, raw_payload=raw_payload)
     return SmsInDB.model_validate(sms)
 
 
-@router.get("/sms/{sms_id}", response_model=SmsInDB)
+@router.get("/sms/export")
+async def export_sms(
+    settings: Settings = Depends(get_settings),
+    sms_service: SmsService = Depends(get_sms_service),
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    from_number: str | None = Query(None),
+    to_number: str | None = Query(None),
+    received_from: datetime | None = Query(None, description="Начало диапазона received_at (включительно)"),
+    received_to: datetime | None = Query(None, description="Конец диапазона received_at (не включительно)"),
+    payload_contains: dict[str, Any] | None = Depends(get_payload_filter),
+) -> StreamingResponse:
+    """
+    Потоковая выгрузка incoming_sms в NDJSON или CSV.
+
+    Строки читаются серверным курсором пачками по sms_export_fetch_size,
+    поэтому память постоянна при любом объеме выгрузки.
+    """
+    partitions = sms_service.stream_sms(
+        from_number=from_number,
+        to_number=to_number,
+        received_from=received_from,
+        received_to=received_to,
+        payload_contains=payload_contains,
+        fetch_size=settings.sms_export_fetch_size,
+    )
+    return StreamingResponse(
+        encode_export(partitions, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="sms_export.{export_format}"'},
+    )
+
+
+@router.get("/sms/search", response_model=SmsSearchResponse)
+async def search_sms(
+    sms_service: SmsService = Depends(get_sms_service),
+    q: str = Query(..., min_length=1, max_length=256, description="Поисковый запрос (синтаксис websearch)"),
+    order: SearchOrder = Query(SearchOrder.recent),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="next_cursor из предыдущего ответа"),
+    from_number: str | None = Query(None),
+    to_number: str | None = Query(None),
+    received_from: datetime | None = Query(None, description="Начало диапазона received_at (включительно)"),
+    received_to: datetime | None = Query(None, description="Конец диапазона received_at (не включительно)"),
+) -> SmsSearchResponse:
+    """
+    Полнотекстовый поиск по текстам SMS с фильтрами по номерам и keyset-пагинацией.
+    """
+    position = None
+    if cursor:
+        try:
+            position = decode_rank_cursor(cursor) if order is SearchOrder.rank else decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    rows = await sms_service.search_sms(
+        query=q,
+        limit=limit,
+        order=order,
+        from_number=from_number,
+        to_number=to_number,
+        received_from=received_from,
+        received_to=received_to,
+        cursor=position,
+    )
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        if order is SearchOrder.rank:
+            next_cursor = encode_rank_cursor(last.rank, last.received_at, last.id)
+        else:
+            next_cursor = encode_cursor(last.received_at, last.id)
+    return FastJSONResponse({
+        "items": [row._asdict() for row in rows],
+        "limit": limit,
+        "next_cursor": next_cursor,
+    })
+
+
+def _require_notifier(notifier: SmsNotifier | None) -> SmsNotifier:
+    if notifier is None or not notifier.listening:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="SMS notifications are unavailable",
+            headers={"Retry-After": "1"},
+        )
+    return notifier
+
+
+async def _event_item(event: dict[str, Any], sms_service: SmsService) -> SmsListItem:
+    if not event.get("truncated"):
+        return SmsListItem.model_validate(event)
+    # текст не влез в NOTIFY — дочитываем строку и сразу отдаем соединение в пул
+    sms = await sms_service.get_sms_by_id(event["id"])
+    await sms_service.close()
+    return SmsListItem.model_validate(sms)
+
+
+def _sse_message(item: SmsListItem) -> bytes:
+    return f"id: {item.id}\nevent: sms\ndata: {item.model_dump_json()}\n\n".encode()
+
+
+@router.get(
+    "/sms/wait",
+    response_model=SmsListItem,
+    responses={status.HTTP_204_NO_CONTENT: {"description": "No SMS within timeout"}},
+)
+async def wait_for_sms(
+    settings: Settings = Depends(get_settings),
+    sms_service: SmsService = Depends(get_sms_service),
+    notifier: SmsNotifier | None = Depends(get_sms_notifier),
+    to_number: str = Query(..., description="Номер получателя"),
+    after_id: int | None = Query(None, description="id последней полученной SMS"),
+    timeout: float = Query(30.0, gt=0, description="Секунды ожидания"),
+) -> SmsListItem | Response:
+    """
+    Long-poll: ждет следующую SMS на номер и возвращает ее, по таймауту — 204.
+
+    Если передан after_id, сначала отдается уже пришедшая SMS с большим id
+    (за последние sms_wait_lookback секунд). Во время ожидания запрос не держит
+    соединение с БД: события приходят через общий LISTEN процесса.
+    """
+    notifier = _require_notifier(notifier)
+    timeout = min(timeout, settings.sms_wait_max_timeout)
+
+    async with notifier.subscribe(to_number) as events:
+        if after_id is not None:
+            since = datetime.now(timezone.utc) - timedelta(seconds=settings.sms_wait_lookback)
+            missed = await sms_service.list_sms_after(to_number, after_id, since, limit=1)
+            if missed:
+                return SmsListItem.model_validate(missed[0])
+        await sms_service.close()
+
+        try:
+            async with asyncio.timeout(timeout):
+                while True:
+                    event = await events.get()
+                    if after_id is None or event["id"] > after_id:
+                        break
+        except TimeoutError:
+            return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    return await _event_item(event, sms_service)
+
+
+async def _sse_events(
+    notifier: SmsNotifier,
+    sms_service: SmsService,
+    to_number: str,
+    last_event_id: int | None,
+    settings: Settings,
+) -> AsyncIterator[bytes]:
+    async with notifier.subscribe(to_number) as events:
+        if last_event_id is not None:
+            since = datetime.now(timezone.utc) - timedelta(seconds=settings.sms_wait_lookback)
+            for row in await sms_service.list_sms_after(to_number, last_event_id, since):
+                last_event_id = row.id
+                yield _sse_message(SmsListItem.model_validate(row))
+        await sms_service.close()
+
+        while True:
+            try:
+                async with asyncio.timeout(settings.sms_sse_heartbeat):
+                    event = await events.get()
+            except TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if last_event_id is not None and event["id"] <= last_event_id:
+                continue
+            yield _sse_message(await _event_item(event, sms_service))
+
+
+@router.get("/sms/stream")
+async def stream_sms_events(
+    settings: Settings = Depends(get_settings),
+    sms_service: SmsService = Depends(get_sms_service),
+    notifier: SmsNotifier | None = Depends(get_sms_notifier),
+    to_number: str = Query(..., description="Номер получателя"),
+    last_event_id: int | None = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    Server-Sent Events: поток новых SMS на номер (event: sms, id — id SMS).
+
+    При переподключении браузер присылает Last-Event-ID, и пропущенные за время
+    разрыва сообщения досылаются из БД. Каждые sms_sse_heartbeat секунд
+    без событий отправляется комментарий-пинг.
+    """
+    notifier = _require_notifier(notifier)
+    return StreamingResponse(
+        _sse_events(notifier, sms_service, to_number, last_event_id, settings),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/sms/otp/latest", response_model=SmsOtpResponse)
+async def get_latest_otp(
+    sms_service: SmsService = Depends(get_sms_service),
+    to_number: str = Query(..., description="Номер получателя"),
+    sender: str | None = Query(None, description="Отправитель кода (otp_sender)"),
+    received_from: datetime | None = Query(None, description="Не старше этого момента"),
+) -> SmsOtpResponse:
+    """
+    Последний код подтверждения, пришедший на номер.
+    """
+    row = await sms_service.get_latest_otp(
+        to_number=to_number,
+        sender=sender,
+        received_from=received_from,
+    )
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="OTP not found")
+    return SmsOtpResponse.model_validate(row)
+
+
+@router.get(
+    "/sms/{sms_id}",
+    response_model=SmsInDB,
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "Not modified"}},
+)
 async def get_sms(
     sms_id: int,
+    request: Request,
+    settings: Settings = Depends(get_settings),
     sms_service: SmsService = Depends(get_sms_service),
-) -> SmsInDB:
-    sms = await sms_service.get_sms_by_id(sms_id)
-    if not sms:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SMS not found")
-    return SmsInDB.model_validate(sms)
+    cache: SmsResponseCache | None = Depends(get_sms_response_cache),
+) -> Response:
+    """
+    Возвращает SMS по id с ETag/Cache-Control.
+
+    Ответ берется из in-process кэша; при совпадении If-None-Match отвечаем 304,
+    не обращаясь к БД (сессия не берет соединение из пула до первого запроса).
+    """
+    cached = cache.get(sms_id) if cache is not None else None
+    if cached is None:
+        sms = await sms_service.get_sms_by_id(sms_id)
+        if not sms:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SMS not found")
+        if cache is not None:
+            cached = cache.put(sms)
+        else:
+            return JSONResponse(content=SmsInDB.model_validate(sms).model_dump(mode="json"))
+
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"private, max-age={settings.sms_cache_max_age}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
 
 
 @router.get("/sms", response_model=SmsListResponse)
@@ -111,18 +393,45 @@ async def get_sms_list(
     sms_service: SmsService = Depends(get_sms_service),
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="next_cursor из предыдущего ответа"),
     from_number: str | None = Query(None),
     to_number: str | None = Query(None),
+    total: TotalMode = Query(TotalMode.exact, description="exact | estimated | none"),
+    received_from: datetime | None = Query(None, description="Начало диапазона received_at (включительно)"),
+    received_to: datetime | None = Query(None, description="Конец диапазона received_at (не включительно)"),
+    payload_contains: dict[str, Any] | None = Depends(get_payload_filter),
 ) -> SmsListResponse:
-    items, total = await sms_service.list_sms(
+    position = None
+    if cursor:
+        if offset:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either cursor or offset, not both",
+            )
+        try:
+            position = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    items, total_count = await sms_service.list_sms(
         limit=limit,
         offset=offset,
         from_number=from_number,
         to_number=to_number,
+        cursor=position,
+        total_mode=total,
+        received_from=received_from,
+        received_to=received_to,
+        payload_contains=payload_contains,
     )
-    return SmsListResponse(
-        items=[SmsListItem.model_validate(i) for i in items],
-        total=total,
-        limit=limit,
-        offset=offset,
-    )
\ No newline at end of file
+    next_cursor = None
+    if len(items) == limit:
+        next_cursor = encode_cursor(items[-1].received_at, items[-1].id)
+    # Строки уже содержат ровно поля SmsListItem — сериализуем их напрямую
+    return FastJSONResponse({
+        "items": [row._asdict() for row in items],
+        "total": total_count,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor,
+    })
@@ -0,0 +1,91 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.db import db_pool_stats, get_db_engine
+from app.core.http_clients import HttpClientRegistry, get_http_clients
+from app.core.replicas import ReplicaRouter, get_replica_router
+from app.services.onlinesim_client import OnlineSimClient, get_onlinesim_client
+from app.services.sms_cache import SmsResponseCache, get_sms_response_cache
+from app.services.sms_dedup import SmsDedupCache, get_sms_dedup_cache
+from app.services.sms_notifier import SmsNotifier, get_sms_notifier
+from app.services.twilio_client import TwilioService, get_twilio_service
+
+
+router = APIRouter(prefix="/api/v1/stats", tags=["stats"])
+
+
+@router.get("/dedup")
+async def get_dedup_stats(
+    dedup: SmsDedupCache | None = Depends(get_sms_dedup_cache),
+) -> dict[str, Any]:
+    """
+    Счетчики кэша дедупликации webhook'ов (для подбора размера кэша).
+    """
+    if dedup is None:
+        return {"enabled": False}
+    return {"enabled": True, **dedup.stats()}
+
+
+@router.get("/sms-cache")
+async def get_sms_cache_stats(
+    cache: SmsResponseCache | None = Depends(get_sms_response_cache),
+) -> dict[str, Any]:
+    """
+    Счетчики кэша ответов GET /api/v1/sms/{sms_id}.
+    """
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/notifier")
+async def get_notifier_stats(
+    notifier: SmsNotifier | None = Depends(get_sms_notifier),
+) -> dict[str, Any]:
+    """
+    Состояние LISTEN-соединения и число ожидающих клиентов /sms/wait и /sms/stream.
+    """
+    if notifier is None:
+        return {"enabled": False}
+    return {"enabled": True, **notifier.stats()}
+
+
+@router.get("/providers")
+async def get_provider_stats(
+    clients: HttpClientRegistry = Depends(get_http_clients),
+    twilio: TwilioService = Depends(get_twilio_service),
+    onlinesim: OnlineSimClient = Depends(get_onlinesim_client),
+) -> dict[str, Any]:
+    """
+    HTTP-клиенты провайдеров и счетчики кэша их справочных запросов.
+    """
+    return {
+        "clients": clients.stats(),
+        "twilio": twilio.cache_stats(),
+        "onlinesim": onlinesim.cache_stats(),
+    }
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats(
+    engine: AsyncEngine = Depends(get_db_engine),
+) -> dict[str, Any]:
+    """
+    Пул соединений с БД: занятость, насыщение и время ожидания соединения.
+    """
+    return db_pool_stats(engine)
+
+
+@router.get("/replicas")
+async def get_replica_stats(
+    replicas: ReplicaRouter = Depends(get_replica_router),
+) -> dict[str, Any]:
+    """
+    Реплики для чтения: доступность, отставание, пулы и доля сессий на репликах.
+    """
+    return {
+        **replicas.stats(),
+        "items": {replica.name: replicas.replica_stats(replica) for replica in replicas.replicas},
+    }
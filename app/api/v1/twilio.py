@@ -1,8 +1,14 @@
-from typing import Any, Dict
+import json
+from string import Template
+from typing import Any, AsyncIterator, Dict
 
 from fastapi import APIRouter, Depends, HTTPException, status, Body
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
 
+from app.core.config import Settings, get_settings
+from app.core.rate_limit import TokenBucket
+from app.services.twilio_batch import BatchRecipient, TwilioBatchSender, get_twilio_rate_limiter
 from app.services.twilio_client import TwilioService, get_twilio_service
 
 
@@ -15,6 +21,25 @@ class SendSmsRequest(BaseModel):
     from_: str | None = None
 
 
+class BatchRecipientRequest(BaseModel):
+    to: str
+    template: str = "default"  # ключ из SendBatchRequest.templates
+    params: dict[str, str] = Field(default_factory=dict)  # подстановки $name в шаблон
+    from_: str | None = None
+
+
+class SendBatchRequest(BaseModel):
+    templates: dict[str, str] = Field(..., min_length=1)  # шаблоны string.Template
+    recipients: list[BatchRecipientRequest] = Field(..., min_length=1)
+
+    @model_validator(mode="after")
+    def check_templates(self) -> "SendBatchRequest":
+        unknown = {r.template for r in self.recipients} - self.templates.keys()
+        if unknown:
+            raise ValueError(f"Unknown templates: {', '.join(sorted(unknown))}")
+        return self
+
+
 @router.get("/account")
 async def get_twilio_account(
     service: TwilioService = Depends(get_twilio_service),
@@ -22,7 +47,7 @@ async def get_twilio_account(
     """
     Получает информацию об аккаунте Twilio.
     """
-    return service.get_account_balance()
+    return await service.get_account_balance()
 
 
 @router.post("/sms/send")
@@ -34,7 +59,7 @@ async def send_sms(
     Отправляет SMS через Twilio.
     """
     try:
-        result = service.send_sms(
+        result = await service.send_sms(
             to=request.to,
             body=request.body,
             from_=request.from_,
@@ -46,3 +71,36 @@ async def send_sms(
             detail=f"Failed to send SMS: {str(e)}",
         )
 
+
+async def _ndjson(results: AsyncIterator[dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for result in results:
+        yield (json.dumps(result, ensure_ascii=False) + "\n").encode()
+
+
+@router.post("/sms/send-batch")
+async def send_sms_batch(
+    request: SendBatchRequest,
+    settings: Settings = Depends(get_settings),
+    service: TwilioService = Depends(get_twilio_service),
+    limiter: TokenBucket = Depends(get_twilio_rate_limiter),
+) -> StreamingResponse:
+    """
+    Массовая отправка SMS по шаблонам.
+
+    Отправки идут параллельно (до twilio_send_concurrency) в темпе, заданном
+    twilio_send_rate для всего аккаунта. Ответ — NDJSON, по строке на получателя
+    в порядке завершения отправок; index указывает на позицию в recipients.
+    """
+    if len(request.recipients) > settings.twilio_batch_max_recipients:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many recipients (max {settings.twilio_batch_max_recipients})",
+        )
+
+    templates = {name: Template(body) for name, body in request.templates.items()}
+    recipients = [
+        BatchRecipient(to=r.to, template=templates[r.template], params=r.params, from_=r.from_)
+        for r in request.recipients
+    ]
+    sender = TwilioBatchSender(service, limiter, concurrency=settings.twilio_send_concurrency)
+    return StreamingResponse(_ndjson(sender.send(recipients)), media_type="application/x-ndjson")
@@ -0,0 +1,76 @@
+"""
+Массовый импорт исторических SMS из CSV/NDJSON (в том числе .gz).
+
+Запуск: python -m app.cli.import_sms FILE [FILE ...] [--format csv|ndjson] [--batch-size N]
+
+Поддерживаются наши выгрузки (/api/v1/sms/export), сохраненные Twilio
+webhook'и и экспорты Twilio (Sid, From, To, Body, DateSent, Status).
+Записи загружаются через COPY во временную таблицу и сливаются
+в incoming_sms одним INSERT на пачку; дубликаты по provider_message_id
+пропускаются, поэтому импорт можно безопасно перезапускать.
+
+При заданных db_shards каждая запись попадает на шард-владелец номера
+получателя: пачки копятся и загружаются отдельно для каждого шарда.
+Шарды должны быть подготовлены (python -m app.cli.shards prepare).
+"""
+import argparse
+import asyncio
+import logging
+
+import asyncpg
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging, stop_logging
+from app.core.sharding import get_shard_router
+from app.services.otp import get_otp_extractor
+from app.services.sms_import import ImportProgress, SmsImporter, detect_format, read_records
+
+logger = logging.getLogger("app.sms_import")
+
+
+def _log_progress(path: str):
+    def report(progress: ImportProgress) -> None:
+        logger.info("SMS import progress", extra={"file": path, **progress.as_dict()})
+
+    return report
+
+
+async def run(paths: list[str], import_format: str | None, batch_size: int) -> None:
+    router = get_shard_router()
+    connections: list[asyncpg.Connection] = []
+    try:
+        for shard in router.shards:
+            connections.append(await asyncpg.connect(shard.asyncpg_dsn))
+        for path in paths:
+            file_format = import_format or detect_format(path)
+            importer = SmsImporter(
+                connections=connections,
+                otp_extractor=get_otp_extractor(),
+                batch_size=batch_size,
+                route=lambda to_number: router.for_number(to_number).index,
+                on_progress=_log_progress(path),
+            )
+            progress = await importer.import_records(read_records(path, file_format))
+            logger.info("SMS import finished", extra={"file": path, **progress.as_dict()})
+    finally:
+        for connection in connections:
+            await connection.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Bulk import historical SMS into incoming_sms")
+    parser.add_argument("paths", nargs="+", metavar="FILE")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="по умолчанию — по расширению файла")
+    parser.add_argument("--batch-size", type=int, default=settings.sms_import_batch_size)
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    try:
+        asyncio.run(run(args.paths, args.format, args.batch_size))
+    finally:
+        stop_logging()
+
+
+if __name__ == "__main__":
+    main()
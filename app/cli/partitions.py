@@ -0,0 +1,63 @@
+"""
+Обслуживание секций incoming_sms.
+
+Запуск: python -m app.cli.partitions [--months-ahead N] [--retention-months M] [--drop]
+
+Создает секции на текущий и N следующих месяцев и, если задан срок хранения,
+отсоединяет (или удаляет) секции старше M месяцев — в основной БД и на всех
+шардах из db_shards. Рассчитан на запуск по расписанию (cron/CronJob)
+и перед стартом приложения.
+"""
+import argparse
+import asyncio
+import logging
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.core.sharding import shard_router
+from app.services.partitions import SmsPartitionManager
+
+logger = logging.getLogger("app.partitions")
+
+
+async def run(months_ahead: int, retention_months: int | None, drop: bool) -> None:
+    try:
+        for shard in shard_router.shards:
+            async with shard.session_factory() as session:
+                manager = SmsPartitionManager(session)
+                created = await manager.ensure_future_partitions(months_ahead)
+                expired = []
+                if retention_months is not None:
+                    expired = await manager.expire_partitions(retention_months, drop=drop)
+
+            logger.info(
+                "SMS partition maintenance finished",
+                extra={
+                    "shard": shard.name,
+                    "created_partitions": [p.name for p in created],
+                    "expired_partitions": [p.name for p in expired],
+                },
+            )
+    finally:
+        await shard_router.dispose()
+
+
+def main(argv: list[str] | None = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Maintain incoming_sms partitions")
+    parser.add_argument("--months-ahead", type=int, default=settings.sms_partition_months_ahead)
+    parser.add_argument("--retention-months", type=int, default=settings.sms_retention_months)
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        default=settings.sms_retention_drop,
+        help="удалять устаревшие секции, а не только отсоединять",
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    asyncio.run(run(args.months_ahead, args.retention_months, args.drop))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyUrl
@@ -9,6 +10,17 @@ class Settings(BaseSettings):
 
     app_env: str = "local"
     app_debug: bool = True
+    log_format: Literal["json", "text"] = "json"
+
+    # Метрики Prometheus (GET /metrics)
+    metrics_enabled: bool = True
+
+    # Фоновый монитор здоровья (/livez, /readyz, /health)
+    health_monitor_enabled: bool = True
+    health_db_interval: float = 5.0  # секунды между ping Postgres
+    health_provider_interval: float = 60.0  # секунды между запросами к Twilio/OnlineSIM
+    health_timeout: float = 2.0  # секунды на одну проверку
+    health_stale_after: float = 30.0  # секунды без завершенного цикла — /livez отвечает 503
 
     db_host: str
     db_port: int = 5432
@@ -16,10 +28,125 @@ class Settings(BaseSettings):
     db_password: str
     db_name: str
 
+    # Пул соединений с БД (app.core.db.build_engine)
+    db_echo: bool = False  # логировать каждый SQL-запрос
+    db_pool_size: int = 10  # постоянных соединений в пуле
+    db_max_overflow: int = 10  # дополнительных соединений сверх pool_size при пике
+    db_pool_timeout: float = 30.0  # секунды ожидания свободного соединения
+    db_pool_recycle: int = 1800  # секунды жизни соединения, -1 — без ограничения
+    db_pool_pre_ping: bool = False  # проверять соединение перед выдачей (лишний round-trip)
+    db_statement_cache_size: int = 100  # подготовленных запросов на соединение asyncpg
+    # За PgBouncer в режиме transaction: без кэша подготовленных запросов,
+    # db_null_pool — не держать соединения в процессе, пулом управляет PgBouncer
+    db_pgbouncer: bool = False
+    db_null_pool: bool = False
+
+    # Шардирование incoming_sms по to_number (app.core.sharding).
+    # URL дополнительных БД (postgresql+asyncpg://...) в JSON: DB_SHARDS='["...", "..."]';
+    # шард 0 — основная БД из db_*. Новые шарды только дописываются в конец:
+    # номер шарда задает его имя на кольце и диапазон id
+    db_shards: list[str] = []
+    db_shard_vnodes: int = 128  # точек шарда на кольце консистентного хеширования
+
+    # Реплики основной БД для чтения (app.core.replicas), URL в JSON, как db_shards.
+    # Реплика получает чтения, пока монитор здоровья видит ее отставание не больше
+    # db_replica_max_lag; с health_monitor_enabled=false реплики не используются
+    db_replicas: list[str] = []
+    db_replica_max_lag: float = 5.0  # секунды
+    # Секунды после приема SMS на номер, в течение которых чтения по номеру идут в primary
+    db_read_your_writes_window: float = 10.0
+
     # Twilio
     twilio_account_sid: str
     twilio_auth_token: str
     twilio_phone_number: str | None = None  # опционально, для отправки SMS
+    twilio_webhook_base_url: str | None = None  # внешний https://host, если сервис за прокси
+    twilio_api_base_url: str = "https://api.twilio.com"
+    twilio_timeout: float = 10.0  # секунды на чтение/запись ответа
+    twilio_connect_timeout: float = 5.0
+    twilio_max_connections: int = 100
+    twilio_max_keepalive_connections: int = 20
+    twilio_keepalive_expiry: float = 30.0  # секунды жизни простаивающего соединения
+    # Массовая отправка: пропускная способность аккаунта (MPS) и параллелизм
+    twilio_send_rate: float = 1.0  # сообщений в секунду на аккаунт
+    twilio_send_burst: int = 1  # сколько сообщений можно отправить разом после простоя
+    twilio_send_concurrency: int = 20  # одновременных запросов в одной рассылке
+    twilio_batch_max_recipients: int = 1000
+
+    # OnlineSIM
+    onlinesim_api_base_url: str = "https://onlinesim.io"
+    onlinesim_api_key: str | None = None
+    onlinesim_timeout: float = 10.0
+    onlinesim_connect_timeout: float = 5.0
+    onlinesim_max_connections: int = 20
+    onlinesim_max_keepalive_connections: int = 10
+    onlinesim_keepalive_expiry: float = 30.0
+
+    # Кэш редко меняющихся данных провайдеров (аккаунт Twilio, баланс OnlineSIM)
+    provider_lookup_cache_ttl: float = 60.0  # секунды
+
+    # Outbox исходящих SMS (outbound_sms) и его воркеры
+    outbox_enabled: bool = True  # запускать воркеры в этом процессе
+    outbox_workers: int = 4
+    outbox_batch_size: int = 50  # строк за один захват
+    outbox_poll_interval: float = 1.0  # секунды простоя при пустой очереди
+    outbox_lease: float = 60.0  # секунды, после которых зависшую отправку заберет другой воркер
+    outbox_max_attempts: int = 8
+    outbox_backoff_base: float = 2.0  # секунды до первого повтора, дальше удваивается
+    outbox_backoff_max: float = 600.0
+    outbox_batch_max_messages: int = 1000
+
+    # Прием входящих SMS
+    sms_ingest_mode: Literal["direct", "batched"] = "direct"
+    sms_ingest_batch_size: int = 500  # максимум строк в одном INSERT
+    sms_ingest_flush_interval: float = 0.05  # секунды ожидания добора батча
+    sms_ingest_queue_size: int = 10_000
+    sms_ingest_enqueue_timeout: float = 1.0  # секунды, после которых отвечаем 503
+
+    # Дедупликация повторных webhook'ов по MessageSid
+    sms_dedup_enabled: bool = True
+    sms_dedup_cache_size: int = 100_000
+    sms_dedup_ttl: float = 3600.0  # секунды
+    sms_dedup_bloom_capacity: int = 1_000_000
+    sms_dedup_bloom_error_rate: float = 0.001
+
+    # Кэш ответов GET /api/v1/sms/{sms_id}
+    sms_cache_enabled: bool = True
+    sms_cache_size: int = 50_000
+    sms_cache_ttl: float = 300.0  # секунды жизни записи в процессе
+    sms_cache_max_age: int = 60  # Cache-Control: max-age для клиентов
+
+    # Потоковая выгрузка
+    sms_export_fetch_size: int = 1000  # строк за один fetch серверного курсора
+
+    # Массовый импорт (python -m app.cli.import_sms)
+    sms_import_batch_size: int = 20000  # строк на один COPY + слияние в incoming_sms
+
+    # Секционирование incoming_sms (python -m app.cli.partitions)
+    sms_partition_months_ahead: int = 3
+    sms_retention_months: int | None = None  # None — хранить бессрочно
+    sms_retention_drop: bool = False  # False — только DETACH, таблица остается для архива
+
+    # Извлечение OTP-кодов при приеме (группа code обязательна, sender — опционально)
+    otp_patterns: list[str] = [
+        r"(?i)(?:code|код|pin|otp|пароль|password)\D{0,20}?(?P<code>\d{3}[- ]?\d{3}|\d{4,8})\b",
+        r"(?i)\b(?P<code>\d{3}[- ]?\d{3}|\d{4,8})\b\D{0,20}?(?:is your|ваш|your)\b",
+    ]
+    # Отправитель в тексте, если паттерн кода его не захватил:
+    # "[Google] ...", "Telegram: ...", "Telegram code ..."
+    otp_sender_patterns: list[str] = [
+        r"^\s*[\[<(](?P<sender>[^\]>)]{2,64})[\]>)]",
+        r"^\s*(?P<sender>[A-Za-z][\w .&-]{1,30}):\s",
+        r"^\s*(?!(?:Your|Ваш|Code|Код)\b)(?P<sender>[A-ZА-Я][\w.&-]{1,30})\s+(?i:code|код)\b",
+    ]
+
+    # Push-доставка новых SMS (LISTEN/NOTIFY): /sms/wait и /sms/stream
+    sms_notify_enabled: bool = True
+    sms_notify_channel: str = "incoming_sms"
+    sms_notify_queue_size: int = 100  # событий на одного ожидающего клиента
+    sms_wait_max_timeout: float = 60.0  # секунды, верхняя граница long-poll
+    sms_wait_lookback: float = 600.0  # секунды, глубина поиска по after_id
+    sms_sse_heartbeat: float = 15.0  # секунды между комментариями-пингами SSE
 
     @property
     def database_url(self) -> str:
@@ -28,6 +155,14 @@ class Settings(BaseSettings):
             f"@{self.db_host}:{self.db_port}/{self.db_name}"
         )
 
+    @property
+    def asyncpg_dsn(self) -> str:
+        # Тот же сервер без драйверного префикса SQLAlchemy — для прямых asyncpg-соединений
+        return (
+            f"postgresql://{self.db_user}:{self.db_password}"
+            f"@{self.db_host}:{self.db_port}/{self.db_name}"
+        )
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,9 +1,14 @@
-from typing import AsyncGenerator
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncGenerator
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
 
 
 settings = get_settings()
@@ -13,21 +18,184 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.app_debug,
-    future=True,
-)
+class DbPoolStats:
+    """
+    Счетчики выдачи соединений из пула.
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
-    class_=AsyncSession,
-)
+    Время выдачи — от запроса соединения до его получения: ожидание
+    свободного соединения, открытие нового и pre-ping. Последние window
+    замеров хранятся для перцентилей.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits: deque[float] = deque(maxlen=window)
+
+    def record_checkout(self, wait: float) -> None:
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self._waits.append(wait)
+
+    def stats(self) -> dict[str, Any]:
+        waits = sorted(self._waits)
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_p95_ms": round(p95 * 1000, 3),
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+class _InstrumentedPoolMixin:
+    """
+    Замер выдачи соединений. Счетчики переживают recreate() (engine.dispose()).
+    """
+
+    stats: DbPoolStats
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = DbPoolStats()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def _create_connection(self):
+        self.stats.connects += 1
+        return super()._create_connection()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def snapshot(self) -> dict[str, Any]:
+        return self.stats.stats()
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    # Логгер пула по умолчанию назван по модулю класса (app.core.db...) и
+    # унаследовал бы DEBUG логгера app; пишем туда же, куда стандартные пулы
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.InstrumentedQueuePool"
+
+    def snapshot(self) -> dict[str, Any]:
+        checked_out = self.checkedout()
+        # max_overflow = -1 — без верхней границы, насыщение не определено
+        capacity = self.size() + self._max_overflow if self._max_overflow >= 0 else None
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_in": self.checkedin(),
+            "checked_out": checked_out,
+            "overflow": max(self.overflow(), 0),
+            "saturation": round(checked_out / capacity, 3) if capacity else None,
+            **super().snapshot(),
+        }
+
+
+class InstrumentedNullPool(_InstrumentedPoolMixin, NullPool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.InstrumentedNullPool"
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def build_engine(settings: Settings, url: str | None = None, **kwargs: Any) -> AsyncEngine:
+    """
+    Async engine с пулом и кэшем подготовленных запросов по настройкам db_*.
+
+    url — другая БД с теми же настройками пула (шард), по умолчанию database_url.
+
+    db_pgbouncer отключает кэш подготовленных запросов: PgBouncer в режиме
+    transaction отдает запросы разным серверным соединениям, и подготовленный
+    на одном запрос на другом не найдется. Имена делаются уникальными,
+    чтобы не пересекаться с оставшимися от других клиентов.
+    """
+    connect_args: dict[str, Any] = {"prepared_statement_cache_size": settings.db_statement_cache_size}
+    if settings.db_pgbouncer:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": _unique_statement_name,
+        }
+
+    if settings.db_null_pool:
+        pool_args: dict[str, Any] = {"poolclass": InstrumentedNullPool}
+    else:
+        pool_args = {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+        }
+
+    engine = create_async_engine(
+        url or settings.database_url,
+        echo=settings.db_echo,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=connect_args,
+        **pool_args,
+        **kwargs,
+    )
+
+    @event.listens_for(engine.sync_engine, "invalidate")
+    def _count_invalidation(dbapi_connection, connection_record, exception) -> None:
+        pool = engine.sync_engine.pool
+        if isinstance(pool, _InstrumentedPoolMixin):
+            pool.stats.invalidations += 1
+
+    return engine
+
+
+def db_pool_stats(engine: AsyncEngine) -> dict[str, Any]:
+    """
+    Текущее состояние пула engine и счетчики выдачи соединений.
+    """
+    pool = engine.sync_engine.pool
+    stats: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, _InstrumentedPoolMixin):
+        stats.update(pool.snapshot())
+    return stats
+
+
+def build_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=engine,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+        class_=AsyncSession,
+    )
+
+
+engine = build_engine(settings)
+
+AsyncSessionLocal = build_session_factory(engine)
 
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+def get_db_engine() -> AsyncEngine:
+    return engine
@@ -0,0 +1,92 @@
+import logging
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+
+from app.core.metrics import provider_event_hooks
+
+logger = logging.getLogger("app.http_clients")
+
+ClientFactory = Callable[[], httpx.AsyncClient]
+
+
+def build_http_client(
+    base_url: str,
+    timeout: float,
+    connect_timeout: float,
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float,
+    transport: httpx.AsyncBaseTransport | None = None,
+    provider: str | None = None,
+    **kwargs: Any,
+) -> httpx.AsyncClient:
+    """
+    httpx.AsyncClient с пулом keep-alive соединений и раздельными таймаутами.
+
+    Если задан provider, время ответов пишется в provider_request_duration_seconds.
+    """
+    if provider is not None:
+        kwargs["event_hooks"] = provider_event_hooks(provider)
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        transport=transport,
+        **kwargs,
+    )
+
+
+class HttpClientRegistry:
+    """
+    Реестр долгоживущих HTTP-клиентов внешних провайдеров (Twilio, OnlineSIM).
+
+    Клиенты регистрируются фабриками и создаются один раз: в lifespan (start)
+    или при первом обращении вне его (CLI, тесты). Все запросы к провайдеру
+    идут через один пул соединений, TCP/TLS-рукопожатие не повторяется
+    на каждый запрос. aclose закрывает пулы при остановке приложения.
+    """
+
+    def __init__(self) -> None:
+        self._factories: dict[str, ClientFactory] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+    def register(self, name: str, factory: ClientFactory) -> None:
+        self._factories[name] = factory
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._factories[name]()
+            self._clients[name] = client
+        return client
+
+    async def start(self) -> None:
+        for name in self._factories:
+            self.get(name)
+        logger.info("HTTP clients started", extra={"clients": sorted(self._factories)})
+
+    async def aclose(self, name: str | None = None) -> None:
+        names = [name] if name is not None else list(self._clients)
+        for client_name in names:
+            client = self._clients.pop(client_name, None)
+            if client is not None:
+                await client.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            name: {"open": name in self._clients and not self._clients[name].is_closed}
+            for name in sorted(self._factories)
+        }
+
+
+http_clients = HttpClientRegistry()
+
+
+def get_http_clients() -> HttpClientRegistry:
+    return http_clients
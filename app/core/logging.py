@@ -1,8 +1,96 @@
+import copy
 import logging
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+import orjson
 
 from app.core.config import get_settings
 
+# id текущего HTTP-запроса; выставляет RequestIdMiddleware
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Атрибуты LogRecord; все остальное пришло через extra={...}
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None)).keys()
+    | {"message", "asctime", "request_id", "taskName"}
+)
+
+_exception_formatter = logging.Formatter()
+_listener: QueueListener | None = None
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    QueueHandler, который на потоке event loop только фиксирует запись.
+
+    Здесь подставляются аргументы сообщения, request_id из contextvar
+    (в потоке слушателя контекста запроса уже нет) и текст исключения.
+    Форматирование и запись в поток выполняет QueueListener в своем потоке.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Одна JSON-строка на запись: время, уровень, логгер, сообщение, request_id и поля extra.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return orjson.dumps(entry, default=str, option=orjson.OPT_UTC_Z).decode()
+
+
+def _build_queue_handler(log_format: str) -> QueueHandler:
+    global _listener
+    stop_logging()
+
+    stream = logging.StreamHandler(sys.stdout)
+    if log_format == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(
+            logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(request_id)s | %(message)s")
+        )
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    return ContextQueueHandler(log_queue)
+
 
 def setup_logging() -> None:
     settings = get_settings()
@@ -13,15 +101,10 @@ def setup_logging() -> None:
         {
             "version": 1,
             "disable_existing_loggers": False,
-            "formatters": {
-                "default": {
-                    "format": "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-                },
-            },
             "handlers": {
                 "console": {
-                    "class": "logging.StreamHandler",
-                    "formatter": "default",
+                    "()": _build_queue_handler,
+                    "log_format": settings.log_format,
                 },
             },
             "loggers": {
@@ -53,4 +136,14 @@ def setup_logging() -> None:
         }
     )
 
-    logging.getLogger("app").info("Logging is configured", extra={"env": settings.app_env})
\ No newline at end of file
+    logging.getLogger("app").info("Logging is configured", extra={"env": settings.app_env})
+
+
+def stop_logging() -> None:
+    """
+    Дописывает накопленные в очереди записи и останавливает поток слушателя.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,182 @@
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger("app.metrics")
+
+# Границы гистограмм в секундах: от быстрых выборок по индексу до медленных провайдеров
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP-запросы по шаблону маршрута и коду ответа",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса по шаблону маршрута",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке",
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения SQL-запроса по типу операции",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+SMS_INGESTED = Counter(
+    "sms_ingested_total",
+    "Входящие SMS из webhook'ов: сохранены впервые или распознаны как повтор",
+    ["result"],
+)
+PROVIDER_REQUEST_DURATION = Histogram(
+    "provider_request_duration_seconds",
+    "Время ответа внешнего провайдера (до заголовков ответа)",
+    ["provider", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Маршрут не найден: один label на все пути, чтобы сканеры не раздували кардинальность
+UNMATCHED_ROUTE = "<unmatched>"
+
+_SQL_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY"})
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: длительность и коды ответов по шаблону маршрута.
+
+    Шаблон (/api/v1/sms/{sms_id}) берется из scope["route"], который FastAPI
+    заполняет при сопоставлении, поэтому число серий не растет с числом id.
+    Время считается до конца отправки тела, включая потоковые ответы.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        # labels() на каждый запрос берет блокировку и проверяет метки — кэшируем серии
+        self._durations: dict[tuple[str, str], Any] = {}
+        self._counters: dict[tuple[str, str, int], Any] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            duration = self._durations.get((method, template))
+            if duration is None:
+                duration = self._durations[method, template] = HTTP_REQUEST_DURATION.labels(method, template)
+            duration.observe(time.perf_counter() - started)
+            counter = self._counters.get((method, template, status_code))
+            if counter is None:
+                counter = self._counters[method, template, status_code] = HTTP_REQUESTS.labels(
+                    method, template, str(status_code)
+                )
+            counter.inc()
+
+
+def sql_operation(statement: str) -> str:
+    # Первое слово запроса; срез, чтобы не копировать длинный текст
+    parts = statement[:16].split(None, 1)
+    keyword = parts[0].upper() if parts else ""
+    return keyword if keyword in _SQL_OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Замер каждого SQL-запроса engine через события before/after_cursor_execute.
+    """
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = getattr(context, "_metrics_started", None)
+        if started is not None:
+            DB_QUERY_DURATION.labels(sql_operation(statement)).observe(time.perf_counter() - started)
+
+
+def provider_event_hooks(provider: str) -> dict[str, list[Callable]]:
+    """
+    event_hooks для httpx.AsyncClient: время ответа провайдера по методу и коду.
+    """
+    async def on_request(request: httpx.Request) -> None:
+        request.extensions["metrics_started"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response) -> None:
+        started = response.request.extensions.get("metrics_started")
+        if started is not None:
+            PROVIDER_REQUEST_DURATION.labels(
+                provider, response.request.method, str(response.status_code)
+            ).observe(time.perf_counter() - started)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+class StatsCollector(Collector):
+    """
+    Отдает счетчики компонентов (кэши, дедупликация, пул БД) как gauge при scrape.
+
+    Компоненты уже ведут stats() для /api/v1/stats/*, поэтому на горячем пути
+    ничего не пишется: значения читаются только при запросе /metrics.
+    """
+
+    def __init__(self) -> None:
+        self._sources: dict[str, Callable[[], dict[str, Any] | None]] = {}
+
+    def register(self, component: str, source: Callable[[], dict[str, Any] | None]) -> None:
+        self._sources[component] = source
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            "app_component_stat",
+            "Счетчики и размеры внутренних компонентов (см. /api/v1/stats)",
+            labels=["component", "stat"],
+        )
+        for component, source in self._sources.items():
+            try:
+                stats = source() or {}
+            except Exception:
+                logger.exception("Failed to collect component stats", extra={"component": component})
+                continue
+            for name, value in stats.items():
+                if isinstance(value, (int, float)):
+                    family.add_metric([component, name], float(value))
+        yield family
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,12 +1,22 @@
 import logging
 import uuid
 
-from fastapi import Request
+from app.core.logging import request_id_var
 
 logger = logging.getLogger("app.request")
 
+# Длиннее — не доверяем заголовку клиента и выдаем свой id
+MAX_REQUEST_ID_LENGTH = 128
+
 
 class RequestIdMiddleware:
+    """
+    Берет X-Request-ID из запроса (или генерирует), кладет его в contextvar
+    для логов и возвращает в заголовке ответа.
+
+    Заголовки читаются прямо из ASGI scope, без построения Request.
+    """
+
     def __init__(self, app):
         self.app = app
 
@@ -15,24 +25,28 @@ class RequestIdMiddleware:
             await self.app(scope, receive, send)
             return
 
-        request = Request(scope, receive=receive)
-        request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
-        scope["request_id"] = request_id  # можно использовать в логгере, если нужно
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                if 0 < len(value) <= MAX_REQUEST_ID_LENGTH:
+                    request_id = value.decode("latin-1")
+                break
+        if request_id is None:
+            request_id = str(uuid.uuid4())
+        scope["request_id"] = request_id
+        header = (b"x-request-id", request_id.encode("latin-1"))
 
         async def send_wrapper(message):
             if message["type"] == "http.response.start":
-                headers = message.setdefault("headers", [])
-                headers.append((b"x-request-id", request_id.encode()))
+                message["headers"] = [*message.get("headers", ()), header]
             await send(message)
 
-        logger.info(
-            "Incoming request",
-            extra={
-                "method": request.method,
-                "path": request.url.path,
-                "request_id": request_id,
-            },
-        )
-
-        response = await self.app(scope, receive, send_wrapper)
-        return response
\ No newline at end of file
+        token = request_id_var.set(request_id)
+        try:
+            logger.info(
+                "Incoming request",
+                extra={"method": scope["method"], "path": scope["path"]},
+            )
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+
+
+class InvalidCursorError(ValueError):
+    """Курсор пагинации поврежден или создан не этим сервисом."""
+
+
+def _pack(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def _unpack(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    values = json.loads(base64.urlsafe_b64decode(padded))
+    if not isinstance(values, list):
+        raise TypeError("cursor payload must be a list")
+    return values
+
+
+def _received_at(value: str) -> datetime:
+    received_at = datetime.fromisoformat(value)
+    if received_at.tzinfo is None:
+        raise ValueError("cursor timestamp must be timezone-aware")
+    return received_at
+
+
+def encode_cursor(received_at: datetime, sms_id: int) -> str:
+    """
+    Упаковывает позицию (received_at, id) последней строки страницы в непрозрачную строку.
+    """
+    return _pack([received_at.isoformat(), sms_id])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        received_at, sms_id = _unpack(cursor)
+        return _received_at(received_at), int(sms_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid pagination cursor") from exc
+
+
+def encode_rank_cursor(rank: float, received_at: datetime, sms_id: int) -> str:
+    """
+    Курсор для выдачи, отсортированной по релевантности: (rank, received_at, id).
+    """
+    return _pack([rank, received_at.isoformat(), sms_id])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, datetime, int]:
+    try:
+        rank, received_at, sms_id = _unpack(cursor)
+        return float(rank), _received_at(received_at), int(sms_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid pagination cursor") from exc
@@ -0,0 +1,197 @@
+import itertools
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.cache import TTLLRUCache
+from app.core.config import Settings, get_settings
+from app.core.db import build_engine, build_session_factory, db_pool_stats
+
+# Состояние репликации. Роли для проверок нужен pg_monitor (pg_read_all_stats):
+# без него status в pg_stat_wal_receiver пуст и реплика считается не streaming
+REPLICA_LAG_SQL = text(
+    """
+    SELECT
+        pg_is_in_recovery() AS in_recovery,
+        EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') AS streaming,
+        pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() AS caught_up,
+        EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) AS replay_delay
+    """
+)
+
+
+def replica_lag(
+    in_recovery: bool,
+    streaming: bool,
+    caught_up: bool | None,
+    replay_delay: float | None,
+) -> float | None:
+    """
+    Отставание реплики в секундах, None — неизвестно.
+
+    Если реплика получает WAL и все полученное уже применено, она догнала
+    primary: now() - pg_last_xact_replay_timestamp() тогда показывает лишь
+    время простоя primary без записей. При отключенном WAL receiver равенство
+    LSN ничего не говорит — отставание считается от последней примененной
+    транзакции. Не реплика (pg_is_in_recovery() = false) не отстает.
+    """
+    if not in_recovery:
+        return 0.0
+    if streaming and caught_up:
+        return 0.0
+    return float(replay_delay) if replay_delay is not None else None
+
+
+class ReplicaLagError(Exception):
+    """Реплика отстает от primary больше допустимого или отставание неизвестно."""
+
+
+@dataclass(slots=True)
+class Replica:
+    index: int
+    engine: AsyncEngine
+    session_factory: async_sessionmaker[AsyncSession]
+    # Пока проверок не было, отставание неизвестно — чтения идут в primary
+    available: bool = False
+    lag: float | None = None
+    in_recovery: bool | None = None
+    checks: int = 0
+    failures: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"replica{self.index}"
+
+
+class ReplicaRouter:
+    """
+    Чтение с реплик основной БД с учетом отставания.
+
+    Реплика получает запросы, пока ее последняя проверка (check, ее вызывает
+    монитор здоровья) прошла и отставание не больше max_lag; доступные реплики
+    выбираются по кругу, без доступных чтения идут в primary.
+
+    Read-your-writes: после приема SMS на номер чтения по этому номеру
+    read_your_writes_window секунд идут в primary. Записи учитываются только
+    в этом процессе; клиент может явно попросить primary (X-Read-Consistency).
+    """
+
+    def __init__(
+        self,
+        replicas: Sequence[Replica],
+        max_lag: float,
+        read_your_writes_window: float,
+        recent_writes_size: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.replicas = tuple(replicas)
+        self._max_lag = max_lag
+        self._recent_writes: TTLLRUCache[str, bool] = TTLLRUCache(
+            maxsize=recent_writes_size,
+            ttl=read_your_writes_window,
+            clock=clock,
+        )
+        self._turn = itertools.count()
+        self.replica_sessions = 0
+        self.primary_fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def available(self) -> list[Replica]:
+        return [replica for replica in self.replicas if replica.available]
+
+    def read_session(self) -> AsyncSession | None:
+        """
+        Сессия доступной реплики или None — тогда читать из primary.
+        """
+        if not self.enabled:
+            return None
+        candidates = self.available()
+        if not candidates:
+            self.primary_fallbacks += 1
+            return None
+        self.replica_sessions += 1
+        return candidates[next(self._turn) % len(candidates)].session_factory()
+
+    def record_write(self, to_number: str) -> None:
+        if self.enabled:
+            self._recent_writes.set(to_number, True)
+
+    def wrote_recently(self, to_number: str) -> bool:
+        return self.enabled and self._recent_writes.get(to_number) is not None
+
+    async def check(self, replica: Replica) -> dict[str, Any]:
+        """
+        Измеряет отставание реплики и решает, можно ли с нее читать.
+
+        Ошибка, таймаут (отмена) и слишком большое отставание снимают реплику
+        с чтения до следующей успешной проверки.
+        """
+        replica.checks += 1
+        try:
+            async with replica.engine.connect() as conn:
+                in_recovery, streaming, caught_up, replay_delay = (
+                    await conn.execute(REPLICA_LAG_SQL)
+                ).one()
+        except BaseException:
+            replica.available = False
+            replica.failures += 1
+            raise
+
+        replica.in_recovery = in_recovery
+        replica.lag = replica_lag(in_recovery, streaming, caught_up, replay_delay)
+        replica.available = replica.lag is not None and replica.lag <= self._max_lag
+        if not replica.available:
+            replica.failures += 1
+            raise ReplicaLagError(
+                f"{replica.name} replication lag {replica.lag} exceeds {self._max_lag}s"
+            )
+        return {"lag_seconds": round(replica.lag, 3), "in_recovery": in_recovery}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "replicas": len(self.replicas),
+            "available": len(self.available()),
+            "replica_sessions": self.replica_sessions,
+            "primary_fallbacks": self.primary_fallbacks,
+            "recent_writes": len(self._recent_writes),
+        }
+
+    def replica_stats(self, replica: Replica) -> dict[str, Any]:
+        return {
+            "available": int(replica.available),
+            "lag_seconds": replica.lag,
+            "checks": replica.checks,
+            "failures": replica.failures,
+            **db_pool_stats(replica.engine),
+        }
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def build_replica_router(settings: Settings, **kwargs: Any) -> ReplicaRouter:
+    replicas = []
+    for index, url in enumerate(settings.db_replicas, start=1):
+        replica_engine = build_engine(settings, url=url)
+        replicas.append(Replica(index, replica_engine, build_session_factory(replica_engine)))
+    return ReplicaRouter(
+        replicas,
+        max_lag=settings.db_replica_max_lag,
+        read_your_writes_window=settings.db_read_your_writes_window,
+        **kwargs,
+    )
+
+
+replica_router = build_replica_router(get_settings())
+
+
+def get_replica_router() -> ReplicaRouter:
+    return replica_router
@@ -0,0 +1,26 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+# OPT_UTC_Z: UTC-время как "...Z", как его сериализует pydantic
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dump_json(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ через orjson.
+
+    Для горячих списков: эндпоинт собирает словари прямо из строк выборки
+    и возвращает этот ответ, минуя валидацию response_model и json.dumps.
+    response_model в декораторе остается для документации OpenAPI.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
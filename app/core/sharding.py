@@ -0,0 +1,146 @@
+import bisect
+import hashlib
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.config import Settings, get_settings
+from app.core.db import AsyncSessionLocal, build_engine, build_session_factory, engine
+
+# id SMS на шарде N лежат в [N << SHARD_ID_BITS, (N + 1) << SHARD_ID_BITS):
+# по id сразу видно, на каком шарде строка. 32 шарда держат id ниже 2**53 —
+# их без потерь читают JavaScript-клиенты
+SHARD_ID_BITS = 48
+MAX_SHARDS = 1 << (53 - SHARD_ID_BITS)
+
+
+class ShardConfigError(Exception):
+    """Конфигурация шардов не совпадает с состоянием их БД."""
+
+
+def _hash(key: str) -> int:
+    # hash() строк рандомизирован между процессами, нужен стабильный хеш
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class ConsistentHashRing:
+    """
+    Кольцо консистентного хеширования с виртуальными узлами.
+
+    Каждый узел занимает vnodes точек кольца, ключ принадлежит ближайшей
+    точке по часовой стрелке от своего хеша. При добавлении N+1-го узла
+    на него переезжает примерно 1/(N+1) ключей, остальные остаются на месте.
+    """
+
+    def __init__(self, nodes: Sequence[str], vnodes: int = 128) -> None:
+        if not nodes:
+            raise ValueError("hash ring needs at least one node")
+        points = sorted((_hash(f"{node}#{replica}"), node) for node in nodes for replica in range(vnodes))
+        self.nodes = tuple(nodes)
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(key))
+        return self._owners[index % len(self._owners)]
+
+
+@dataclass(slots=True)
+class Shard:
+    index: int
+    engine: AsyncEngine
+    session_factory: async_sessionmaker[AsyncSession]
+
+    @property
+    def name(self) -> str:
+        return f"shard{self.index}"
+
+    @property
+    def id_range(self) -> tuple[int, int]:
+        # У шарда 0 (основная БД) диапазон начинается с 1 — прежние id в нем
+        return max(self.index << SHARD_ID_BITS, 1), ((self.index + 1) << SHARD_ID_BITS) - 1
+
+    @property
+    def asyncpg_dsn(self) -> str:
+        return self.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class ShardRouter:
+    """
+    Выбор БД для incoming_sms: по to_number — консистентным хешем, по id — по диапазону.
+
+    С одним шардом (db_shards пуст) все запросы идут в основную БД.
+    """
+
+    def __init__(self, shards: Sequence[Shard], vnodes: int = 128) -> None:
+        if len(shards) > MAX_SHARDS:
+            raise ShardConfigError(f"at most {MAX_SHARDS} shards are supported")
+        self.shards = tuple(shards)
+        self._by_name = {shard.name: shard for shard in self.shards}
+        self._ring = ConsistentHashRing([shard.name for shard in self.shards], vnodes)
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.shards) > 1
+
+    def for_number(self, to_number: str) -> Shard:
+        if not self.sharded:
+            return self.shards[0]
+        return self._by_name[self._ring.node_for(to_number)]
+
+    def for_id(self, sms_id: int) -> Shard | None:
+        index = sms_id >> SHARD_ID_BITS
+        return self.shards[index] if 0 <= index < len(self.shards) else None
+
+    async def dispose(self) -> None:
+        for shard in self.shards:
+            await shard.engine.dispose()
+
+
+async def prepare_shard(shard: Shard) -> dict[str, Any]:
+    """
+    Переводит последовательность incoming_sms.id шарда в его диапазон id.
+
+    Идемпотентна: на пустом шарде последовательность начинается с начала
+    диапазона, на уже заполненном только уточняются границы. Если выданные
+    id вне диапазона — БД стоит в db_shards не на своем месте, это ошибка.
+    """
+    first, last = shard.id_range
+    async with shard.engine.connect() as conn:
+        revision = await conn.scalar(text("SELECT version_num FROM alembic_version"))
+        last_value, is_called = (
+            await conn.execute(text("SELECT last_value, is_called FROM incoming_sms_id_seq"))
+        ).one()
+        issued = last_value if is_called else last_value - 1
+        if issued > last or 0 < issued < first:
+            raise ShardConfigError(
+                f"{shard.name}: incoming_sms_id_seq already issued {issued}, "
+                f"outside the shard range [{first}, {last}]"
+            )
+        restart = " RESTART" if issued < first else ""
+        await conn.execute(
+            text(
+                f"ALTER SEQUENCE incoming_sms_id_seq MINVALUE {first} MAXVALUE {last} "
+                f"START WITH {first}{restart}"
+            )
+        )
+        await conn.commit()
+    return {"shard": shard.name, "revision": revision, "first_id": first, "last_id": last}
+
+
+def build_shard_router(settings: Settings) -> ShardRouter:
+    shards = [Shard(0, engine, AsyncSessionLocal)]
+    for index, url in enumerate(settings.db_shards, start=1):
+        shard_engine = build_engine(settings, url=url)
+        shards.append(Shard(index, shard_engine, build_session_factory(shard_engine)))
+    return ShardRouter(shards, settings.db_shard_vnodes)
+
+
+shard_router = build_shard_router(get_settings())
+
+
+def get_shard_router() -> ShardRouter:
+    return shard_router
@@ -1,38 +1,106 @@
-from fastapi import Request, HTTPException, status, Form
-from twilio.request_validator import RequestValidator
+import base64
+import hashlib
+import hmac
+from collections.abc import Iterable
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
+
+from fastapi import Request, HTTPException, status
 
 from app.core.config import Settings, get_settings
 
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+class TwilioSignatureValidator:
+    """
+    Проверка X-Twilio-Signature: base64(HMAC-SHA1(auth_token, url + name1value1 + ...)).
+
+    Состояние HMAC с ключом готовится один раз и копируется на каждый запрос.
+    Параметры подписываются все, что прислал Twilio, в порядке сортировки
+    (name, value) — как в twilio.request_validator.RequestValidator.
+    """
+
+    def __init__(self, auth_token: str) -> None:
+        self._mac = hmac.new(auth_token.encode(), digestmod=hashlib.sha1)
+
+    def compute_signature(self, url: str, params: Iterable[tuple[str, str]]) -> str:
+        mac = self._mac.copy()
+        mac.update(url.encode())
+        for name, value in sorted(set(params)):
+            mac.update(name.encode())
+            mac.update(value.encode())
+        return base64.b64encode(mac.digest()).decode()
+
+    def validate(self, url: str, params: Iterable[tuple[str, str]], signature: str) -> bool:
+        params = list(params)
+        if hmac.compare_digest(self.compute_signature(url, params), signature):
+            return True
+        # Twilio подписывает URL то с портом, то без — проверяем второй вариант
+        alternative = _toggle_default_port(url)
+        return alternative is not None and hmac.compare_digest(
+            self.compute_signature(alternative, params), signature
+        )
+
+
+def _toggle_default_port(url: str) -> str | None:
+    parts = urlsplit(url)
+    default_port = _DEFAULT_PORTS.get(parts.scheme)
+    if default_port is None or not parts.hostname:
+        return None
+    netloc = parts.netloc.rsplit("@", 1)
+    userinfo = netloc[0] + "@" if len(netloc) == 2 else ""
+    if parts.port is None:
+        host = f"{netloc[-1]}:{default_port}"
+    elif parts.port == default_port:
+        host = netloc[-1].rsplit(":", 1)[0]
+    else:
+        return None
+    return urlunsplit((parts.scheme, userinfo + host, parts.path, parts.query, parts.fragment))
+
+
+@lru_cache
+def get_twilio_signature_validator() -> TwilioSignatureValidator:
+    return TwilioSignatureValidator(get_settings().twilio_auth_token)
+
+
+def webhook_url(request: Request, settings: Settings) -> str:
+    """
+    URL, который подписал Twilio: путь и query-строка запроса.
+
+    За прокси, где схема/хост снаружи отличаются, задайте twilio_webhook_base_url.
+    """
+    path = request.scope["path"]
+    query = request.scope.get("query_string", b"")
+    if settings.twilio_webhook_base_url:
+        base = settings.twilio_webhook_base_url.rstrip("/")
+    else:
+        base = f"{request.scope.get('scheme', 'http')}://{request.headers.get('host', '')}"
+    return f"{base}{path}?{query.decode('latin-1')}" if query else f"{base}{path}"
+
 
 async def validate_twilio_signature(
     request: Request,
-    form_data: dict,
+    form_data: Iterable[tuple[str, str]] | dict[str, str],
     settings: Settings,
 ) -> None:
     """
     Валидирует подпись Twilio webhook через X-Twilio-Signature.
-    
-    Twilio использует HMAC-SHA1 для подписи запроса.
+
+    Twilio использует HMAC-SHA1 для подписи запроса. form_data — все
+    параметры запроса (пары или словарь), иначе подпись не сойдется.
     """
-    validator = RequestValidator(settings.twilio_auth_token)
-    
-    # Получаем подпись из заголовка
     signature = request.headers.get("X-Twilio-Signature")
     if not signature:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Missing X-Twilio-Signature header",
         )
-    
-    # Получаем URL запроса (без query параметров для валидации)
-    url = str(request.url).split('?')[0]
-    
-    # Валидируем подпись
-    is_valid = validator.validate(url, form_data, signature)
-    
-    if not is_valid:
+
+    params = form_data.items() if isinstance(form_data, dict) else form_data
+    validator = get_twilio_signature_validator()
+    if not validator.validate(webhook_url(request, settings), params, signature):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid Twilio signature",
         )
-
@@ -1,22 +1,52 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api import health, metrics
 from app.api.errors import unhandled_exception_handler
 from app.api.v1 import api_v1_router
-from app.core.config import get_settings, Settings
-from app.core.db import get_db_session
-from app.core.logging import setup_logging
+from app.core.config import get_settings
+from app.core.db import db_pool_stats, engine
+from app.core.http_clients import http_clients
+from app.core.logging import setup_logging, stop_logging
+from app.core.metrics import MetricsMiddleware, instrument_engine, stats_collector
 from app.core.middleware import RequestIdMiddleware
+from app.core.replicas import replica_router
+from app.core.sharding import shard_router
+from app.services.health import health_monitor
+from app.services.outbox import outbox_worker_pool
+from app.services.sms_cache import get_sms_response_cache
+from app.services.sms_dedup import get_sms_dedup_cache
+from app.services.sms_ingest import sms_ingest_queue
+from app.services.sms_notifier import sms_notifier
+from app.services.twilio_client import twilio_service
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
     setup_logging()
-    _ = get_settings()
+    settings = get_settings()
+    if settings.sms_ingest_mode == "batched":
+        await sms_ingest_queue.start()
+    if settings.sms_notify_enabled:
+        await sms_notifier.start()
+    await http_clients.start()
+    if settings.outbox_enabled:
+        await outbox_worker_pool.start()
+    if settings.health_monitor_enabled:
+        await health_monitor.start()
     yield
+    # shutdown: сначала /readyz начинает отвечать 503,
+    # затем дожидаемся сохранения всех принятых сообщений
+    await health_monitor.stop()
+    await sms_ingest_queue.stop()
+    await sms_notifier.stop()
+    await outbox_worker_pool.stop()
+    await http_clients.aclose()
+    await shard_router.dispose()
+    await replica_router.dispose()
+    stop_logging()
 
 
 app = FastAPI(
@@ -36,18 +66,33 @@ app.add_middleware(
 
 
 app.include_router(api_v1_router)
+app.include_router(health.router)
 
 
-app.add_exception_handler(Exception, unhandled_exception_handler)
+settings = get_settings()
+if settings.metrics_enabled:
+    # Добавлен последним — внешний слой, видит итоговый код ответа
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
+    instrument_engine(engine)
+    stats_collector.register("db_pool", lambda: db_pool_stats(engine))
+    for shard in shard_router.shards[1:]:
+        instrument_engine(shard.engine)
+        stats_collector.register(f"db_pool_{shard.name}", lambda shard=shard: db_pool_stats(shard.engine))
+    if replica_router.enabled:
+        stats_collector.register("db_replicas", replica_router.stats)
+    for replica in replica_router.replicas:
+        instrument_engine(replica.engine)
+        stats_collector.register(
+            f"db_{replica.name}", lambda replica=replica: replica_router.replica_stats(replica)
+        )
+    stats_collector.register("sms_ingest_queue", lambda: {"size": sms_ingest_queue.qsize()})
+    stats_collector.register("sms_notifier", sms_notifier.stats)
+    stats_collector.register("twilio_account_cache", lambda: twilio_service.cache_stats()["account"])
+    if (dedup := get_sms_dedup_cache()) is not None:
+        stats_collector.register("sms_dedup", dedup.stats)
+    if (response_cache := get_sms_response_cache()) is not None:
+        stats_collector.register("sms_response_cache", response_cache.stats)
 
 
-@app.get("/health", tags=["health"])
-async def health_check(
-    settings: Settings = Depends(get_settings),
-    db: AsyncSession = Depends(get_db_session)
-):
-    return {
-        "status": "ok", 
-        "settings": settings.app_env,
-        "db_connected": db is not None,
-    }
+app.add_exception_handler(Exception, unhandled_exception_handler)
@@ -1 +1,3 @@
-from app.models.sms import SMS
\ No newline at end of file
+from app.models.outbound_sms import OutboundSms
+from app.models.sms import SMS, SmsMessageKey
+from app.models.sms_counter import SmsNumberCounter
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class OutboundSms(Base):
+    """
+    Исходящая SMS в outbox.
+
+    API только вставляет строку (status="pending"), отправляют воркеры
+    (app.services.outbox). next_attempt_at — момент, когда строку можно забрать:
+    для pending это время следующей попытки, для sending — конец аренды
+    воркера, после которого строку заберет другой воркер (если первый упал).
+    """
+    __tablename__ = "outbound_sms"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    to_number: Mapped[str] = mapped_column(String(32))
+    from_number: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    body: Mapped[str] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(String(16), default="pending", index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    provider_message_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    provider_status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+# Очередь на отправку: только незавершенные строки, в порядке готовности
+Index(
+    "ix_outbound_sms_due",
+    OutboundSms.next_attempt_at,
+    OutboundSms.id,
+    postgresql_where=OutboundSms.status.in_(("pending", "sending")),
+)
@@ -1,27 +1,46 @@
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import String, Text, DateTime, func, JSON
+from sqlalchemy import BigInteger, Computed, String, Text, DateTime, func, Index
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.db import Base
 
 
 class SMS(Base):
+    """
+    Входящая SMS.
+
+    В БД таблица секционирована по received_at (RANGE, по месяцам, миграция
+    c4d2a8e61b57) с первичным ключом (id, received_at). Для ORM достаточно id:
+    он выдается одной последовательностью и уникален, при шардировании — из
+    диапазона шарда (app.core.sharding), поэтому уникален и глобально. Уникальность
+    provider_message_id обеспечивает incoming_sms_message_keys (см. SmsMessageKey).
+    """
     __tablename__ = "incoming_sms"
 
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    provider_message_id: Mapped[str] = mapped_column(String(64), unique=True, index=True)
-    from_number: Mapped[str] = mapped_column(String(32), index=True)
-    to_number: Mapped[str] = mapped_column(String(32), index=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    provider_message_id: Mapped[str] = mapped_column(String(64), index=True)
+    from_number: Mapped[str] = mapped_column(String(32))
+    to_number: Mapped[str] = mapped_column(String(32))
     text: Mapped[str] = mapped_column(Text)
+    # Поисковый вектор по text; вычисляется Postgres, ORM его не загружает
+    text_tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple'::regconfig, text)", persisted=True),
+        deferred=True,
+    )
     received_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         index=True,
         server_default=func.now(),
     )
     status: Mapped[str] = mapped_column(String(32), default="received", index=True)
-    raw_payload: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    raw_payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    # Код подтверждения и отправитель, извлеченные из text при приеме (app.services.otp)
+    otp_code: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    otp_sender: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -31,4 +50,52 @@ class SMS(Base):
         DateTime(timezone=True),
         server_default=func.now(),
         onupdate=func.now(),
-    )
\ No newline at end of file
+    )
+
+
+class SmsMessageKey(Base):
+    """
+    Глобальный реестр provider_message_id для секционированной incoming_sms.
+
+    Заполняется BEFORE INSERT триггером: если ключ уже занят, строка
+    не вставляется (эквивалент ON CONFLICT DO NOTHING). Очищается вместе
+    с отсоединением устаревших секций.
+    """
+    __tablename__ = "incoming_sms_message_keys"
+
+    provider_message_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+
+
+# Составные индексы под keyset-пагинацию списка по номеру (received_at DESC, id ASC)
+Index("ix_incoming_sms_to_number_received_at_id", SMS.to_number, SMS.received_at.desc(), SMS.id)
+Index("ix_incoming_sms_from_number_received_at_id", SMS.from_number, SMS.received_at.desc(), SMS.id)
+
+# GIN-индекс под containment-фильтр по полям Twilio payload (raw_payload @> ...)
+Index(
+    "ix_incoming_sms_raw_payload",
+    SMS.raw_payload,
+    postgresql_using="gin",
+    postgresql_ops={"raw_payload": "jsonb_path_ops"},
+)
+
+# Полнотекстовый поиск по тексту SMS (text_tsv @@ websearch_to_tsquery(...))
+Index("ix_incoming_sms_text_tsv", SMS.text_tsv, postgresql_using="gin")
+
+# Последний OTP-код по номеру получателя (опционально — от конкретного отправителя).
+# Частичные индексы: в них попадают только SMS с извлеченным кодом.
+Index(
+    "ix_incoming_sms_otp_to_number_received_at_id",
+    SMS.to_number,
+    SMS.received_at.desc(),
+    SMS.id,
+    postgresql_where=SMS.otp_code.is_not(None),
+)
+Index(
+    "ix_incoming_sms_otp_to_number_sender_received_at_id",
+    SMS.to_number,
+    SMS.otp_sender,
+    SMS.received_at.desc(),
+    SMS.id,
+    postgresql_where=SMS.otp_code.is_not(None),
+)
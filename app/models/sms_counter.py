@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class SmsNumberCounter(Base):
+    """
+    Количество SMS на номер получателя (scope="to") или отправителя (scope="from").
+
+    Поддерживается statement-level триггерами на incoming_sms (см. миграцию),
+    поэтому учитывает любые пути записи: webhook, батчи и массовый импорт.
+    """
+    __tablename__ = "sms_number_counters"
+
+    scope: Mapped[str] = mapped_column(String(8), primary_key=True)
+    number: Mapped[str] = mapped_column(String(32), primary_key=True)
+    total: Mapped[int] = mapped_column(BigInteger, default=0)
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class OutboxSmsCreate(BaseModel):
+    to: str
+    body: str
+    from_: str | None = None
+
+
+class OutboxSmsBatchCreate(BaseModel):
+    messages: list[OutboxSmsCreate] = Field(..., min_length=1)
+
+
+class OutboundSmsInDB(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    to_number: str
+    from_number: str | None
+    body: str
+    status: str  # pending | sending | sent | failed
+    attempts: int
+    max_attempts: int
+    next_attempt_at: datetime
+    provider_message_id: str | None
+    provider_status: str | None
+    last_error: str | None
+    created_at: datetime
+    sent_at: datetime | None
+
+
+class OutboundSmsBatchResponse(BaseModel):
+    items: list[OutboundSmsInDB]
@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import Enum
 from typing import Any, Dict, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
@@ -53,6 +54,8 @@ class SmsInDB(BaseModel):
     text: str
     received_at: datetime
     status: str
+    otp_code: str | None = None
+    otp_sender: str | None = None
 
 
 class SmsListItem(BaseModel):
@@ -65,10 +68,51 @@ class SmsListItem(BaseModel):
     text: str
     received_at: datetime
     status: str
+    otp_code: str | None = None
+    otp_sender: str | None = None
+
+
+class SmsOtpResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    sms_id: int
+    to_number: str
+    from_number: str
+    otp_code: str
+    otp_sender: str | None
+    received_at: datetime
+
+
+class SmsSearchItem(SmsListItem):
+    rank: float  # релевантность ts_rank_cd
+
+
+class SmsSearchResponse(BaseModel):
+    items: list[SmsSearchItem]
+    limit: int
+    next_cursor: str | None = None
+
+
+class SearchOrder(str, Enum):
+    recent = "recent"  # новые первыми, keyset по (received_at, id)
+    rank = "rank"  # по релевантности, keyset по (rank, received_at, id)
+
+
+class TotalMode(str, Enum):
+    """
+    Как считать total в списке SMS.
+
+    exact — точное значение (по счетчикам номера или COUNT(*)),
+    estimated — оценка планировщика Postgres, none — не считать вовсе.
+    """
+    exact = "exact"
+    estimated = "estimated"
+    none = "none"
 
 
 class SmsListResponse(BaseModel):
     items: list[SmsListItem]
-    total: int
+    total: int | None  # None, если total=none
     limit: int
-    offset: int
\ No newline at end of file
+    offset: int
+    next_cursor: str | None = None  # курсор следующей страницы (keyset-пагинация)
\ No newline at end of file
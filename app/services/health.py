@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import Settings, get_settings
+from app.core.db import db_pool_stats, engine
+from app.core.replicas import ReplicaRouter, replica_router
+from app.core.sharding import ShardRouter, shard_router
+from app.services.onlinesim_client import onlinesim_client
+from app.services.twilio_client import twilio_service
+
+logger = logging.getLogger("app.health")
+
+Probe = Callable[[], Awaitable[dict[str, Any] | None]]
+
+
+@dataclass(slots=True)
+class HealthCheck:
+    """
+    Проверка зависимости и ее последний результат.
+
+    probe бросает исключение при сбое и может вернуть детали для отчета.
+    Сбой critical-проверки делает процесс неготовым (/readyz 503),
+    некритичные (провайдеры) только переводят статус в degraded.
+    """
+
+    name: str
+    probe: Probe
+    interval: float
+    critical: bool = True
+    ok: bool | None = None
+    latency_ms: float | None = None
+    error: str | None = None
+    details: dict[str, Any] = field(default_factory=dict)
+    checked_at: float | None = None
+    consecutive_failures: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "critical": self.critical,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+            "consecutive_failures": self.consecutive_failures,
+            **self.details,
+        }
+
+
+class HealthMonitor:
+    """
+    Фоновые проверки Postgres и провайдеров; пробы отвечают из последнего состояния.
+
+    /livez, /readyz и /health не берут соединение из пула и не ходят наружу:
+    частые запросы оркестратора не конкурируют с рабочим трафиком.
+    Проверка БД идет через общий пул, поэтому его исчерпание (ожидание
+    дольше timeout) тоже делает процесс неготовым.
+    """
+
+    def __init__(
+        self,
+        checks: list[HealthCheck],
+        timeout: float,
+        stale_after: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._checks = {check.name: check for check in checks}
+        self._timeout = timeout
+        self._stale_after = stale_after
+        self._clock = clock
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = False
+        self.last_cycle_at: float | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="health-monitor")
+
+    async def stop(self) -> None:
+        # С этого момента /readyz отвечает 503, даже если задача еще завершается
+        self._stopping = True
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Health monitor stopped")
+
+    async def run_once(self) -> None:
+        now = self._clock()
+        due = [
+            check for check in self._checks.values()
+            if check.checked_at is None or now - check.checked_at >= check.interval
+        ]
+        await asyncio.gather(*(self._run_check(check) for check in due))
+        self.last_cycle_at = self._clock()
+
+    async def _run_check(self, check: HealthCheck) -> None:
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self._timeout):
+                details = await check.probe()
+        except Exception as exc:
+            error = str(exc) if not isinstance(exc, TimeoutError) else f"timed out after {self._timeout}s"
+            if check.ok is not False:
+                logger.warning(
+                    "Health check failed",
+                    extra={"check": check.name, "error": error, "critical": check.critical},
+                )
+            check.ok = False
+            check.error = f"{type(exc).__name__}: {error}"[:300]
+            check.consecutive_failures += 1
+        else:
+            if check.ok is False:
+                logger.info("Health check recovered", extra={"check": check.name})
+            check.ok = True
+            check.error = None
+            check.consecutive_failures = 0
+            check.details = details or {}
+        check.latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        check.checked_at = self._clock()
+
+    async def _run(self) -> None:
+        while True:
+            await self.run_once()
+            now = self._clock()
+            next_due = min(check.checked_at + check.interval for check in self._checks.values())
+            await asyncio.sleep(max(next_due - now, 0.05))
+
+    def live(self) -> tuple[bool, dict[str, Any]]:
+        """
+        Жив ли процесс: цикл проверок (и event loop) не останавливался дольше stale_after.
+        """
+        if not self.running:
+            return True, {"status": "ok", "monitor": "stopped"}
+        if self.last_cycle_at is None:
+            return True, {"status": "ok", "monitor": "starting"}
+        age = self._clock() - self.last_cycle_at
+        alive = age <= self._stale_after
+        return alive, {"status": "ok" if alive else "stale", "last_cycle_age": round(age, 3)}
+
+    def status(self) -> str:
+        if self._stopping:
+            return "stopping"
+        results = [check for check in self._checks.values() if check.ok is not None]
+        if any(check.critical and not check.ok for check in results):
+            return "unavailable"
+        if self.running and self.last_cycle_at is None:
+            return "starting"
+        if any(not check.ok for check in results):
+            return "degraded"
+        return "ok"
+
+    def ready(self) -> tuple[bool, dict[str, Any]]:
+        """
+        Готов ли процесс принимать трафик: критичные зависимости доступны.
+        """
+        status = self.status()
+        return status in ("ok", "degraded"), self.report()
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "status": self.status(),
+            "checks": {name: check.snapshot() for name, check in self._checks.items()},
+        }
+
+    def check(self, name: str) -> HealthCheck | None:
+        return self._checks.get(name)
+
+
+def database_probe(db_engine: AsyncEngine) -> Probe:
+    async def probe() -> dict[str, Any]:
+        async with db_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        pool = db_pool_stats(db_engine)
+        return {key: pool[key] for key in ("saturation", "checked_out", "wait_p95_ms") if key in pool}
+
+    return probe
+
+
+def build_health_monitor(
+    settings: Settings,
+    db_engine: AsyncEngine,
+    router: ShardRouter | None = None,
+    replicas: ReplicaRouter | None = None,
+) -> HealthMonitor:
+    checks = [
+        HealthCheck("database", database_probe(db_engine), settings.health_db_interval),
+    ]
+    # Шарды incoming_sms критичны так же, как основная БД: без шарда часть номеров не принимается
+    for shard in (router.shards[1:] if router is not None else ()):
+        checks.append(
+            HealthCheck(f"database_{shard.name}", database_probe(shard.engine), settings.health_db_interval)
+        )
+    # Проверка реплики заодно решает, идут ли на нее чтения (ReplicaRouter.check);
+    # недоступная реплика не критична — чтения уходят в primary
+    for replica in (replicas.replicas if replicas is not None else ()):
+        checks.append(
+            HealthCheck(
+                f"database_{replica.name}",
+                partial(replicas.check, replica),
+                settings.health_db_interval,
+                critical=False,
+            )
+        )
+    if settings.twilio_account_sid and settings.twilio_auth_token:
+        checks.append(
+            HealthCheck("twilio", twilio_service.ping, settings.health_provider_interval, critical=False)
+        )
+    if settings.onlinesim_api_key:
+        checks.append(
+            HealthCheck("onlinesim", onlinesim_client.ping, settings.health_provider_interval, critical=False)
+        )
+    return HealthMonitor(
+        checks=checks,
+        timeout=settings.health_timeout,
+        stale_after=settings.health_stale_after,
+    )
+
+
+health_monitor = build_health_monitor(get_settings(), engine, shard_router, replica_router)
+
+
+def get_health_monitor() -> HealthMonitor:
+    return health_monitor
@@ -1,37 +1,77 @@
-from typing import Any, Dict, AsyncGenerator
+from typing import Any, Dict
 
 import httpx
-from fastapi import Depends
 
+from app.core.cache import SingleFlightCache
 from app.core.config import Settings, get_settings
+from app.core.http_clients import HttpClientRegistry, build_http_client, http_clients
 
 
 class OnlineSimClient:
-    def __init__(self, settings: Settings) -> None:
+    """
+    Клиент OnlineSIM API на общем пуле соединений из реестра провайдеров.
+
+    Баланс кэшируется на provider_lookup_cache_ttl секунд, одновременные
+    запросы при пустом кэше делят один запрос к OnlineSIM.
+    """
+
+    CLIENT_NAME = "onlinesim"
+
+    def __init__(
+        self,
+        settings: Settings,
+        clients: HttpClientRegistry | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
         self._settings = settings
-        self._base_url = settings.onlinesim_api_base_url.rstrip("/")
-        self._client = httpx.AsyncClient(
-            base_url=self._base_url,
-            timeout=10.0,
+        self._clients = clients or HttpClientRegistry()
+        self._clients.register(self.CLIENT_NAME, lambda: self._build_client(transport))
+        self._info_cache: SingleFlightCache[str, Dict[str, Any]] = SingleFlightCache(
+            maxsize=16,
+            ttl=settings.provider_lookup_cache_ttl,
+        )
+
+    def _build_client(self, transport: httpx.AsyncBaseTransport | None) -> httpx.AsyncClient:
+        settings = self._settings
+        return build_http_client(
+            base_url=settings.onlinesim_api_base_url.rstrip("/"),
+            timeout=settings.onlinesim_timeout,
+            connect_timeout=settings.onlinesim_connect_timeout,
+            max_connections=settings.onlinesim_max_connections,
+            max_keepalive_connections=settings.onlinesim_max_keepalive_connections,
+            keepalive_expiry=settings.onlinesim_keepalive_expiry,
+            transport=transport,
+            provider=self.CLIENT_NAME if settings.metrics_enabled else None,
         )
 
     async def close(self) -> None:
-        await self._client.aclose()
+        await self._clients.aclose(self.CLIENT_NAME)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {"info": self._info_cache.stats()}
 
     def _auth_params(self) -> Dict[str, Any]:
         return {"apikey": self._settings.onlinesim_api_key}
 
     async def get_info(self) -> Dict[str, Any]:
-        resp = await self._client.get("/api/getBalance.php", params=self._auth_params())
+        info = await self._info_cache.get_or_load("balance", self._fetch_info)
+        return dict(info)
+
+    async def ping(self) -> None:
+        """
+        Запрос к OnlineSIM в обход кэша — проверка доступности для монитора здоровья.
+        """
+        await self._fetch_info()
+
+    async def _fetch_info(self) -> Dict[str, Any]:
+        client = self._clients.get(self.CLIENT_NAME)
+        resp = await client.get("/api/getBalance.php", params=self._auth_params())
         resp.raise_for_status()
         return resp.json()
 
 
-async def get_onlinesim_client(
-    settings: Settings = Depends(get_settings),
-) -> AsyncGenerator[OnlineSimClient, None]:
-    client = OnlineSimClient(settings=settings)
-    try:
-        yield client
-    finally:
-        await client.close()
\ No newline at end of file
+onlinesim_client = OnlineSimClient(settings=get_settings(), clients=http_clients)
+
+
+async def get_onlinesim_client() -> OnlineSimClient:
+    return onlinesim_client
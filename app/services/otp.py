@@ -0,0 +1,61 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.core.config import get_settings
+
+
+@dataclass(frozen=True, slots=True)
+class OtpMatch:
+    code: str
+    sender: str | None
+
+
+class OtpExtractor:
+    """
+    Извлекает код подтверждения (и, если получится, отправителя) из текста SMS.
+
+    Паттерны компилируются один раз. Код берется из группы (?P<code>...) первого
+    сработавшего паттерна (пробелы и дефисы внутри кода удаляются), отправитель —
+    из группы (?P<sender>...) того же паттерна или первого sender-паттерна.
+    """
+
+    def __init__(self, patterns: list[str], sender_patterns: list[str]) -> None:
+        self._patterns = [re.compile(p) for p in patterns]
+        self._sender_patterns = [re.compile(p) for p in sender_patterns]
+        for pattern in self._patterns:
+            if "code" not in pattern.groupindex:
+                raise ValueError(f"OTP pattern must define a 'code' group: {pattern.pattern}")
+
+    def extract(self, text: str) -> OtpMatch | None:
+        for pattern in self._patterns:
+            match = pattern.search(text)
+            if match is None:
+                continue
+            code = re.sub(r"[\s-]", "", match.group("code"))
+            sender = match.groupdict().get("sender") or self._find_sender(text)
+            return OtpMatch(code=code[:16], sender=sender.strip()[:64] if sender else None)
+        return None
+
+    def _find_sender(self, text: str) -> str | None:
+        for pattern in self._sender_patterns:
+            match = pattern.search(text)
+            if match is not None:
+                return match.group("sender")
+        return None
+
+
+def otp_columns(otp: OtpMatch | None, from_number: str) -> tuple[str | None, str | None]:
+    """
+    Значения otp_code и otp_sender для строки incoming_sms.
+    """
+    if otp is None:
+        return None, None
+    # Буквенный From (alphanumeric sender ID) — тоже отправитель
+    return otp.code, otp.sender or from_number[:64]
+
+
+@lru_cache
+def get_otp_extractor() -> OtpExtractor:
+    settings = get_settings()
+    return OtpExtractor(settings.otp_patterns, settings.otp_sender_patterns)
@@ -0,0 +1,359 @@
+import asyncio
+import logging
+import random
+from collections.abc import Sequence
+from datetime import timedelta
+from typing import Any
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.core.db import AsyncSessionLocal, get_db_session
+from app.core.rate_limit import TokenBucket
+from app.models.outbound_sms import OutboundSms
+from app.services.twilio_batch import twilio_rate_limiter
+from app.services.twilio_client import TwilioApiError, TwilioService, twilio_service
+
+logger = logging.getLogger("app.outbox")
+
+ACTIVE_STATUSES = ("pending", "sending")
+
+
+def retry_delay(attempts: int, base: float, cap: float) -> float:
+    """
+    Экспоненциальная задержка перед попыткой attempts + 1 с "equal jitter":
+    половина интервала фиксирована, половина случайна, чтобы повторы
+    от разных воркеров не шли синхронно.
+    """
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def is_retryable(error: Exception) -> bool:
+    # 4xx от Twilio (кроме 429) — ошибка в самом сообщении, повтор не поможет
+    if isinstance(error, TwilioApiError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class OutboxService:
+    """
+    Операции над таблицей outbound_sms: постановка в очередь, захват и учет результатов.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def enqueue(
+        self,
+        messages: Sequence[dict[str, Any]],
+        max_attempts: int,
+    ) -> list[OutboundSms]:
+        """
+        Ставит сообщения (ключи to_number, body, from_number) в очередь одним INSERT.
+        """
+        stmt = (
+            insert(OutboundSms)
+            .values([
+                {
+                    "to_number": m["to_number"],
+                    "from_number": m.get("from_number"),
+                    "body": m["body"],
+                    "status": "pending",
+                    "attempts": 0,
+                    "max_attempts": max_attempts,
+                }
+                for m in messages
+            ])
+            .returning(OutboundSms)
+        )
+        created = list((await self.db.scalars(stmt)).all())
+        await self.db.commit()
+        return created
+
+    async def get(self, outbound_id: int) -> OutboundSms | None:
+        return await self.db.get(OutboundSms, outbound_id)
+
+    async def claim(self, batch_size: int, lease: float) -> list[OutboundSms]:
+        """
+        Забирает до batch_size готовых к отправке строк.
+
+        FOR UPDATE SKIP LOCKED позволяет воркерам разных процессов забирать
+        непересекающиеся пачки без ожидания друг друга. Захваченные строки
+        переводятся в sending с арендой на lease секунд и сразу коммитятся,
+        поэтому транзакция не держится открытой на время отправки.
+
+        Строка sending с истекшей арендой (воркер упал, не записав результат)
+        забирается повторно, пока attempts < max_attempts; исчерпавшие
+        попытки переводятся в failed.
+        """
+        await self.db.execute(
+            update(OutboundSms)
+            .where(
+                OutboundSms.status == "sending",
+                OutboundSms.next_attempt_at <= func.now(),
+                OutboundSms.attempts >= OutboundSms.max_attempts,
+            )
+            .values(
+                status="failed",
+                last_error="lease expired after the last attempt",
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        due = (
+            select(OutboundSms.id)
+            .where(
+                OutboundSms.status.in_(ACTIVE_STATUSES),
+                OutboundSms.next_attempt_at <= func.now(),
+                OutboundSms.attempts < OutboundSms.max_attempts,
+            )
+            .order_by(OutboundSms.next_attempt_at, OutboundSms.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .cte("due")
+        )
+        stmt = (
+            update(OutboundSms)
+            .where(OutboundSms.id == due.c.id)
+            .values(
+                status="sending",
+                attempts=OutboundSms.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=lease),
+                updated_at=func.now(),
+            )
+            .returning(OutboundSms)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = list((await self.db.scalars(stmt)).all())
+        await self.db.commit()
+        return claimed
+
+    async def renew_lease(self, message: OutboundSms, lease: float) -> bool:
+        """
+        Продлевает аренду захваченной строки на lease секунд непосредственно
+        перед отправкой и коммитит.
+
+        False — аренда уже истекла и строку забрал другой воркер (attempts
+        изменился) или она завершена: отправлять ее нельзя, иначе SMS уйдет дважды.
+        """
+        result = await self.db.execute(
+            update(OutboundSms)
+            .where(
+                OutboundSms.id == message.id,
+                OutboundSms.status == "sending",
+                OutboundSms.attempts == message.attempts,
+            )
+            .values(next_attempt_at=func.now() + timedelta(seconds=lease), updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def mark_sent(self, message: OutboundSms, result: dict[str, Any]) -> None:
+        await self._finish(
+            message,
+            status="sent",
+            provider_message_id=result["sid"],
+            provider_status=result["status"],
+            last_error=None,
+            sent_at=func.now(),
+        )
+
+    async def mark_failed(self, message: OutboundSms, error: str, retry_in: float | None) -> None:
+        """
+        retry_in — через сколько секунд повторить; None — больше не пытаться.
+        """
+        if retry_in is None:
+            await self._finish(message, status="failed", last_error=error)
+        else:
+            await self._finish(
+                message,
+                status="pending",
+                last_error=error,
+                next_attempt_at=func.now() + timedelta(seconds=retry_in),
+            )
+
+    async def _finish(self, message: OutboundSms, **values: Any) -> None:
+        # attempts в условии: если аренда истекла и строку уже забрал другой
+        # воркер, результат устаревшей попытки не перетирает его состояние
+        await self.db.execute(
+            update(OutboundSms)
+            .where(
+                OutboundSms.id == message.id,
+                OutboundSms.status == "sending",
+                OutboundSms.attempts == message.attempts,
+            )
+            .values(updated_at=func.now(), **values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+class OutboxWorkerPool:
+    """
+    Пул фоновых воркеров, отправляющих outbound_sms через TwilioService.
+
+    Каждый воркер в цикле забирает пачку строк, отправляет ее конкурентно
+    (темп ограничивает общий TokenBucket аккаунта) и записывает результаты.
+    Пропускная способность растет с числом воркеров и процессов: пачки
+    не пересекаются благодаря SKIP LOCKED.
+
+    Строки пачки могут ждать токенов лимитера дольше аренды, поэтому
+    аренда каждой продлевается прямо перед отправкой (см. _process).
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        service: TwilioService,
+        limiter: TokenBucket,
+        workers: int,
+        batch_size: int,
+        poll_interval: float,
+        lease: float,
+        backoff_base: float,
+        backoff_max: float,
+    ) -> None:
+        self._session_factory = session_factory
+        self._service = service
+        self._limiter = limiter
+        self._workers = workers
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._lease = lease
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._tasks: list[asyncio.Task[None]] = []
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def wakeup(self) -> None:
+        """
+        Будит ожидающих воркеров после постановки сообщений в этом процессе.
+        """
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"outbox-worker-{i}")
+            for i in range(self._workers)
+        ]
+        logger.info("Outbox workers started", extra={"workers": self._workers})
+
+    async def stop(self) -> None:
+        """
+        Дожидается текущих пачек; незавершенные строки доотправят после рестарта.
+        """
+        if not self._tasks:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Outbox workers stopped")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.exception("Outbox worker iteration failed")
+                processed = 0
+            if processed == 0 and not self._stopping.is_set():
+                self._wakeup.clear()
+                try:
+                    async with asyncio.timeout(self._poll_interval):
+                        await self._wakeup.wait()
+                except TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        async with self._session_factory() as session:
+            batch = await OutboxService(db=session).claim(self._batch_size, self._lease)
+        if not batch:
+            return 0
+        outcomes = await asyncio.gather(
+            *(self._process(message) for message in batch),
+            return_exceptions=True,
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                # Строка остается в sending и будет повторена после истечения аренды
+                logger.error("Outbox message processing failed", exc_info=outcome)
+
+        logger.info(
+            "Outbox batch processed",
+            extra={
+                "batch_size": len(batch),
+                "sent": outcomes.count("sent"),
+                "lease_lost": outcomes.count("lease_lost"),
+            },
+        )
+        return len(batch)
+
+    async def _process(self, message: OutboundSms) -> str:
+        """
+        Отправляет одну строку пачки и сразу записывает результат.
+
+        Аренда продлевается после получения токена лимитера, прямо перед
+        отправкой; строку, которую за время ожидания забрал другой воркер,
+        этот воркер пропускает ("lease_lost"). Сессия на каждую строку:
+        строки пачки обрабатываются конкурентно, а соединение возвращается
+        в пул на время запроса к Twilio.
+        """
+        await self._limiter.acquire()
+        async with self._session_factory() as session:
+            outbox = OutboxService(db=session)
+            if not await outbox.renew_lease(message, self._lease):
+                return "lease_lost"
+            try:
+                result = await self._send(message)
+            except Exception as exc:
+                retry_in = None
+                if is_retryable(exc) and message.attempts < message.max_attempts:
+                    retry_in = retry_delay(message.attempts, self._backoff_base, self._backoff_max)
+                await outbox.mark_failed(message, str(exc) or type(exc).__name__, retry_in)
+                await session.commit()
+                return "failed"
+            await outbox.mark_sent(message, result)
+            await session.commit()
+            return "sent"
+
+    async def _send(self, message: OutboundSms) -> dict[str, Any]:
+        return await self._service.send_sms(
+            to=message.to_number,
+            body=message.body,
+            from_=message.from_number,
+        )
+
+settings = get_settings()
+
+outbox_worker_pool = OutboxWorkerPool(
+    session_factory=AsyncSessionLocal,
+    service=twilio_service,
+    limiter=twilio_rate_limiter,
+    workers=settings.outbox_workers,
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval,
+    lease=settings.outbox_lease,
+    backoff_base=settings.outbox_backoff_base,
+    backoff_max=settings.outbox_backoff_max,
+)
+
+
+def get_outbox_service(db: AsyncSession = Depends(get_db_session)) -> OutboxService:
+    return OutboxService(db=db)
+
+
+def get_outbox_worker_pool() -> OutboxWorkerPool:
+    return outbox_worker_pool
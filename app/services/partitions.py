@@ -0,0 +1,212 @@
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger("app.partitions")
+
+PARENT_TABLE = "incoming_sms"
+DEFAULT_PARTITION = "incoming_sms_default"
+_PARTITION_RE = re.compile(r"^incoming_sms_p(\d{4})_(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"incoming_sms_p{month:%Y_%m}"
+
+
+def _month_bound(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True, slots=True)
+class SmsPartition:
+    name: str
+    month: date
+
+    @property
+    def start(self) -> datetime:
+        return _month_bound(self.month)
+
+    @property
+    def end(self) -> datetime:
+        return _month_bound(add_months(self.month, 1))
+
+
+class SmsPartitionManager:
+    """
+    Обслуживание помесячных секций incoming_sms.
+
+    Создает секции заранее (перенося строки, успевшие попасть в DEFAULT-секцию)
+    и отсоединяет/удаляет секции старше срока хранения, поправляя счетчики
+    sms_number_counters и реестр incoming_sms_message_keys.
+    Каждая секция обрабатывается в отдельной транзакции.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def list_partitions(self) -> list[SmsPartition]:
+        result = await self.db.execute(
+            text(
+                """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = CAST(:parent AS regclass)
+                """
+            ),
+            {"parent": PARENT_TABLE},
+        )
+        partitions = []
+        for name in result.scalars():
+            match = _PARTITION_RE.match(name)
+            if match:
+                month = date(int(match.group(1)), int(match.group(2)), 1)
+                partitions.append(SmsPartition(name=name, month=month))
+        return sorted(partitions, key=lambda p: p.month)
+
+    async def create_partition(self, month: date) -> SmsPartition | None:
+        """
+        Создает секцию на месяц month; возвращает None, если она уже есть.
+        """
+        partition = SmsPartition(name=partition_name(month), month=month)
+        if any(p.name == partition.name for p in await self.list_partitions()):
+            return None
+
+        bounds = {"start": partition.start, "end": partition.end}
+        bounds_sql = f"FROM ('{partition.start.isoformat()}') TO ('{partition.end.isoformat()}')"
+        stray_rows = await self.db.scalar(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+                "WHERE received_at >= :start AND received_at < :end)"
+            ),
+            bounds,
+        )
+
+        if not stray_rows:
+            await self.db.execute(
+                text(f'CREATE TABLE "{partition.name}" PARTITION OF {PARENT_TABLE} FOR VALUES {bounds_sql}')
+            )
+        else:
+            # Строки диапазона уже лежат в DEFAULT-секции: переносим их в отдельную
+            # таблицу и только потом присоединяем ее. Триггеры родителя при этом
+            # не срабатывают, счетчики и реестр ключей остаются верными.
+            await self.db.execute(
+                text(
+                    f'CREATE TABLE "{partition.name}" '
+                    f"(LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING GENERATED)"
+                )
+            )
+            columns = await self._insertable_columns()
+            await self.db.execute(
+                text(
+                    f"""
+                    WITH moved AS (
+                        DELETE FROM {DEFAULT_PARTITION}
+                        WHERE received_at >= :start AND received_at < :end
+                        RETURNING {columns}
+                    )
+                    INSERT INTO "{partition.name}" ({columns}) SELECT {columns} FROM moved
+                    """
+                ),
+                bounds,
+            )
+            await self.db.execute(
+                text(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION "{partition.name}" FOR VALUES {bounds_sql}')
+            )
+
+        await self.db.commit()
+        logger.info(
+            "Created SMS partition",
+            extra={"partition": partition.name, "moved_from_default": bool(stray_rows)},
+        )
+        return partition
+
+    async def _insertable_columns(self) -> str:
+        # Генерируемые колонки (text_tsv) вставлять нельзя — Postgres считает их сам
+        return await self.db.scalar(
+            text(
+                """
+                SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+                FROM pg_attribute
+                WHERE attrelid = CAST(:parent AS regclass)
+                  AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+                """
+            ),
+            {"parent": PARENT_TABLE},
+        )
+
+    async def ensure_future_partitions(
+        self,
+        months_ahead: int,
+        today: date | None = None,
+    ) -> list[SmsPartition]:
+        """
+        Гарантирует наличие секций с текущего месяца на months_ahead месяцев вперед.
+        """
+        current = (today or datetime.now(timezone.utc).date()).replace(day=1)
+        created = []
+        for offset in range(months_ahead + 1):
+            partition = await self.create_partition(add_months(current, offset))
+            if partition is not None:
+                created.append(partition)
+        return created
+
+    async def expire_partitions(
+        self,
+        retention_months: int,
+        drop: bool = False,
+        today: date | None = None,
+    ) -> list[SmsPartition]:
+        """
+        Отсоединяет (или удаляет при drop=True) секции, целиком лежащие раньше
+        начала месяца "текущий минус retention_months".
+        """
+        current = (today or datetime.now(timezone.utc).date()).replace(day=1)
+        cutoff = add_months(current, -retention_months)
+        expired = [p for p in await self.list_partitions() if p.month < cutoff]
+
+        for partition in expired:
+            await self.db.execute(
+                text(
+                    f"""
+                    UPDATE sms_number_counters AS c
+                    SET total = c.total - d.total
+                    FROM (
+                        SELECT 'to' AS scope, to_number AS number, count(*) AS total
+                        FROM "{partition.name}" GROUP BY to_number
+                        UNION ALL
+                        SELECT 'from', from_number, count(*)
+                        FROM "{partition.name}" GROUP BY from_number
+                        ORDER BY 1, 2
+                    ) AS d
+                    WHERE c.scope = d.scope AND c.number = d.number
+                    """
+                )
+            )
+            await self.db.execute(
+                text(
+                    "DELETE FROM incoming_sms_message_keys "
+                    "WHERE received_at >= :start AND received_at < :end"
+                ),
+                {"start": partition.start, "end": partition.end},
+            )
+            await self.db.execute(
+                text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{partition.name}"')
+            )
+            if drop:
+                await self.db.execute(text(f'DROP TABLE "{partition.name}"'))
+            await self.db.commit()
+            logger.info(
+                "Expired SMS partition",
+                extra={"partition": partition.name, "dropped": drop},
+            )
+        return expired
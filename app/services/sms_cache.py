@@ -0,0 +1,76 @@
+import hashlib
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect
+
+from app.core.cache import TTLLRUCache
+from app.core.config import get_settings
+from app.models.sms import SMS
+from app.schemas.sms import SmsInDB
+
+
+@dataclass(frozen=True, slots=True)
+class CachedSmsResponse:
+    body: bytes
+    etag: str
+
+
+class SmsResponseCache:
+    """
+    In-process кэш сериализованных ответов GET /api/v1/sms/{sms_id}.
+
+    Входящие SMS после сохранения практически не меняются, поэтому храним
+    готовый JSON и ETag. Запись сбрасывается при изменении status/updated_at
+    (ORM-событие after_update ниже) и в любом случае живет не дольше TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._entries: TTLLRUCache[int, CachedSmsResponse] = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, sms_id: int) -> CachedSmsResponse | None:
+        return self._entries.get(sms_id)
+
+    def put(self, sms: SMS) -> CachedSmsResponse:
+        body = SmsInDB.model_validate(sms).model_dump_json().encode()
+        version = f"{sms.updated_at.isoformat() if sms.updated_at else ''}|{sms.status}".encode()
+        digest = hashlib.blake2b(body + version, digest_size=12).hexdigest()
+        entry = CachedSmsResponse(body=body, etag=f'"{digest}"')
+        self._entries.set(sms.id, entry)
+        return entry
+
+    def invalidate(self, sms_id: int) -> None:
+        self._entries.pop(sms_id)
+
+    def stats(self) -> dict[str, int]:
+        return self._entries.stats()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Сравнивает заголовок If-None-Match с ETag (слабое сравнение, как требует RFC 9110).
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+settings = get_settings()
+
+sms_response_cache = SmsResponseCache(
+    maxsize=settings.sms_cache_size,
+    ttl=settings.sms_cache_ttl,
+)
+
+
+@event.listens_for(SMS, "after_update")
+def _invalidate_on_update(mapper, connection, target: SMS) -> None:
+    state = inspect(target)
+    if state.attrs.status.history.has_changes() or state.attrs.updated_at.history.has_changes():
+        sms_response_cache.invalidate(target.id)
+
+
+def get_sms_response_cache() -> SmsResponseCache | None:
+    return sms_response_cache if settings.sms_cache_enabled else None
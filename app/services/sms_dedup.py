@@ -0,0 +1,78 @@
+from typing import Any
+
+from app.core.cache import BloomFilter, TTLLRUCache
+from app.core.config import get_settings
+
+
+class SmsDedupCache:
+    """
+    Дедупликация повторных Twilio webhook'ов по MessageSid перед походом в БД.
+
+    LRU с TTL хранит provider_message_id -> id строки для недавних сообщений,
+    а пара чередующихся Bloom-фильтров позволяет для заведомо новых сообщений
+    пропускать SELECT и сразу делать INSERT ... ON CONFLICT DO NOTHING.
+    Когда текущий фильтр заполняется до емкости, он становится "предыдущим",
+    а самый старый выбрасывается — так память ограничена, а старые ключи стареют.
+    """
+
+    def __init__(
+        self,
+        cache_size: int,
+        ttl: float,
+        bloom_capacity: int,
+        bloom_error_rate: float,
+    ) -> None:
+        self._ids: TTLLRUCache[str, int] = TTLLRUCache(maxsize=cache_size, ttl=ttl)
+        self._bloom_capacity = bloom_capacity
+        self._bloom_error_rate = bloom_error_rate
+        self._bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+        self._previous_bloom: BloomFilter | None = None
+        self.bloom_negatives = 0
+        self.bloom_rotations = 0
+
+    def get(self, provider_message_id: str) -> int | None:
+        return self._ids.get(provider_message_id)
+
+    def might_contain(self, provider_message_id: str) -> bool:
+        if provider_message_id in self._bloom:
+            return True
+        if self._previous_bloom is not None and provider_message_id in self._previous_bloom:
+            return True
+        self.bloom_negatives += 1
+        return False
+
+    def remember(self, provider_message_id: str, sms_id: int) -> None:
+        self._ids.set(provider_message_id, sms_id)
+        if provider_message_id in self._bloom:
+            return
+        if self._bloom.count >= self._bloom_capacity:
+            self._previous_bloom = self._bloom
+            self._bloom = BloomFilter(self._bloom_capacity, self._bloom_error_rate)
+            self.bloom_rotations += 1
+        self._bloom.add(provider_message_id)
+
+    def forget(self, provider_message_id: str) -> None:
+        self._ids.pop(provider_message_id)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._ids.stats(),
+            "bloom_negatives": self.bloom_negatives,
+            "bloom_rotations": self.bloom_rotations,
+            "bloom_items": self._bloom.count,
+            "bloom_bytes": self._bloom.size_bytes * (2 if self._previous_bloom else 1),
+        }
+
+
+settings = get_settings()
+
+sms_dedup_cache = SmsDedupCache(
+    cache_size=settings.sms_dedup_cache_size,
+    ttl=settings.sms_dedup_ttl,
+    bloom_capacity=settings.sms_dedup_bloom_capacity,
+    bloom_error_rate=settings.sms_dedup_bloom_error_rate,
+)
+
+
+def get_sms_dedup_cache() -> SmsDedupCache | None:
+    return sms_dedup_cache if settings.sms_dedup_enabled else None
@@ -0,0 +1,61 @@
+import csv
+import io
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy import Row
+
+from app.core.responses import dump_json
+from app.services.sms_service import LIST_COLUMNS
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_FIELDS = [column.key for column in LIST_COLUMNS]
+
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _format_datetime(value: datetime) -> str:
+    # Та же строка, что в JSON-ответах API: UTC как "...Z"
+    return dump_json(value)[1:-1].decode()
+
+
+def _encode_ndjson(rows: Sequence[Row]) -> bytes:
+    return b"".join(dump_json(row._asdict()) + b"\n" for row in rows)
+
+
+def _encode_csv(rows: Sequence[Row]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            _format_datetime(value) if field == "received_at" else value
+            for field, value in zip(EXPORT_FIELDS, row)
+        )
+    return buffer.getvalue().encode()
+
+
+async def encode_export(
+    partitions: AsyncIterator[Sequence[Row]],
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    """
+    Превращает пачки строк из SmsService.stream_sms в куски NDJSON/CSV.
+
+    Каждая пачка кодируется и отдается целиком, так что в памяти находится
+    не больше одной пачки независимо от объема выгрузки.
+    """
+    if export_format == "csv":
+        header = io.StringIO()
+        csv.writer(header).writerow(EXPORT_FIELDS)
+        yield header.getvalue().encode()
+        encode = _encode_csv
+    else:
+        encode = _encode_ndjson
+
+    async for rows in partitions:
+        yield encode(rows)
@@ -0,0 +1,293 @@
+import csv
+import gzip
+import logging
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import IO, Any, Literal
+
+import asyncpg
+import orjson
+
+from app.services.otp import OtpExtractor, otp_columns
+
+logger = logging.getLogger("app.sms_import")
+
+ImportFormat = Literal["csv", "ndjson"]
+
+STAGING_TABLE = "incoming_sms_import"
+STAGING_COLUMNS = (
+    "provider_message_id",
+    "from_number",
+    "to_number",
+    "text",
+    "received_at",
+    "status",
+    "raw_payload",
+    "otp_code",
+    "otp_sender",
+)
+
+# Имена полей в наших выгрузках (/api/v1/sms/export), webhook'ах и экспортах Twilio
+FIELD_ALIASES: dict[str, tuple[str, ...]] = {
+    "provider_message_id": ("provider_message_id", "MessageSid", "SmsSid", "Sid", "sid"),
+    "from_number": ("from_number", "From", "from"),
+    "to_number": ("to_number", "To", "to"),
+    "text": ("text", "Body", "body"),
+    "received_at": ("received_at", "DateSent", "SentDate", "date_sent", "DateCreated", "date_created"),
+    "status": ("status", "SmsStatus", "Status"),
+}
+
+# Ограничения длины колонок incoming_sms: такие строки отклоняются, а не роняют пачку
+MAX_LENGTHS = {"provider_message_id": 64, "from_number": 32, "to_number": 32, "status": 32}
+
+CREATE_STAGING = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        provider_message_id text NOT NULL,
+        from_number text NOT NULL,
+        to_number text NOT NULL,
+        text text NOT NULL,
+        received_at timestamptz NOT NULL,
+        status text NOT NULL,
+        raw_payload jsonb NOT NULL,
+        otp_code text,
+        otp_sender text,
+        line bigint NOT NULL
+    ) ON COMMIT DELETE ROWS
+"""
+
+# Дубликаты внутри пачки схлопываются DISTINCT ON (остается самая ранняя запись),
+# с уже сохраненными — триггер incoming_sms_claim_message_key (как при приеме webhook'ов)
+MERGE_STAGING = f"""
+    INSERT INTO incoming_sms (
+        provider_message_id, from_number, to_number, text, received_at,
+        status, raw_payload, otp_code, otp_sender
+    )
+    SELECT DISTINCT ON (provider_message_id)
+        provider_message_id, from_number, to_number, text, received_at,
+        status, raw_payload, otp_code, otp_sender
+    FROM {STAGING_TABLE}
+    ORDER BY provider_message_id, received_at, line
+    ON CONFLICT DO NOTHING
+"""
+
+
+class InvalidRecordError(ValueError):
+    """Запись файла импорта не содержит обязательных полей или они некорректны."""
+
+
+@dataclass(slots=True)
+class ImportProgress:
+    read: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    batches: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def duplicates(self) -> int:
+        return self.read - self.rejected - self.inserted
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.read / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "read": self.read,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def detect_format(path: str | Path) -> ImportFormat:
+    path = Path(path)
+    suffixes = [s.lower() for s in path.suffixes if s.lower() != ".gz"]
+    if suffixes and suffixes[-1] == ".csv":
+        return "csv"
+    if suffixes and suffixes[-1] in (".ndjson", ".jsonl", ".json"):
+        return "ndjson"
+    raise ValueError(f"Cannot detect import format of {path.name}, pass it explicitly")
+
+
+def iter_records(stream: IO[str], import_format: ImportFormat) -> Iterator[tuple[int, Any]]:
+    """
+    Записи текстового потока как пары (номер строки, запись).
+
+    Нераспознанная строка NDJSON дает запись None — она будет отклонена.
+    """
+    if import_format == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield line_number, None
+
+
+def read_records(path: str | Path, import_format: ImportFormat) -> Iterator[tuple[int, Any]]:
+    """
+    Потоково читает записи файла (можно .gz).
+    """
+    path = Path(path)
+    opener = gzip.open if path.suffix.lower() == ".gz" else open
+    with opener(path, "rt", encoding="utf-8", newline="") as stream:
+        yield from iter_records(stream, import_format)
+
+
+def parse_timestamp(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        value = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            # Формат Twilio REST API: "Wed, 18 Aug 2010 20:01:40 +0000"
+            try:
+                parsed = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                raise InvalidRecordError(f"invalid received_at: {value!r}") from None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _field(record: dict[str, Any], name: str) -> Any:
+    for alias in FIELD_ALIASES[name]:
+        value = record.get(alias)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def to_staging_row(
+    record: Any,
+    line: int,
+    otp_extractor: OtpExtractor,
+    default_received_at: datetime,
+) -> tuple[Any, ...]:
+    """
+    Строка staging-таблицы из записи файла: обязательные поля, OTP, raw_payload.
+    """
+    if not isinstance(record, dict):
+        raise InvalidRecordError("record is not a JSON object")
+    values = {name: _field(record, name) for name in FIELD_ALIASES}
+    for required in ("provider_message_id", "from_number", "to_number", "text"):
+        if values[required] is None:
+            raise InvalidRecordError(f"missing {required}")
+    for name, limit in MAX_LENGTHS.items():
+        if values[name] is not None and len(str(values[name])) > limit:
+            raise InvalidRecordError(f"{name} longer than {limit} characters")
+
+    text = str(values["text"])
+    from_number = str(values["from_number"])
+    otp_code, otp_sender = otp_columns(otp_extractor.extract(text), from_number)
+    received_at = values["received_at"]
+    # Сохраняется исходная запись, а если в ней вложен полный webhook (raw_payload) — он
+    raw_payload = record.get("raw_payload")
+    if not isinstance(raw_payload, dict):
+        raw_payload = record
+    return (
+        str(values["provider_message_id"]),
+        from_number,
+        str(values["to_number"]),
+        text,
+        parse_timestamp(received_at) if received_at is not None else default_received_at,
+        str(values["status"] or "received").lower(),
+        orjson.dumps(raw_payload, default=str).decode(),
+        otp_code,
+        otp_sender,
+        line,
+    )
+
+
+class SmsImporter:
+    """
+    Массовая загрузка исторических SMS: COPY в staging-таблицу и слияние одним INSERT.
+
+    Файл читается потоково пачками по batch_size строк, поэтому память
+    ограничена размером пачки. Каждая пачка — отдельная транзакция:
+    copy_records_to_table во временную таблицу (ON COMMIT DELETE ROWS)
+    и INSERT ... SELECT DISTINCT ON (provider_message_id) в incoming_sms.
+    Повторный импорт того же файла ничего не дублирует. NOTIFY о новых
+    SMS не отправляется — это история, а не входящий поток.
+
+    connections — соединения с шардами по их номерам, route — номер шарда
+    по to_number (ShardRouter.for_number). Пачки копятся отдельно для
+    каждого шарда, поэтому в памяти до batch_size строк на шард.
+
+    Временные таблицы несовместимы с PgBouncer в режиме transaction:
+    импорт подключается к Postgres напрямую.
+    """
+
+    def __init__(
+        self,
+        connections: Sequence[asyncpg.Connection],
+        otp_extractor: OtpExtractor,
+        batch_size: int,
+        route: Callable[[str], int] | None = None,
+        on_progress: Callable[[ImportProgress], None] | None = None,
+        max_logged_rejects: int = 20,
+    ) -> None:
+        self._connections = tuple(connections)
+        self._otp_extractor = otp_extractor
+        self._batch_size = batch_size
+        self._route = route
+        self._on_progress = on_progress
+        self._max_logged_rejects = max_logged_rejects
+        self._staging_ready: set[int] = set()
+
+    async def import_records(self, records: Iterable[tuple[int, Any]]) -> ImportProgress:
+        progress = ImportProgress()
+        default_received_at = datetime.now(timezone.utc)
+        batches: defaultdict[int, list[tuple[Any, ...]]] = defaultdict(list)
+        for line, record in records:
+            progress.read += 1
+            try:
+                row = to_staging_row(record, line, self._otp_extractor, default_received_at)
+            except InvalidRecordError as exc:
+                progress.rejected += 1
+                if progress.rejected <= self._max_logged_rejects:
+                    logger.warning("Rejected import record", extra={"line": line, "error": str(exc)})
+                continue
+            # to_number — третья колонка STAGING_COLUMNS
+            shard = self._route(row[2]) if self._route is not None else 0
+            batch = batches[shard]
+            batch.append(row)
+            if len(batch) >= self._batch_size:
+                await self._flush(shard, batch, progress)
+                batches[shard] = []
+        for shard, batch in batches.items():
+            if batch:
+                await self._flush(shard, batch, progress)
+        return progress
+
+    async def _flush(self, shard: int, batch: list[tuple[Any, ...]], progress: ImportProgress) -> None:
+        connection = self._connections[shard]
+        if shard not in self._staging_ready:
+            await connection.execute(CREATE_STAGING)
+            self._staging_ready.add(shard)
+        async with connection.transaction():
+            await connection.copy_records_to_table(
+                STAGING_TABLE,
+                records=batch,
+                columns=[*STAGING_COLUMNS, "line"],
+            )
+            status = await connection.execute(MERGE_STAGING)
+        # "INSERT 0 <n>": строки, отсеянные триггером реестра ключей, не считаются
+        progress.inserted += int(status.rsplit(" ", 1)[-1])
+        progress.batches += 1
+        if self._on_progress is not None:
+            self._on_progress(progress)
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.core.db import AsyncSessionLocal
+from app.core.replicas import ReplicaRouter, get_replica_router
+from app.core.sharding import ShardRouter, get_shard_router
+from app.models.sms import SMS
+from app.schemas.sms import TwilioWebhookPayload
+from app.services.sms_dedup import SmsDedupCache, get_sms_dedup_cache
+from app.services.sms_notifier import get_sms_notify_channel
+from app.services.sms_service import build_sms_service
+
+logger = logging.getLogger("app.sms_ingest")
+
+
+class IngestQueueFullError(Exception):
+    """Очередь приема переполнена или закрыта — запрос нужно повторить позже."""
+
+
+@dataclass(slots=True)
+class _IngestItem:
+    payload: TwilioWebhookPayload
+    raw_payload: dict[str, Any]
+    future: asyncio.Future[SMS]
+
+
+_STOP = object()
+
+
+class SmsIngestQueue:
+    """
+    Write-behind очередь входящих SMS.
+
+    Webhook кладет провалидированный payload в asyncio.Queue и ждет future,
+    а фоновый воркер собирает батч (до batch_size строк или flush_interval секунд)
+    и сохраняет его одной транзакцией через SmsService.save_incoming_sms_batch
+    (при шардировании — по транзакции на каждый шард батча).
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int,
+        flush_interval: float,
+        max_size: int,
+        enqueue_timeout: float,
+        dedup: SmsDedupCache | None = None,
+        notify_channel: str | None = None,
+        shard_router: ShardRouter | None = None,
+        replica_router: ReplicaRouter | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._shard_router = shard_router
+        self._replica_router = replica_router
+        self._dedup = dedup
+        self._notify_channel = notify_channel
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_size = max_size
+        self._enqueue_timeout = enqueue_timeout
+        self._queue: asyncio.Queue[Any] | None = None
+        self._worker: asyncio.Task[None] | None = None
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_size)
+        self._accepting = True
+        self._worker = asyncio.create_task(self._run(), name="sms-ingest-worker")
+        logger.info(
+            "SMS ingest queue started",
+            extra={"batch_size": self._batch_size, "queue_size": self._max_size},
+        )
+
+    async def stop(self) -> None:
+        """
+        Перестает принимать новые сообщения и дожидается сохранения уже принятых.
+        """
+        if not self.running:
+            return
+        self._accepting = False
+        # Стоп-маркер встает в конец очереди, поэтому воркер выйдет только после drain
+        await self._queue.put(_STOP)
+        await self._worker
+        self._worker = None
+        logger.info("SMS ingest queue drained and stopped")
+
+    async def submit(
+        self,
+        payload: TwilioWebhookPayload,
+        raw_payload: dict[str, Any],
+    ) -> SMS:
+        if not self._accepting or self._queue is None:
+            raise IngestQueueFullError("SMS ingest queue is not accepting messages")
+
+        item = _IngestItem(
+            payload=payload,
+            raw_payload=raw_payload,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        try:
+            async with asyncio.timeout(self._enqueue_timeout):
+                await self._queue.put(item)
+        except TimeoutError:
+            raise IngestQueueFullError("SMS ingest queue is full") from None
+
+        return await item.future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+
+            batch: list[_IngestItem] = [first]
+            deadline = loop.time() + self._flush_interval
+            while len(batch) < self._batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    async with asyncio.timeout(remaining):
+                        item = await self._queue.get()
+                except TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[_IngestItem]) -> None:
+        try:
+            async with self._session_factory() as session:
+                service = build_sms_service(
+                    db=session,
+                    dedup=self._dedup,
+                    notify_channel=self._notify_channel,
+                    router=self._shard_router,
+                    replicas=self._replica_router,
+                )
+                try:
+                    saved = await service.save_incoming_sms_batch(
+                        [(item.payload, item.raw_payload) for item in batch]
+                    )
+                finally:
+                    await service.close()
+        except Exception as exc:
+            logger.exception("Failed to flush SMS ingest batch", extra={"batch_size": len(batch)})
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(saved[item.payload.provider_message_id])
+
+
+settings = get_settings()
+
+sms_ingest_queue = SmsIngestQueue(
+    session_factory=AsyncSessionLocal,
+    batch_size=settings.sms_ingest_batch_size,
+    flush_interval=settings.sms_ingest_flush_interval,
+    max_size=settings.sms_ingest_queue_size,
+    enqueue_timeout=settings.sms_ingest_enqueue_timeout,
+    dedup=get_sms_dedup_cache(),
+    notify_channel=get_sms_notify_channel(),
+    shard_router=get_shard_router(),
+    replica_router=get_replica_router(),
+)
+
+
+def get_sms_ingest_queue() -> SmsIngestQueue:
+    return sms_ingest_queue
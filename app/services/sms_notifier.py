@@ -0,0 +1,207 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from typing import Any
+
+import asyncpg
+
+from app.core.config import get_settings
+from app.core.sharding import shard_router
+from app.models.sms import SMS
+from app.schemas.sms import SmsListItem
+
+logger = logging.getLogger("app.sms_notifier")
+
+# NOTIFY принимает payload до 8000 байт; длинные тексты не передаем,
+# ожидающий клиент дочитает такую SMS из БД по id
+MAX_PAYLOAD_BYTES = 7900
+
+
+def sms_event_payload(sms: SMS) -> str:
+    """
+    Payload уведомления о новой SMS: поля SmsListItem в JSON.
+    """
+    event = SmsListItem.model_validate(sms).model_dump(mode="json")
+    encoded = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    if len(encoded.encode()) > MAX_PAYLOAD_BYTES:
+        event.pop("text")
+        event["truncated"] = True
+        encoded = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return encoded
+
+
+class SmsNotifier:
+    """
+    Раздает уведомления о новых SMS ожидающим клиентам процесса.
+
+    Держит по одному asyncpg-соединению с LISTEN на канале в каждой БД из dsns
+    (шарды incoming_sms шлют NOTIFY каждый в своей) и раскладывает события
+    по очередям подписчиков, сгруппированным по to_number, — сколько бы клиентов
+    ни ждали, БД видит одно соединение. При потере соединения переподключается
+    с экспоненциальной задержкой; события за время разрыва не доставляются,
+    клиенты добирают их по after_id / Last-Event-ID.
+    """
+
+    def __init__(self, dsns: Sequence[str], channel: str, queue_size: int) -> None:
+        self._dsns = tuple(dsns)
+        self._channel = channel
+        self._queue_size = queue_size
+        self._subscribers: defaultdict[str, set[asyncio.Queue[dict[str, Any]]]] = defaultdict(set)
+        self._tasks: list[asyncio.Task[None]] = []
+        self._connected: set[int] = set()
+        self._listening = asyncio.Event()
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    @property
+    def listening(self) -> bool:
+        # События приходят только если слушаем все БД
+        return self._listening.is_set()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._listening = asyncio.Event()
+        self._connected.clear()
+        self._tasks = [
+            asyncio.create_task(self._run(index, dsn), name=f"sms-notifier-{index}")
+            for index, dsn in enumerate(self._dsns)
+        ]
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("SMS notifier stopped")
+
+    async def wait_listening(self, timeout: float) -> bool:
+        try:
+            async with asyncio.timeout(timeout):
+                await self._listening.wait()
+        except TimeoutError:
+            return False
+        return True
+
+    @asynccontextmanager
+    async def subscribe(self, to_number: str) -> AsyncIterator[asyncio.Queue[dict[str, Any]]]:
+        """
+        Подписка на новые SMS для номера; события — словари полей SmsListItem.
+        """
+        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers[to_number].add(queue)
+        try:
+            yield queue
+        finally:
+            waiters = self._subscribers.get(to_number)
+            if waiters is not None:
+                waiters.discard(queue)
+                if not waiters:
+                    del self._subscribers[to_number]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "listening": self.listening,
+            "databases": len(self._dsns),
+            "connected_databases": len(self._connected),
+            "numbers": len(self._subscribers),
+            "subscribers": sum(len(w) for w in self._subscribers.values()),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            waiters = self._subscribers.get(event["to_number"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Malformed SMS notification", extra={"payload": payload[:200]})
+            return
+        for queue in list(waiters or ()):
+            try:
+                queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # медленный SSE-клиент: пропущенное он доберет по Last-Event-ID
+                self.dropped += 1
+
+    def _set_connected(self, index: int, connected: bool) -> None:
+        if connected:
+            self._connected.add(index)
+        else:
+            self._connected.discard(index)
+        if len(self._connected) == len(self._dsns):
+            self._listening.set()
+        else:
+            self._listening.clear()
+
+    async def _run(self, index: int, dsn: str) -> None:
+        delay = 0.5
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning(
+                    "SMS notifier connection failed",
+                    extra={"database": index, "error": str(exc), "retry_in": delay},
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            except Exception:
+                # Задача слушателя не должна молча завершаться: ошибка в DSN,
+                # TLS и прочее неожиданное — в лог и повтор с той же задержкой
+                logger.exception(
+                    "SMS notifier connection failed unexpectedly",
+                    extra={"database": index, "retry_in": delay},
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            try:
+                await connection.add_listener(self._channel, self._on_notify)
+                delay = 0.5
+                self._set_connected(index, True)
+                logger.info("SMS notifier listening", extra={"database": index, "channel": self._channel})
+                await lost.wait()
+                logger.warning("SMS notifier connection lost, reconnecting", extra={"database": index})
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("SMS notifier LISTEN failed", extra={"database": index, "error": str(exc)})
+                await asyncio.sleep(delay)
+            except Exception:
+                logger.exception("SMS notifier LISTEN failed unexpectedly", extra={"database": index})
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                self._set_connected(index, False)
+                if not connection.is_closed():
+                    await connection.close()
+
+
+settings = get_settings()
+
+sms_notifier = SmsNotifier(
+    dsns=[shard.asyncpg_dsn for shard in shard_router.shards],
+    channel=settings.sms_notify_channel,
+    queue_size=settings.sms_notify_queue_size,
+)
+
+
+def get_sms_notifier() -> SmsNotifier | None:
+    return sms_notifier if settings.sms_notify_enabled else None
+
+
+def get_sms_notify_channel() -> str | None:
+    return settings.sms_notify_channel if settings.sms_notify_enabled else None
@@ -1,19 +1,146 @@
+import asyncio
+import heapq
+import itertools
+import json
 import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator, Callable, Sequence
+from datetime import datetime
 from typing import Any
 
-from fastapi import Depends
-from sqlalchemy import select, func
+from fastapi import Depends, Header
+from sqlalchemy import ColumnElement, Row, Select, and_, cast, literal, select, func, literal_column, or_, text
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db_session
+from app.core.metrics import SMS_INGESTED
+from app.core.replicas import ReplicaRouter, get_replica_router
+from app.core.sharding import Shard, ShardRouter, get_shard_router
 from app.models.sms import SMS
-from app.schemas.sms import TwilioWebhookPayload
+from app.models.sms_counter import SmsNumberCounter
+from app.schemas.sms import SearchOrder, TotalMode, TwilioWebhookPayload
+from app.services.otp import OtpExtractor, get_otp_extractor, otp_columns
+from app.services.sms_dedup import SmsDedupCache, get_sms_dedup_cache
+from app.services.sms_notifier import get_sms_notify_channel, sms_event_payload
 
 logger = logging.getLogger("app.sms_service")
 
+# Колонки SmsListItem: списки, поиск и выгрузка читают только их,
+# без raw_payload и без создания ORM-объектов
+LIST_COLUMNS = (
+    SMS.id,
+    SMS.provider_message_id,
+    SMS.from_number,
+    SMS.to_number,
+    SMS.text,
+    SMS.received_at,
+    SMS.status,
+    SMS.otp_code,
+    SMS.otp_sender,
+)
+
+
+def sms_filters(
+    from_number: str | None = None,
+    to_number: str | None = None,
+    received_from: datetime | None = None,
+    received_to: datetime | None = None,
+    payload_contains: dict[str, Any] | None = None,
+) -> list[ColumnElement[bool]]:
+    """
+    Общие условия WHERE для выборок по incoming_sms.
+
+    Диапазон received_at полуоткрытый: [received_from, received_to).
+    payload_contains превращается в raw_payload @> '{...}' и использует GIN-индекс.
+    Значение передается строкой JSON с CAST в jsonb: так его умеет отрисовать и
+    literal_binds (оценка total=estimated через EXPLAIN).
+    """
+    filters: list[ColumnElement[bool]] = []
+    if from_number:
+        filters.append(SMS.from_number == from_number)
+    if to_number:
+        filters.append(SMS.to_number == to_number)
+    if received_from is not None:
+        filters.append(SMS.received_at >= received_from)
+    if received_to is not None:
+        filters.append(SMS.received_at < received_to)
+    if payload_contains:
+        filters.append(SMS.raw_payload.contains(cast(literal(json.dumps(payload_contains)), JSONB)))
+    return filters
+
+
 class SmsService:
-    def __init__(self, db: AsyncSession) -> None:
+    """
+    Прием и чтение incoming_sms.
+
+    Запись и чтения, которым нужна свежесть (последний OTP, добор пропущенных
+    SMS ожидающими клиентами), идут через db — primary. Списки, поиск, подсчет,
+    выгрузка и чтение по id — через read_db (сессия реплики, если она есть);
+    по номеру, на который только что пришла SMS, — тоже через primary.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        dedup: SmsDedupCache | None = None,
+        otp_extractor: OtpExtractor | None = None,
+        notify_channel: str | None = None,
+        read_db: AsyncSession | None = None,
+        replicas: ReplicaRouter | None = None,
+    ) -> None:
         self.db = db
+        self.read_db = read_db or db
+        self.dedup = dedup
+        self.otp_extractor = otp_extractor or get_otp_extractor()
+        self.notify_channel = notify_channel
+        self.replicas = replicas
+
+    def _row_values(
+        self,
+        payload: TwilioWebhookPayload,
+        raw_payload: dict[str, Any],
+    ) -> dict[str, Any]:
+        otp_code, otp_sender = otp_columns(self.otp_extractor.extract(payload.text), payload.from_number)
+        return {
+            "provider_message_id": payload.provider_message_id,
+            "from_number": payload.from_number,
+            "to_number": payload.to_number,
+            "text": payload.text,
+            "status": "received",
+            "raw_payload": raw_payload,
+            "otp_code": otp_code,
+            "otp_sender": otp_sender,
+        }
+
+    async def close(self) -> None:
+        await self.db.close()
+        if self.read_db is not self.db:
+            await self.read_db.close()
+
+    def _reader(self, to_number: str | None = None) -> AsyncSession:
+        # Реплика может еще не содержать только что принятую SMS на этот номер
+        if to_number and self.replicas is not None and self.replicas.wrote_recently(to_number):
+            return self.db
+        return self.read_db
+
+    def _remember(self, sms: SMS) -> None:
+        if self.dedup is not None:
+            self.dedup.remember(sms.provider_message_id, sms.id)
+        if self.replicas is not None:
+            self.replicas.record_write(sms.to_number)
+
+    async def _notify(self, messages: Sequence[SMS]) -> None:
+        # NOTIFY транзакционный: ожидающие клиенты получат событие только после commit
+        if self.notify_channel is None or not messages:
+            return
+        await self.db.execute(
+            text("SELECT pg_notify(:channel, p) FROM unnest(CAST(:payloads AS text[])) AS p"),
+            {
+                "channel": self.notify_channel,
+                "payloads": [sms_event_payload(sms) for sms in messages],
+            },
+        )
 
     async def save_incoming_sms(
         self,
@@ -30,28 +157,543 @@ class SmsService:
         )
         provider_id: str = payload.provider_message_id
 
+        if self.dedup is not None:
+            # Повтор webhook'а: берем строку по первичному ключу из кэша
+            cached_id = self.dedup.get(provider_id)
+            if cached_id is not None:
+                cached = await self.db.get(SMS, cached_id)
+                if cached:
+                    SMS_INGESTED.labels("duplicate").inc()
+                    return cached
+                self.dedup.forget(provider_id)
+
+            # Заведомо новое сообщение: INSERT без предварительного SELECT
+            if not self.dedup.might_contain(provider_id):
+                stmt = (
+                    pg_insert(SMS)
+                    .values(**self._row_values(payload, raw_payload))
+                    .on_conflict_do_nothing()
+                    .returning(SMS)
+                )
+                inserted: SMS | None = (await self.db.scalars(stmt)).one_or_none()
+                if inserted:
+                    await self._notify([inserted])
+                await self.db.commit()
+                if inserted:
+                    self._remember(inserted)
+                    SMS_INGESTED.labels("inserted").inc()
+                    return inserted
+
         stmt = select(SMS).where(SMS.provider_message_id == provider_id)
         result = await self.db.execute(stmt)
         existing: SMS | None = result.scalar_one_or_none()
         if existing:
+            self._remember(existing)
+            SMS_INGESTED.labels("duplicate").inc()
             return existing
 
-        sms = SMS(
-            provider_message_id=provider_id,
-            from_number=payload.from_number,
-            to_number=payload.to_number,
-            text=payload.text,
-            raw_payload=raw_payload,
-        )
+        sms = SMS(**self._row_values(payload, raw_payload))
 
         self.db.add(sms)
-        await self.db.commit()
+        await self.db.flush()
         await self.db.refresh(sms)
+        await self._notify([sms])
+        await self.db.commit()
+        self._remember(sms)
+        SMS_INGESTED.labels("inserted").inc()
         return sms
 
+    async def save_incoming_sms_batch(
+        self,
+        items: Sequence[tuple[TwilioWebhookPayload, dict[str, Any]]],
+    ) -> dict[str, SMS]:
+        """
+        Сохраняет пачку входящих SMS одним multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+        Возвращает словарь provider_message_id -> SMS, куда попадают и новые,
+        и уже существующие (повторно присланные Twilio) сообщения.
+        """
+        rows: dict[str, dict[str, Any]] = {}
+        for payload, raw_payload in items:
+            # дубликаты внутри одного батча схлопываем до первой записи
+            rows.setdefault(payload.provider_message_id, self._row_values(payload, raw_payload))
+        if not rows:
+            return {}
+
+        # Без conflict target: на секционированной таблице дубликаты отсекает
+        # триггер incoming_sms_claim_message_key, на обычной — уникальный индекс
+        stmt = (
+            pg_insert(SMS)
+            .values(list(rows.values()))
+            .on_conflict_do_nothing()
+            .returning(SMS)
+        )
+        inserted = (await self.db.scalars(stmt)).all()
+        saved: dict[str, SMS] = {sms.provider_message_id: sms for sms in inserted}
+
+        missing = [provider_id for provider_id in rows if provider_id not in saved]
+        if missing:
+            existing = await self.db.scalars(
+                select(SMS).where(SMS.provider_message_id.in_(missing))
+            )
+            saved.update({sms.provider_message_id: sms for sms in existing})
+
+        await self._notify(inserted)
+        await self.db.commit()
+        for sms in saved.values():
+            self._remember(sms)
+        SMS_INGESTED.labels("inserted").inc(len(inserted))
+        SMS_INGESTED.labels("duplicate").inc(len(items) - len(inserted))
+        logger.info(
+            "Saved incoming SMS batch",
+            extra={"batch_size": len(rows), "inserted": len(inserted)},
+        )
+        return saved
+
+    async def get_sms_by_id(self, sms_id: int) -> SMS | None:
+        stmt = select(SMS).where(SMS.id == sms_id)
+        sms = (await self.read_db.execute(stmt)).scalar_one_or_none()
+        if sms is None and self.read_db is not self.db:
+            # Например, дочитывание по NOTIFY: реплика могла еще не получить строку
+            sms = (await self.db.execute(stmt)).scalar_one_or_none()
+        return sms
+
+    async def list_sms_after(
+        self,
+        to_number: str,
+        after_id: int,
+        since: datetime,
+        limit: int = 100,
+    ) -> list[Row]:
+        """
+        SMS на номер с id больше after_id, пришедшие не раньше since (по возрастанию id).
+
+        Нужна ожидающим клиентам, чтобы добрать сообщения, пришедшие между
+        запросами; since ограничивает просмотр свежими секциями. Читается
+        из primary: на отстающей реплике последние SMS были бы пропущены.
+        """
+        stmt = (
+            select(*LIST_COLUMNS)
+            .where(
+                SMS.to_number == to_number,
+                SMS.received_at >= since,
+                SMS.id > after_id,
+            )
+            .order_by(SMS.id.asc())
+            .limit(limit)
+        )
+        return list((await self.db.execute(stmt)).all())
+
+    async def get_latest_otp(
+        self,
+        to_number: str,
+        sender: str | None = None,
+        received_from: datetime | None = None,
+    ) -> Row | None:
+        """
+        Последний извлеченный OTP-код для номера получателя.
+
+        Условие otp_code IS NOT NULL и порядок (received_at DESC, id ASC) совпадают
+        с частичными индексами ix_incoming_sms_otp_*, поэтому ответ — первая
+        запись индекса самой свежей секции. Читается из primary: отстающая
+        реплика вернула бы предыдущий код.
+        """
+        stmt = (
+            select(
+                SMS.id.label("sms_id"),
+                SMS.to_number,
+                SMS.from_number,
+                SMS.otp_code,
+                SMS.otp_sender,
+                SMS.received_at,
+            )
+            .where(SMS.to_number == to_number, SMS.otp_code.is_not(None))
+            .order_by(SMS.received_at.desc(), SMS.id.asc())
+            .limit(1)
+        )
+        if sender:
+            stmt = stmt.where(SMS.otp_sender == sender)
+        if received_from is not None:
+            stmt = stmt.where(SMS.received_at >= received_from)
+        return (await self.db.execute(stmt)).first()
+
+    async def list_sms(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        from_number: str | None = None,
+        to_number: str | None = None,
+        cursor: tuple[datetime, int] | None = None,
+        total_mode: TotalMode = TotalMode.exact,
+        received_from: datetime | None = None,
+        received_to: datetime | None = None,
+        payload_contains: dict[str, Any] | None = None,
+    ) -> tuple[list[Row], int | None]:
+        """
+        Возвращает страницу SMS (новые первыми) и общее количество по фильтрам.
+
+        Строки содержат только колонки SmsListItem (LIST_COLUMNS): raw_payload
+        не читается, ORM-объекты и identity map не создаются.
+
+        Если передан cursor — позиция (received_at, id) последней строки предыдущей
+        страницы, — используется keyset-пагинация и offset игнорируется.
+        Порядок (received_at DESC, id ASC) совпадает с составными индексами
+        (to_number|from_number, received_at DESC, id).
+        Способ подсчета total задается total_mode.
+
+        Диапазон received_from/received_to и верхняя граница курсора
+        накладываются прямо на received_at, чтобы Postgres отсекал лишние секции.
+        """
+        stmt = (
+            select(*LIST_COLUMNS)
+            .where(
+                *sms_filters(
+                    from_number=from_number,
+                    to_number=to_number,
+                    received_from=received_from,
+                    received_to=received_to,
+                    payload_contains=payload_contains,
+                )
+            )
+            .order_by(SMS.received_at.desc(), SMS.id.asc())
+        )
+
+        if cursor is not None:
+            received_at, last_id = cursor
+            stmt = stmt.where(
+                SMS.received_at <= received_at,
+                or_(SMS.received_at < received_at, SMS.id > last_id),
+            )
+        else:
+            stmt = stmt.offset(offset)
+
+        reader = self._reader(to_number)
+        total = await self.count_sms(
+            mode=total_mode,
+            from_number=from_number,
+            to_number=to_number,
+            received_from=received_from,
+            received_to=received_to,
+            payload_contains=payload_contains,
+        )
+        result = await reader.execute(stmt.limit(limit))
+        return list(result.all()), total
+
+    async def count_sms(
+        self,
+        mode: TotalMode = TotalMode.exact,
+        from_number: str | None = None,
+        to_number: str | None = None,
+        received_from: datetime | None = None,
+        received_to: datetime | None = None,
+        payload_contains: dict[str, Any] | None = None,
+    ) -> int | None:
+        """
+        Считает SMS по фильтрам выбранным способом.
+
+        Для фильтра ровно по одному номеру (без других условий) точное значение
+        берется из sms_number_counters, иначе выполняется COUNT(*). Оценка берется
+        из плана запроса (EXPLAIN), таблица при этом не сканируется.
+        """
+        if mode is TotalMode.none:
+            return None
+
+        filters = sms_filters(
+            from_number=from_number,
+            to_number=to_number,
+            received_from=received_from,
+            received_to=received_to,
+            payload_contains=payload_contains,
+        )
+
+        reader = self._reader(to_number)
+        if mode is TotalMode.estimated:
+            estimate_stmt = select(literal_column("1")).select_from(SMS).where(*filters)
+            return await self._estimate_rows(reader, estimate_stmt)
+
+        by_single_number = bool(from_number) != bool(to_number)
+        other_filters = received_from is not None or received_to is not None or payload_contains
+        if by_single_number and not other_filters:
+            scope, number = ("from", from_number) if from_number else ("to", to_number)
+            counter = await reader.scalar(
+                select(SmsNumberCounter.total).where(
+                    SmsNumberCounter.scope == scope,
+                    SmsNumberCounter.number == number,
+                )
+            )
+            return counter or 0
+
+        count_stmt = select(func.count()).select_from(SMS).where(*filters)
+        return (await reader.execute(count_stmt)).scalar_one()
+
+    async def _estimate_rows(self, db: AsyncSession, stmt: Select) -> int:
+        # literal_binds: EXPLAIN не принимает параметры, значения экранирует диалект
+        compiled = stmt.compile(
+            dialect=db.get_bind().dialect,
+            compile_kwargs={"literal_binds": True},
+        )
+        conn = await db.connection()
+        plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return max(int(plan[0]["Plan"]["Plan Rows"]), 0)
+
+    async def search_sms(
+        self,
+        query: str,
+        limit: int = 50,
+        order: SearchOrder = SearchOrder.recent,
+        from_number: str | None = None,
+        to_number: str | None = None,
+        received_from: datetime | None = None,
+        received_to: datetime | None = None,
+        cursor: tuple[datetime, int] | tuple[float, datetime, int] | None = None,
+    ) -> list[Row]:
+        """
+        Полнотекстовый поиск по text через text_tsv (GIN) и websearch_to_tsquery.
+
+        Возвращает строки с колонками SmsListItem и rank (ts_rank_cd).
+        cursor — (received_at, id) для order=recent или (rank, received_at, id)
+        для order=rank; в обоих случаях это позиция последней строки страницы.
+        """
+        tsquery = func.websearch_to_tsquery(literal_column("'simple'::regconfig"), query)
+        rank = func.ts_rank_cd(SMS.text_tsv, tsquery)
+        stmt = select(*LIST_COLUMNS, rank.label("rank")).where(
+            SMS.text_tsv.bool_op("@@")(tsquery),
+            *sms_filters(
+                from_number=from_number,
+                to_number=to_number,
+                received_from=received_from,
+                received_to=received_to,
+            ),
+        )
+
+        if order is SearchOrder.rank:
+            stmt = stmt.order_by(rank.desc(), SMS.received_at.desc(), SMS.id.asc())
+            if cursor is not None:
+                last_rank, received_at, last_id = cursor
+                stmt = stmt.where(
+                    or_(
+                        rank < last_rank,
+                        and_(
+                            rank == last_rank,
+                            or_(
+                                SMS.received_at < received_at,
+                                and_(SMS.received_at == received_at, SMS.id > last_id),
+                            ),
+                        ),
+                    )
+                )
+        else:
+            stmt = stmt.order_by(SMS.received_at.desc(), SMS.id.asc())
+            if cursor is not None:
+                received_at, last_id = cursor
+                stmt = stmt.where(
+                    SMS.received_at <= received_at,
+                    or_(SMS.received_at < received_at, SMS.id > last_id),
+                )
+
+        result = await self._reader(to_number).execute(stmt.limit(limit))
+        return list(result.all())
+
+    async def stream_sms(
+        self,
+        from_number: str | None = None,
+        to_number: str | None = None,
+        received_from: datetime | None = None,
+        received_to: datetime | None = None,
+        payload_contains: dict[str, Any] | None = None,
+        fetch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Отдает SMS по фильтрам пачками по fetch_size строк через серверный курсор.
+
+        Выбираются только колонки SmsListItem (без raw_payload), объекты ORM не
+        создаются, поэтому память не зависит от объема выгрузки.
+        Порядок (received_at ASC, id DESC) — обратный проход по составным индексам.
+        """
+        stmt = (
+            select(*LIST_COLUMNS)
+            .where(
+                *sms_filters(
+                    from_number=from_number,
+                    to_number=to_number,
+                    received_from=received_from,
+                    received_to=received_to,
+                    payload_contains=payload_contains,
+                )
+            )
+            .order_by(SMS.received_at.asc(), SMS.id.desc())
+            .execution_options(yield_per=fetch_size)
+        )
+        result = await self._reader(to_number).stream(stmt)
+        async for rows in result.partitions():
+            yield rows
+
+
+def _recent_key(row: Row) -> tuple[datetime, int]:
+    # Порядок списков (received_at DESC, id ASC) — убывание ключа,
+    # порядок выгрузки (received_at ASC, id DESC) — возрастание
+    return row.received_at, -row.id
+
+
+def _rank_key(row: Row) -> tuple[float, datetime, int]:
+    return row.rank, row.received_at, -row.id
+
+
+async def _merge_streams(
+    streams: Sequence[AsyncIterator[Sequence[Row]]],
+    key: Callable[[Row], Any],
+    chunk_size: int,
+) -> AsyncIterator[list[Row]]:
+    """
+    k-way merge упорядоченных по возрастанию key потоков пачек строк.
+
+    Из каждого потока в памяти одна текущая пачка; на выходе пачки по chunk_size.
+    """
+    async def rows(stream: AsyncIterator[Sequence[Row]]) -> AsyncIterator[Row]:
+        async for part in stream:
+            for row in part:
+                yield row
+
+    iterators = [rows(stream) for stream in streams]
+    heap: list[tuple[Any, int, Row]] = []
+    for index, iterator in enumerate(iterators):
+        row = await anext(iterator, None)
+        if row is not None:
+            heap.append((key(row), index, row))
+    heapq.heapify(heap)
+
+    chunk: list[Row] = []
+    while heap:
+        _, index, row = heap[0]
+        chunk.append(row)
+        following = await anext(iterators[index], None)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (key(following), index, following))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ShardedSmsService:
+    """
+    SmsService поверх шардов incoming_sms (app.core.sharding) с тем же интерфейсом.
+
+    Запись и чтения по получателю (to_number) идут в шард-владелец номера,
+    чтение по id — в шард, которому принадлежит диапазон id. Списки, поиск,
+    подсчет и выгрузка без to_number выполняются на всех шардах параллельно,
+    а результаты сливаются k-way merge в общем порядке (received_at DESC, id ASC).
+    id уникальны глобально, поэтому курсоры (received_at, id) работают как есть;
+    offset-пагинация без to_number читает offset + limit строк с каждого шарда.
+
+    Сессия основной БД приходит снаружи, сессии остальных шардов открываются
+    при первом обращении и закрываются в close(). Реплики (read_db, replicas)
+    есть только у основной БД — шарда 0.
+    """
+
+    def __init__(
+        self,
+        router: ShardRouter,
+        db: AsyncSession,
+        dedup: SmsDedupCache | None = None,
+        otp_extractor: OtpExtractor | None = None,
+        notify_channel: str | None = None,
+        read_db: AsyncSession | None = None,
+        replicas: ReplicaRouter | None = None,
+    ) -> None:
+        self.router = router
+        self.dedup = dedup
+        self.otp_extractor = otp_extractor or get_otp_extractor()
+        self.notify_channel = notify_channel
+        self._read_db = read_db
+        self._replicas = replicas
+        self._sessions: dict[int, AsyncSession] = {0: db}
+        self._services: dict[int, SmsService] = {}
+
+    def _service(self, shard: Shard) -> SmsService:
+        service = self._services.get(shard.index)
+        if service is None:
+            session = self._sessions.get(shard.index)
+            if session is None:
+                session = self._sessions[shard.index] = shard.session_factory()
+            service = self._services[shard.index] = SmsService(
+                db=session,
+                dedup=self.dedup,
+                otp_extractor=self.otp_extractor,
+                notify_channel=self.notify_channel,
+                read_db=self._read_db if shard.index == 0 else None,
+                replicas=self._replicas if shard.index == 0 else None,
+            )
+        return service
+
+    def _owner(self, to_number: str) -> SmsService:
+        return self._service(self.router.for_number(to_number))
+
+    def _all(self) -> list[SmsService]:
+        return [self._service(shard) for shard in self.router.shards]
+
+    async def close(self) -> None:
+        for session in self._sessions.values():
+            await session.close()
+        if self._read_db is not None:
+            await self._read_db.close()
+
+    async def save_incoming_sms(
+        self,
+        payload: TwilioWebhookPayload,
+        raw_payload: dict[str, Any],
+    ) -> SMS:
+        return await self._owner(payload.to_number).save_incoming_sms(payload, raw_payload)
+
+    async def save_incoming_sms_batch(
+        self,
+        items: Sequence[tuple[TwilioWebhookPayload, dict[str, Any]]],
+    ) -> dict[str, SMS]:
+        """
+        Раскладывает пачку по шардам и сохраняет части параллельно.
+
+        Каждый шард коммитит свою часть сам: при ошибке одного шарда части
+        остальных уже сохранены, а повтор webhook'а Twilio отсеет дедупликация.
+        """
+        groups: defaultdict[int, list[tuple[TwilioWebhookPayload, dict[str, Any]]]] = defaultdict(list)
+        for payload, raw_payload in items:
+            groups[self.router.for_number(payload.to_number).index].append((payload, raw_payload))
+        results = await asyncio.gather(*(
+            self._service(self.router.shards[index]).save_incoming_sms_batch(group)
+            for index, group in groups.items()
+        ))
+        saved: dict[str, SMS] = {}
+        for part in results:
+            saved.update(part)
+        return saved
+
     async def get_sms_by_id(self, sms_id: int) -> SMS | None:
-        result = await self.db.execute(select(SMS).where(SMS.id == sms_id))
-        return result.scalar_one_or_none()
+        shard = self.router.for_id(sms_id)
+        if shard is None:
+            return None
+        return await self._service(shard).get_sms_by_id(sms_id)
+
+    async def list_sms_after(
+        self,
+        to_number: str,
+        after_id: int,
+        since: datetime,
+        limit: int = 100,
+    ) -> list[Row]:
+        return await self._owner(to_number).list_sms_after(to_number, after_id, since, limit)
+
+    async def get_latest_otp(
+        self,
+        to_number: str,
+        sender: str | None = None,
+        received_from: datetime | None = None,
+    ) -> Row | None:
+        return await self._owner(to_number).get_latest_otp(to_number, sender, received_from)
 
     async def list_sms(
         self,
@@ -59,24 +701,160 @@ class SmsService:
         offset: int = 0,
         from_number: str | None = None,
         to_number: str | None = None,
-    ) -> tuple[list[SMS], int]:
-        stmt = select(SMS).order_by(SMS.received_at.desc())
-        count_stmt = select(func.count()).select_from(SMS)
+        cursor: tuple[datetime, int] | None = None,
+        total_mode: TotalMode = TotalMode.exact,
+        received_from: datetime | None = None,
+        received_to: datetime | None = None,
+        payload_contains: dict[str, Any] | None = None,
+    ) -> tuple[list[Row], int | None]:
+        filters = {
+            "from_number": from_number,
+            "to_number": to_number,
+            "received_from": received_from,
+            "received_to": received_to,
+            "payload_contains": payload_contains,
+        }
+        if to_number:
+            return await self._owner(to_number).list_sms(
+                limit=limit, offset=offset, cursor=cursor, total_mode=total_mode, **filters
+            )
 
-        if from_number:
-            stmt = stmt.where(SMS.from_number == from_number)
-            count_stmt = count_stmt.where(SMS.from_number == from_number)
+        skip = 0 if cursor is not None else offset
+        results = await asyncio.gather(*(
+            service.list_sms(limit=skip + limit, offset=0, cursor=cursor, total_mode=total_mode, **filters)
+            for service in self._all()
+        ))
+        merged = heapq.merge(*(rows for rows, _ in results), key=_recent_key, reverse=True)
+        totals = [total for _, total in results]
+        total = None if any(t is None for t in totals) else sum(totals)
+        return list(itertools.islice(merged, skip, skip + limit)), total
+
+    async def count_sms(
+        self,
+        mode: TotalMode = TotalMode.exact,
+        from_number: str | None = None,
+        to_number: str | None = None,
+        received_from: datetime | None = None,
+        received_to: datetime | None = None,
+        payload_contains: dict[str, Any] | None = None,
+    ) -> int | None:
+        filters = {
+            "from_number": from_number,
+            "to_number": to_number,
+            "received_from": received_from,
+            "received_to": received_to,
+            "payload_contains": payload_contains,
+        }
+        if mode is TotalMode.none:
+            return None
+        if to_number:
+            return await self._owner(to_number).count_sms(mode=mode, **filters)
+        counts = await asyncio.gather(*(service.count_sms(mode=mode, **filters) for service in self._all()))
+        return sum(counts)
+
+    async def search_sms(
+        self,
+        query: str,
+        limit: int = 50,
+        order: SearchOrder = SearchOrder.recent,
+        from_number: str | None = None,
+        to_number: str | None = None,
+        received_from: datetime | None = None,
+        received_to: datetime | None = None,
+        cursor: tuple[datetime, int] | tuple[float, datetime, int] | None = None,
+    ) -> list[Row]:
+        arguments = {
+            "query": query,
+            "limit": limit,
+            "order": order,
+            "from_number": from_number,
+            "to_number": to_number,
+            "received_from": received_from,
+            "received_to": received_to,
+            "cursor": cursor,
+        }
+        if to_number:
+            return await self._owner(to_number).search_sms(**arguments)
+        results = await asyncio.gather(*(service.search_sms(**arguments) for service in self._all()))
+        key = _rank_key if order is SearchOrder.rank else _recent_key
+        return list(itertools.islice(heapq.merge(*results, key=key, reverse=True), limit))
+
+    async def stream_sms(
+        self,
+        from_number: str | None = None,
+        to_number: str | None = None,
+        received_from: datetime | None = None,
+        received_to: datetime | None = None,
+        payload_contains: dict[str, Any] | None = None,
+        fetch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Выгрузка по фильтрам: с to_number — из шарда-владельца, иначе слиянием
+        серверных курсоров всех шардов в порядке (received_at ASC, id DESC).
+        """
+        filters = {
+            "from_number": from_number,
+            "to_number": to_number,
+            "received_from": received_from,
+            "received_to": received_to,
+            "payload_contains": payload_contains,
+            "fetch_size": fetch_size,
+        }
         if to_number:
-            stmt = stmt.where(SMS.to_number == to_number)
-            count_stmt = count_stmt.where(SMS.to_number == to_number)
+            streams = self._owner(to_number).stream_sms(**filters)
+        else:
+            streams = _merge_streams(
+                [service.stream_sms(**filters) for service in self._all()],
+                key=_recent_key,
+                chunk_size=fetch_size,
+            )
+        async for rows in streams:
+            yield rows
+
 
-        total = (await self.db.execute(count_stmt)).scalar_one()
-        result = await self.db.execute(stmt.limit(limit).offset(offset))
-        items = result.scalars().all()
-        return list(items), total
+def build_sms_service(
+    db: AsyncSession,
+    dedup: SmsDedupCache | None = None,
+    notify_channel: str | None = None,
+    router: ShardRouter | None = None,
+    read_db: AsyncSession | None = None,
+    replicas: ReplicaRouter | None = None,
+) -> SmsService | ShardedSmsService:
+    arguments = {
+        "db": db,
+        "dedup": dedup,
+        "notify_channel": notify_channel,
+        "read_db": read_db,
+        "replicas": replicas,
+    }
+    if router is not None and router.sharded:
+        return ShardedSmsService(router=router, **arguments)
+    return SmsService(**arguments)
 
 
-def get_sms_service(
+async def get_sms_service(
     db: AsyncSession = Depends(get_db_session),
-) -> SmsService:
-    return SmsService(db=db)
\ No newline at end of file
+    dedup: SmsDedupCache | None = Depends(get_sms_dedup_cache),
+    notify_channel: str | None = Depends(get_sms_notify_channel),
+    router: ShardRouter = Depends(get_shard_router),
+    replicas: ReplicaRouter = Depends(get_replica_router),
+    read_consistency: str | None = Header(
+        None,
+        alias="X-Read-Consistency",
+        description="primary — читать из primary, а не с реплики (read-your-writes)",
+    ),
+) -> AsyncIterator[SmsService | ShardedSmsService]:
+    # Сессия реплики создается сразу, но соединение берет только при первом запросе
+    read_db = None if read_consistency == "primary" else replicas.read_session()
+    service = build_sms_service(
+        db=db,
+        dedup=dedup,
+        notify_channel=notify_channel,
+        router=router,
+        read_db=read_db,
+        replicas=replicas,
+    )
+    try:
+        yield service
+    finally:
+        await service.close()
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass, field
+from string import Template
+from typing import Any
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.rate_limit import TokenBucket
+from app.services.twilio_client import TwilioApiError, TwilioService
+
+logger = logging.getLogger("app.twilio_batch")
+
+
+@dataclass(frozen=True, slots=True)
+class BatchRecipient:
+    to: str
+    template: Template
+    params: dict[str, str] = field(default_factory=dict)
+    from_: str | None = None
+
+
+class TwilioBatchSender:
+    """
+    Рассылка SMS по списку получателей через TwilioService.
+
+    Одновременно выполняется не больше concurrency запросов, а темп отправки
+    ограничивает общий для аккаунта TokenBucket. Результаты отдаются по мере
+    завершения отправок, а не в порядке получателей (поле index связывает их
+    с запросом).
+    """
+
+    def __init__(self, service: TwilioService, limiter: TokenBucket, concurrency: int) -> None:
+        self._service = service
+        self._limiter = limiter
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _send_one(self, index: int, recipient: BatchRecipient) -> dict[str, Any]:
+        result: dict[str, Any] = {"index": index, "to": recipient.to}
+        try:
+            body = recipient.template.substitute(recipient.params)
+        except (KeyError, ValueError) as e:
+            return {**result, "status": "failed", "error": f"Template error: {e}"}
+
+        async with self._semaphore:
+            await self._limiter.acquire()
+            try:
+                message = await self._service.send_sms(to=recipient.to, body=body, from_=recipient.from_)
+            except TwilioApiError as e:
+                return {**result, "status": "failed", "error": e.message, "error_code": e.code}
+            except (httpx.HTTPError, ValueError) as e:
+                return {**result, "status": "failed", "error": str(e) or type(e).__name__}
+        return {**result, "status": "sent", "sid": message["sid"], "twilio_status": message["status"]}
+
+    async def send(self, recipients: Sequence[BatchRecipient]) -> AsyncIterator[dict[str, Any]]:
+        tasks = [
+            asyncio.create_task(self._send_one(index, recipient))
+            for index, recipient in enumerate(recipients)
+        ]
+        sent = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                sent += result["status"] == "sent"
+                yield result
+        finally:
+            # клиент отключился — неотправленное отменяем
+            for task in tasks:
+                task.cancel()
+            logger.info(
+                "Twilio batch finished",
+                extra={"recipients": len(recipients), "sent": sent},
+            )
+
+
+settings = get_settings()
+
+# Один bucket на аккаунт Twilio в процессе: лимит пропускной способности
+# (MPS) задается на аккаунт/отправителя, а не на отдельный запрос
+twilio_rate_limiter = TokenBucket(
+    rate=settings.twilio_send_rate,
+    capacity=settings.twilio_send_burst,
+)
+
+
+def get_twilio_rate_limiter() -> TokenBucket:
+    return twilio_rate_limiter
@@ -1,35 +1,114 @@
-from typing import Any, Dict, AsyncGenerator
+import logging
+from typing import Any, Dict
 
-from twilio.rest import Client as TwilioClient
-from fastapi import Depends
+import httpx
 
+from app.core.cache import SingleFlightCache
 from app.core.config import Settings, get_settings
+from app.core.http_clients import HttpClientRegistry, build_http_client, http_clients
+
+logger = logging.getLogger("app.twilio_client")
+
+
+class TwilioApiError(Exception):
+    """Twilio REST API ответил ошибкой (4xx/5xx)."""
+
+    def __init__(self, status_code: int, code: int | None, message: str) -> None:
+        super().__init__(f"Twilio API error {status_code} (code {code}): {message}")
+        self.status_code = status_code
+        self.code = code
+        self.message = message
 
 
 class TwilioService:
     """
-    Сервис для работы с Twilio API.
-    Использует синхронный Twilio SDK, но обернут для удобства.
+    Асинхронный клиент Twilio REST API (2010-04-01).
+
+    HTTP-клиент с пулом keep-alive соединений к api.twilio.com берется
+    из реестра провайдеров (app.core.http_clients), поэтому запросы не блокируют
+    event loop и не открывают новое TLS-соединение на каждый вызов.
+    Данные аккаунта кэшируются на provider_lookup_cache_ttl секунд.
     """
-    def __init__(self, settings: Settings) -> None:
+
+    CLIENT_NAME = "twilio"
+
+    def __init__(
+        self,
+        settings: Settings,
+        clients: HttpClientRegistry | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
         self._settings = settings
-        self._client = TwilioClient(
-            settings.twilio_account_sid,
-            settings.twilio_auth_token,
+        self._clients = clients or HttpClientRegistry()
+        self._clients.register(self.CLIENT_NAME, lambda: self._build_client(transport))
+        self._account_cache: SingleFlightCache[str, Dict[str, Any]] = SingleFlightCache(
+            maxsize=16,
+            ttl=settings.provider_lookup_cache_ttl,
+        )
+
+    def _build_client(self, transport: httpx.AsyncBaseTransport | None) -> httpx.AsyncClient:
+        settings = self._settings
+        return build_http_client(
+            base_url=f"{settings.twilio_api_base_url.rstrip('/')}/2010-04-01",
+            timeout=settings.twilio_timeout,
+            connect_timeout=settings.twilio_connect_timeout,
+            max_connections=settings.twilio_max_connections,
+            max_keepalive_connections=settings.twilio_max_keepalive_connections,
+            keepalive_expiry=settings.twilio_keepalive_expiry,
+            transport=transport,
+            provider=self.CLIENT_NAME if settings.metrics_enabled else None,
+            auth=(settings.twilio_account_sid, settings.twilio_auth_token),
         )
 
-    def get_account_balance(self) -> Dict[str, Any]:
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._clients.get(self.CLIENT_NAME)
+
+    async def close(self) -> None:
+        await self._clients.aclose(self.CLIENT_NAME)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {"account": self._account_cache.stats()}
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> Dict[str, Any]:
+        resp = await self.client.request(method, url, **kwargs)
+        if resp.is_error:
+            try:
+                error = resp.json()
+            except ValueError:
+                error = {}
+            raise TwilioApiError(
+                status_code=resp.status_code,
+                code=error.get("code"),
+                message=error.get("message") or resp.reason_phrase,
+            )
+        return resp.json()
+
+    async def get_account_balance(self) -> Dict[str, Any]:
+        """
+        Получает информацию об аккаунте Twilio.
+
+        Одновременные вызовы при пустом кэше делят один запрос к Twilio.
         """
-        Получает баланс аккаунта Twilio.
+        sid = self._settings.twilio_account_sid
+        account = await self._account_cache.get_or_load(sid, self._fetch_account)
+        return dict(account)
+
+    async def ping(self) -> None:
+        """
+        Запрос к Twilio в обход кэша — проверка доступности для монитора здоровья.
         """
-        account = self._client.api.accounts(self._settings.twilio_account_sid).fetch()
+        await self._fetch_account()
+
+    async def _fetch_account(self) -> Dict[str, Any]:
+        account = await self._request("GET", f"/Accounts/{self._settings.twilio_account_sid}.json")
         return {
-            "account_sid": account.sid,
-            "status": account.status,
-            "type": account.type,
+            "account_sid": account["sid"],
+            "status": account["status"],
+            "type": account["type"],
         }
 
-    def send_sms(
+    async def send_sms(
         self,
         to: str,
         body: str,
@@ -37,7 +116,7 @@ class TwilioService:
     ) -> Dict[str, Any]:
         """
         Отправляет SMS через Twilio.
-        
+
         Args:
             to: номер получателя
             body: текст сообщения
@@ -46,27 +125,30 @@ class TwilioService:
         from_number = from_ or self._settings.twilio_phone_number
         if not from_number:
             raise ValueError("Twilio phone number not configured")
-        
-        message = self._client.messages.create(
-            body=body,
-            from_=from_number,
-            to=to,
+
+        message = await self._request(
+            "POST",
+            f"/Accounts/{self._settings.twilio_account_sid}/Messages.json",
+            data={"To": to, "From": from_number, "Body": body},
+        )
+        logger.info(
+            "Sent SMS via Twilio",
+            extra={"message_sid": message["sid"], "to": to, "status": message["status"]},
         )
-        
         return {
-            "sid": message.sid,
-            "status": message.status,
-            "to": message.to,
-            "from": message.from_,
-            "body": message.body,
+            "sid": message["sid"],
+            "status": message["status"],
+            "to": message["to"],
+            "from": message["from"],
+            "body": message["body"],
         }
 
 
-async def get_twilio_service(
-    settings: Settings = Depends(get_settings),
-) -> TwilioService:
+twilio_service = TwilioService(settings=get_settings(), clients=http_clients)
+
+
+async def get_twilio_service() -> TwilioService:
     """
-    Dependency для получения TwilioService.
+    Dependency для получения общего TwilioService.
     """
-    return TwilioService(settings=settings)
-
+    return twilio_service
@@ -0,0 +1,142 @@
+"""
+Общие части бенчмарков: прогон с ограниченным параллелизмом, перцентили,
+сохранение результатов в benchmarks/results и сравнение с прошлым прогоном.
+"""
+import asyncio
+import json
+import platform
+import subprocess
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentiles(samples_ms: list[float]) -> dict[str, float]:
+    if not samples_ms:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    ordered = sorted(samples_ms)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 3)
+
+    return {
+        "p50": at(0.50),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": round(ordered[-1], 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+    }
+
+
+async def run_load(
+    name: str,
+    call: Callable[[int], Awaitable[int]],
+    requests: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    """
+    Выполняет requests вызовов call(i) не более чем concurrency одновременно.
+
+    call возвращает HTTP-статус; 5xx и исключения считаются ошибками,
+    остальные статусы попадают в распределение statuses.
+    """
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                status = await call(index)
+            except Exception as exc:
+                errors += 1
+                statuses[type(exc).__name__] += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(status)] += 1
+            if status >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    result = {
+        "name": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "statuses": dict(statuses),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(requests / duration, 1) if duration else 0.0,
+        "latency_ms": percentiles(latencies),
+    }
+    print_result(result)
+    return result
+
+
+def print_result(result: dict[str, Any]) -> None:
+    latency = result["latency_ms"]
+    print(
+        f"{result['name']:<16} {result['throughput_rps']:9.1f} req/s  "
+        f"p50 {latency['p50']:8.2f}  p95 {latency['p95']:8.2f}  p99 {latency['p99']:8.2f} ms  "
+        f"errors {result['errors']}"
+    )
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(suite: str, scenarios: list[dict[str, Any]], meta: dict[str, Any], output: Path = RESULTS_DIR) -> Path:
+    output.mkdir(parents=True, exist_ok=True)
+    now = datetime.now(timezone.utc)
+    document = {
+        "suite": suite,
+        "created_at": now.isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "meta": meta,
+        "scenarios": scenarios,
+    }
+    path = output / f"{suite}-{now:%Y%m%dT%H%M%SZ}.json"
+    path.write_text(json.dumps(document, indent=2, ensure_ascii=False) + "\n")
+    print(f"results saved to {path}")
+    return path
+
+
+def compare(scenarios: list[dict[str, Any]], baseline_path: Path) -> None:
+    """
+    Печатает изменение throughput и p99 относительно сохраненного прогона.
+    """
+    baseline = {s["name"]: s for s in json.loads(baseline_path.read_text())["scenarios"]}
+    print(f"\ncompared to {baseline_path.name}:")
+    for scenario in scenarios:
+        before = baseline.get(scenario["name"])
+        if before is None:
+            continue
+        rps = _delta(before["throughput_rps"], scenario["throughput_rps"])
+        p99 = _delta(before["latency_ms"]["p99"], scenario["latency_ms"]["p99"])
+        print(f"{scenario['name']:<16} throughput {rps:>8}  p99 {p99:>8}")
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
@@ -0,0 +1,129 @@
+"""
+Бенчмарк страницы списка SMS: запрос к БД + сериализация ответа.
+
+Сравнивает прежний путь (select(SMS) с raw_payload и ORM-объектами,
+SmsListItem.model_validate, проверка response_model и JSONResponse) с текущим
+(select(*LIST_COLUMNS), словари из строк и orjson). Нужна БД с миграциями;
+при --seed на отдельный номер добавляются тестовые SMS с типичным payload Twilio.
+
+Запуск: python -m benchmarks.list_sms [--seed 5000] [--limit 500] [--iterations 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.db import AsyncSessionLocal, engine
+from app.core.responses import FastJSONResponse
+from app.models.sms import SMS
+from app.schemas.sms import SmsListItem, SmsListResponse
+from app.services.sms_service import LIST_COLUMNS
+
+TO_NUMBER = "+15550009999"
+ORDER = (SMS.received_at.desc(), SMS.id.asc())
+
+
+def _payload(sid: str, index: int) -> dict:
+    return {
+        "MessageSid": sid,
+        "SmsSid": sid,
+        "SmsMessageSid": sid,
+        "AccountSid": "AC0123456789abcdef0123456789abcdef",
+        "From": f"+1555000{index % 10000:04d}",
+        "To": TO_NUMBER,
+        "Body": f"Your verification code is {index % 1000000:06d}",
+        "NumMedia": "0",
+        "NumSegments": "1",
+        "SmsStatus": "received",
+        "ApiVersion": "2010-04-01",
+        "ToCountry": "US", "ToState": "CA", "ToCity": "SAN FRANCISCO", "ToZip": "94105",
+        "FromCountry": "US", "FromState": "CA", "FromCity": "SAN FRANCISCO", "FromZip": "94105",
+    }
+
+
+async def seed(count: int) -> None:
+    now = datetime.now(timezone.utc)
+    rows = []
+    for index in range(count):
+        sid = f"SMBENCH{uuid.uuid4().hex}"
+        payload = _payload(sid, index)
+        rows.append({
+            "provider_message_id": sid,
+            "from_number": payload["From"],
+            "to_number": TO_NUMBER,
+            "text": payload["Body"],
+            "received_at": now - timedelta(seconds=index),
+            "status": "received",
+            "raw_payload": payload,
+            "otp_code": payload["Body"][-6:],
+        })
+    async with AsyncSessionLocal() as db:
+        for start in range(0, count, 1000):
+            await db.execute(insert(SMS).on_conflict_do_nothing(), rows[start:start + 1000])
+        await db.commit()
+
+
+async def legacy(limit: int) -> bytes:
+    stmt = select(SMS).where(SMS.to_number == TO_NUMBER).order_by(*ORDER).limit(limit)
+    async with AsyncSessionLocal() as db:
+        items = (await db.execute(stmt)).scalars().all()
+    response = SmsListResponse(
+        items=[SmsListItem.model_validate(i) for i in items],
+        total=None,
+        limit=limit,
+        offset=0,
+    )
+    # FastAPI проверял возвращенную модель по response_model и сериализовал ее
+    validated = SmsListResponse.model_validate(response.model_dump())
+    return JSONResponse(validated.model_dump(mode="json")).body
+
+
+async def fast(limit: int) -> bytes:
+    stmt = select(*LIST_COLUMNS).where(SMS.to_number == TO_NUMBER).order_by(*ORDER).limit(limit)
+    async with AsyncSessionLocal() as db:
+        items = (await db.execute(stmt)).all()
+    return FastJSONResponse({
+        "items": [row._asdict() for row in items],
+        "total": None,
+        "limit": limit,
+        "offset": 0,
+        "next_cursor": None,
+    }).body
+
+
+async def _measure(name: str, iterations: int, call) -> list[float]:
+    for _ in range(min(iterations, 20)):
+        await call()
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    q = statistics.quantiles(timings, n=100)
+    print(f"{name:<8} p50 {q[49]:7.2f} ms  p95 {q[94]:7.2f} ms  p99 {q[98]:7.2f} ms")
+    return q
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.seed:
+        await seed(args.seed)
+    body = await fast(args.limit)
+    print(f"page     {args.limit} rows, {len(body)} bytes")
+    before = await _measure("legacy", args.iterations, lambda: legacy(args.limit))
+    after = await _measure("fast", args.iterations, lambda: fast(args.limit))
+    print(f"p99      {before[98] / after[98]:7.2f}x")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
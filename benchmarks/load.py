@@ -0,0 +1,164 @@
+"""
+Нагрузочный бенчмарк приема и чтения SMS через app.main.app (httpx.ASGITransport).
+
+Сценарии:
+  ingest         подписанные Twilio webhook'и с новыми MessageSid
+  get            GET /api/v1/sms/{id} по случайным id из таблицы
+  list-offset    GET /api/v1/sms?limit=50&offset=N
+  list-filtered  GET /api/v1/sms?to_number=...&limit=50
+
+Приложение запускается со своим lifespan (очередь приема, пул БД) против
+локального Postgres из настроек. Для каждого сценария печатаются throughput
+и p50/p95/p99; результаты сохраняются в benchmarks/results/load-*.json,
+--compare сравнивает с ранее сохраненным файлом. Данные для чтения
+заранее заливаются через python -m benchmarks.seed.
+
+Запуск: python -m benchmarks.load [--scenarios ingest,get] [--requests 2000]
+        [--concurrency 32] [--ingest-mode direct|batched] [--compare FILE]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import uuid
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+import httpx
+
+SCENARIOS = ("ingest", "get", "list-offset", "list-filtered")
+WEBHOOK_URL = "http://bench/api/v1/webhooks/twilio/sms"
+
+
+def _webhook_body(index: int, to_numbers: list[str]) -> dict[str, str]:
+    sid = f"SMLOAD{uuid.uuid4().hex}"
+    return {
+        "MessageSid": sid,
+        "SmsSid": sid,
+        "AccountSid": "ACload",
+        "From": f"+1555{index % 1000:07d}",
+        "To": to_numbers[index % len(to_numbers)] if to_numbers else "+16660000001",
+        "Body": f"Your verification code is {index % 1000000:06d}",
+        "NumMedia": "0",
+        "NumSegments": "1",
+        "SmsStatus": "received",
+        "ApiVersion": "2010-04-01",
+        "FromCountry": "US",
+        "ToCountry": "US",
+    }
+
+
+async def _sample_data(session_factory) -> tuple[int, int, list[str], int]:
+    from sqlalchemy import text
+
+    async with session_factory() as session:
+        min_id, max_id = (await session.execute(text("SELECT min(id), max(id) FROM incoming_sms"))).one()
+        numbers = (await session.scalars(
+            text("SELECT DISTINCT to_number FROM (SELECT to_number FROM incoming_sms ORDER BY id DESC LIMIT 5000) s")
+        )).all()
+        estimate = await session.scalar(
+            text(
+                "SELECT COALESCE(sum(greatest(c.reltuples, 0)), 0)::bigint FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = 'incoming_sms'::regclass"
+            )
+        )
+    return min_id or 0, max_id or 0, list(numbers), int(estimate or 0)
+
+
+async def run(args: argparse.Namespace) -> None:
+    # Настройки читаются при импорте приложения — задаем их до него
+    os.environ["SMS_INGEST_MODE"] = args.ingest_mode
+    os.environ.setdefault("OUTBOX_ENABLED", "false")
+    os.environ.setdefault("HEALTH_MONITOR_ENABLED", "false")
+
+    from app.core.config import get_settings
+    from app.core.db import AsyncSessionLocal
+    from app.core.twilio_auth import TwilioSignatureValidator
+    from app.main import app
+    from benchmarks.common import compare, run_load, save_results
+
+    settings = get_settings()
+    validator = TwilioSignatureValidator(settings.twilio_auth_token)
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results: list[dict[str, Any]] = []
+    async with app.router.lifespan_context(app):
+        if not args.verbose_logs:
+            logging.getLogger("app").setLevel(logging.WARNING)
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        min_id, max_id, to_numbers, rows = await _sample_data(AsyncSessionLocal)
+        rng = random.Random(args.seed)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", limits=limits, timeout=60
+        ) as client:
+
+            async def ingest(index: int) -> int:
+                params = _webhook_body(index, to_numbers)
+                signature = validator.compute_signature(WEBHOOK_URL, params.items())
+                response = await client.post(
+                    WEBHOOK_URL,
+                    content=urlencode(params),
+                    headers={
+                        "Content-Type": "application/x-www-form-urlencoded",
+                        "X-Twilio-Signature": signature,
+                    },
+                )
+                return response.status_code
+
+            async def get(index: int) -> int:
+                response = await client.get(f"/api/v1/sms/{rng.randint(min_id, max_id)}")
+                return response.status_code
+
+            async def list_offset(index: int) -> int:
+                offset = rng.randint(0, args.max_offset)
+                response = await client.get("/api/v1/sms", params={"limit": 50, "offset": offset})
+                return response.status_code
+
+            async def list_filtered(index: int) -> int:
+                to_number = rng.choice(to_numbers)
+                response = await client.get("/api/v1/sms", params={"limit": 50, "to_number": to_number})
+                return response.status_code
+
+            calls = {"ingest": ingest, "get": get, "list-offset": list_offset, "list-filtered": list_filtered}
+            for name in scenarios:
+                if name != "ingest" and not max_id:
+                    print(f"{name:<16} skipped: incoming_sms is empty, run benchmarks.seed first")
+                    continue
+                results.append(await run_load(name, calls[name], args.requests, args.concurrency))
+
+    meta = {
+        "rows_estimate": rows,
+        "ingest_mode": args.ingest_mode,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "db_pool_size": settings.db_pool_size,
+        "db_max_overflow": settings.db_max_overflow,
+    }
+    if not args.no_save:
+        save_results("load", results, meta, Path(args.output))
+    if args.compare:
+        compare(results, Path(args.compare))
+
+
+if __name__ == "__main__":
+    from benchmarks.common import RESULTS_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--ingest-mode", choices=("direct", "batched"), default="direct")
+    parser.add_argument("--max-offset", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1, help="seed генератора случайных id и номеров")
+    parser.add_argument("--output", default=str(RESULTS_DIR))
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--verbose-logs", action="store_true")
+    asyncio.run(run(parser.parse_args()))
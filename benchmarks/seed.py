@@ -0,0 +1,139 @@
+"""
+Генератор синтетических входящих SMS для бенчмарков.
+
+Строки создаются на стороне Postgres (INSERT ... SELECT FROM generate_series)
+пачками по --chunk в --jobs параллельных соединениях, поэтому 1M строк
+заливаются за минуты, 10M — за десятки минут. received_at равномерно
+покрывает последние --days дней (секции месяцев создаются заранее),
+получатели и отправители распределены по --numbers и --senders номерам,
+каждая --otp-every-я SMS содержит код подтверждения.
+
+Запуск: python -m benchmarks.seed --rows 1000000 [--jobs 4] [--days 90]
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.core.db import AsyncSessionLocal, engine
+from app.services.partitions import SmsPartitionManager, add_months
+
+# Номера получателей: +1666XXXXXXX, отправителей: +1555XXXXXXX
+TO_PREFIX = "+1666"
+FROM_PREFIX = "+1555"
+
+INSERT_CHUNK = text(
+    """
+    INSERT INTO incoming_sms (
+        provider_message_id, from_number, to_number, text, received_at,
+        status, raw_payload, otp_code
+    )
+    SELECT
+        s.sid, s.from_number, s.to_number, s.body, s.received_at,
+        'received',
+        jsonb_build_object(
+            'MessageSid', s.sid, 'SmsSid', s.sid, 'AccountSid', 'ACseed',
+            'From', s.from_number, 'To', s.to_number, 'Body', s.body,
+            'NumMedia', '0', 'NumSegments', '1', 'SmsStatus', 'received',
+            'ApiVersion', '2010-04-01', 'FromCountry', 'US', 'ToCountry', 'US'
+        ),
+        s.otp_code
+    FROM (
+        SELECT
+            'SMSEED' || :tag || lpad(g::text, 10, '0') AS sid,
+            :from_prefix || lpad(((g * 40503) % :senders)::text, 7, '0') AS from_number,
+            :to_prefix || lpad(((g * 2654435761) % :numbers)::text, 7, '0') AS to_number,
+            CASE WHEN g % :otp_every = 0
+                THEN 'Your verification code is ' || lpad((g % 1000000)::text, 6, '0')
+                ELSE 'Seeded message #' || g || ' for load testing'
+            END AS body,
+            CASE WHEN g % :otp_every = 0 THEN lpad((g % 1000000)::text, 6, '0') END AS otp_code,
+            CAST(:window_end AS timestamptz) - (:total - g) * CAST(:step AS interval) AS received_at
+        FROM generate_series(CAST(:start AS bigint), CAST(:stop AS bigint)) AS g
+    ) AS s
+    """
+)
+
+
+async def ensure_partitions(first_day: date, last_day: date) -> None:
+    async with AsyncSessionLocal() as session:
+        manager = SmsPartitionManager(session)
+        month = first_day.replace(day=1)
+        while month <= last_day:
+            await manager.create_partition(month)
+            month = add_months(month, 1)
+
+
+async def seed(rows: int, days: int, numbers: int, senders: int, otp_every: int, chunk: int, jobs: int, tag: str) -> None:
+    window_end = datetime.now(timezone.utc)
+    window_start = window_end - timedelta(days=days)
+    await ensure_partitions(window_start.date(), window_end.date())
+
+    step = timedelta(days=days) / rows
+    params = {
+        "tag": tag,
+        "from_prefix": FROM_PREFIX,
+        "to_prefix": TO_PREFIX,
+        "senders": senders,
+        "numbers": numbers,
+        "otp_every": otp_every,
+        "window_end": window_end,
+        "total": rows,
+        "step": step,
+    }
+    chunks = asyncio.Queue()
+    for start in range(1, rows + 1, chunk):
+        chunks.put_nowait((start, min(start + chunk - 1, rows)))
+
+    inserted = 0
+    started = time.perf_counter()
+
+    async def worker() -> None:
+        nonlocal inserted
+        async with AsyncSessionLocal() as session:
+            while not chunks.empty():
+                start, stop = chunks.get_nowait()
+                result = await session.execute(INSERT_CHUNK, {**params, "start": start, "stop": stop})
+                await session.commit()
+                inserted += result.rowcount
+                elapsed = time.perf_counter() - started
+                print(f"\r{inserted:>12,} rows  {inserted / elapsed:>10,.0f} rows/s", end="", flush=True)
+
+    await asyncio.gather(*(worker() for _ in range(jobs)))
+    print()
+
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE incoming_sms"))
+        await conn.commit()
+    print(f"seeded {inserted:,} rows in {time.perf_counter() - started:.1f}s (tag {tag})")
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        await seed(
+            rows=args.rows,
+            days=args.days,
+            numbers=args.numbers,
+            senders=args.senders,
+            otp_every=args.otp_every,
+            chunk=args.chunk,
+            jobs=args.jobs,
+            tag=args.tag or datetime.now(timezone.utc).strftime("%y%m%d%H%M%S"),
+        )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--numbers", type=int, default=10_000, help="различных получателей")
+    parser.add_argument("--senders", type=int, default=1_000, help="различных отправителей")
+    parser.add_argument("--otp-every", type=int, default=3)
+    parser.add_argument("--chunk", type=int, default=50_000)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--tag", help="префикс provider_message_id, по умолчанию — время запуска")
+    asyncio.run(main(parser.parse_args()))
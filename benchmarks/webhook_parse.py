@@ -0,0 +1,117 @@
+"""
+Микробенчмарк разбора и проверки подписи Twilio webhook.
+
+Сравнивает прежний путь (form-парсер Starlette, новый RequestValidator
+и str(request.url) на каждый запрос, сборка payload и model_dump) с текущим
+(один разбор urlencoded-тела, HMAC с заранее подготовленным ключом,
+model_validate из того же разбора). База данных не нужна.
+
+Запуск: python -m benchmarks.webhook_parse [--iterations 20000]
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.requests import Request
+from twilio.request_validator import RequestValidator
+
+from app.core.config import Settings
+from app.core.twilio_auth import TwilioSignatureValidator, webhook_url
+from app.schemas.sms import TwilioWebhookPayload
+
+AUTH_TOKEN = "benchmark-token"
+URL = "https://sms.example.com/api/v1/webhooks/twilio/sms"
+PARAMS = {
+    "ToCountry": "US",
+    "ToState": "CA",
+    "SmsMessageSid": "SM0123456789abcdef0123456789abcdef",
+    "NumMedia": "0",
+    "ToCity": "SAN FRANCISCO",
+    "FromZip": "94105",
+    "SmsSid": "SM0123456789abcdef0123456789abcdef",
+    "FromState": "CA",
+    "SmsStatus": "received",
+    "FromCity": "SAN FRANCISCO",
+    "Body": "Your verification code is 482913",
+    "FromCountry": "US",
+    "To": "+15550002222",
+    "ToZip": "94105",
+    "NumSegments": "1",
+    "MessageSid": "SM0123456789abcdef0123456789abcdef",
+    "AccountSid": "AC0123456789abcdef0123456789abcdef",
+    "From": "+15550001111",
+    "ApiVersion": "2010-04-01",
+}
+LEGACY_FIELDS = (
+    "MessageSid", "AccountSid", "From", "To", "Body",
+    "NumMedia", "MessageStatus", "SmsStatus", "SmsSid", "SmsMessageSid",
+)
+
+
+def _request(body: bytes, signature: str) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "scheme": "https",
+        "path": "/api/v1/webhooks/twilio/sms",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"sms.example.com"),
+            (b"content-type", b"application/x-www-form-urlencoded"),
+            (b"x-twilio-signature", signature.encode()),
+        ],
+    }
+    return Request(scope, receive)
+
+
+async def legacy(body: bytes, signature: str) -> dict:
+    request = _request(body, signature)
+    form = await request.form()
+    form_data = {name: form[name] for name in LEGACY_FIELDS if form.get(name)}
+    validator = RequestValidator(AUTH_TOKEN)
+    url = str(request.url).split("?")[0]
+    validator.validate(url, form_data, request.headers["X-Twilio-Signature"])
+    payload = TwilioWebhookPayload(**{name: form.get(name) for name in LEGACY_FIELDS if name in form})
+    return payload.model_dump()
+
+
+async def fast(body: bytes, signature: str, validator: TwilioSignatureValidator, settings: Settings) -> dict:
+    request = _request(body, signature)
+    params = parse_qsl((await request.body()).decode(), keep_blank_values=True)
+    if not validator.validate(webhook_url(request, settings), params, request.headers["X-Twilio-Signature"]):
+        raise AssertionError("signature mismatch")
+    raw_payload = dict(params)
+    TwilioWebhookPayload.model_validate(raw_payload)
+    return raw_payload
+
+
+async def _measure(name: str, iterations: int, call) -> float:
+    for _ in range(min(iterations, 1000)):
+        await call()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await call()
+    per_request = (time.perf_counter() - started) / iterations * 1e6
+    print(f"{name:<8} {per_request:8.1f} us/request")
+    return per_request
+
+
+async def main(iterations: int) -> None:
+    body = urlencode(PARAMS).encode()
+    validator = TwilioSignatureValidator(AUTH_TOKEN)
+    signature = validator.compute_signature(URL, PARAMS.items())
+    settings = Settings.model_construct(twilio_webhook_base_url=None)
+
+    before = await _measure("legacy", iterations, lambda: legacy(body, signature))
+    after = await _measure("fast", iterations, lambda: fast(body, signature, validator, settings))
+    print(f"speedup  {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    asyncio.run(main(parser.parse_args().iterations))
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import BloomFilter, SingleFlightCache, TTLLRUCache
+from app.services.sms_dedup import SmsDedupCache
+
+
+def test_ttl_lru_evicts_oldest_and_expires():
+    now = [0.0]
+    cache: TTLLRUCache[str, int] = TTLLRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # вытесняет "b", так как "a" недавно читали
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"SM{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_dedup_cache_rotates_bloom_filters():
+    dedup = SmsDedupCache(cache_size=10, ttl=60, bloom_capacity=2, bloom_error_rate=0.01)
+    assert not dedup.might_contain("SM1")
+    for i in range(5):
+        dedup.remember(f"SM{i}", i)
+    assert dedup.might_contain("SM4")
+    assert dedup.get("SM3") == 3
+    assert dedup.stats()["bloom_rotations"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cache_coalesces_concurrent_loads():
+    cache: SingleFlightCache[str, int] = SingleFlightCache(maxsize=10, ttl=60)
+    calls = 0
+
+    async def load() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(cache.get_or_load("k", load) for _ in range(10)))
+    assert results == [42] * 10
+    assert calls == 1
+    assert await cache.get_or_load("k", load) == 42
+    assert cache.stats()["coalesced"] == 9
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cache_does_not_cache_errors():
+    cache: SingleFlightCache[str, int] = SingleFlightCache(maxsize=10, ttl=60)
+
+    async def fail() -> int:
+        raise RuntimeError("upstream down")
+
+    async def load() -> int:
+        return 1
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("k", fail)
+    assert await cache.get_or_load("k", load) == 1
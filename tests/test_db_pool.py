@@ -0,0 +1,95 @@
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import exc, text
+
+from app.core.config import get_settings
+from app.core.db import InstrumentedNullPool, InstrumentedQueuePool, build_engine, db_pool_stats
+
+
+def _settings(**overrides):
+    return get_settings().model_copy(update=overrides)
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_track_checkouts_and_saturation():
+    engine = build_engine(_settings(db_pool_size=2, db_max_overflow=0))
+    try:
+        assert isinstance(engine.sync_engine.pool, InstrumentedQueuePool)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            during = db_pool_stats(engine)
+        after = db_pool_stats(engine)
+    finally:
+        await engine.dispose()
+
+    assert during["checked_out"] == 1
+    assert during["saturation"] == 0.5
+    assert after["checked_out"] == 0
+    assert after["checkouts"] == 1
+    assert after["connects"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_timeout_is_counted_and_survives_dispose():
+    engine = build_engine(_settings(db_pool_size=1, db_max_overflow=0, db_pool_timeout=0.05))
+    try:
+        async with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+            assert db_pool_stats(engine)["saturation"] == 1.0
+        await engine.dispose()
+        stats = db_pool_stats(engine)
+    finally:
+        await engine.dispose()
+
+    assert stats["timeouts"] == 1
+    assert stats["wait_max_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_pgbouncer_mode_runs_without_statement_cache():
+    engine = build_engine(_settings(db_pgbouncer=True, db_null_pool=True))
+    try:
+        assert isinstance(engine.sync_engine.pool, InstrumentedNullPool)
+
+        async def query(value: int) -> int:
+            async with engine.connect() as conn:
+                return (await conn.execute(text("SELECT CAST(:v AS integer)"), {"v": value})).scalar_one()
+
+        assert await asyncio.gather(*(query(i) for i in range(3))) == [0, 1, 2]
+        stats = db_pool_stats(engine)
+    finally:
+        await engine.dispose()
+
+    assert stats["pool"] == "InstrumentedNullPool"
+    assert stats["checkouts"] == 3
+
+
+class _Collector(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__(logging.DEBUG)
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.mark.asyncio
+async def test_requests_do_not_log_pool_events_with_app_debug(client):
+    # APP_DEBUG=true выставляет логгеру app уровень DEBUG — пул не должен его унаследовать
+    app_logger, root = logging.getLogger("app"), logging.getLogger()
+    collector = _Collector()
+    level = app_logger.level
+    app_logger.setLevel(logging.DEBUG)
+    root.addHandler(collector)
+    try:
+        for _ in range(10):
+            assert (await client.get("/api/v1/sms", params={"limit": 1})).status_code == 200
+    finally:
+        root.removeHandler(collector)
+        app_logger.setLevel(level)
+
+    assert [record.name for record in collector.records if "pool" in record.name.lower()] == []
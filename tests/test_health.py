@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from app.core.db import engine
+from app.services.health import HealthCheck, HealthMonitor, database_probe
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _probe(results: list):
+    async def probe():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        if result == "hang":
+            await asyncio.sleep(10)
+        return None
+
+    return probe
+
+
+@pytest.mark.asyncio
+async def test_readiness_follows_critical_checks_only():
+    clock = FakeClock()
+    monitor = HealthMonitor(
+        checks=[
+            HealthCheck("database", _probe([None, ConnectionError("down"), None]), interval=5),
+            HealthCheck("twilio", _probe([RuntimeError("503")]), interval=60, critical=False),
+        ],
+        timeout=1,
+        stale_after=30,
+        clock=clock,
+    )
+
+    await monitor.run_once()
+    ready, report = monitor.ready()
+    assert ready and report["status"] == "degraded"
+    assert report["checks"]["twilio"]["error"] == "RuntimeError: 503"
+
+    clock.now = 5
+    await monitor.run_once()
+    ready, report = monitor.ready()
+    assert not ready and report["status"] == "unavailable"
+    assert report["checks"]["database"]["consecutive_failures"] == 1
+
+    # twilio еще не пора проверять повторно
+    clock.now = 10
+    await monitor.run_once()
+    assert monitor.ready()[0]
+    assert monitor.check("database").consecutive_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_probe_timeout_marks_check_failed():
+    monitor = HealthMonitor(
+        checks=[HealthCheck("database", _probe(["hang"]), interval=5)],
+        timeout=0.05,
+        stale_after=30,
+    )
+    await monitor.run_once()
+    assert monitor.check("database").ok is False
+    assert "timed out" in monitor.check("database").error
+
+
+@pytest.mark.asyncio
+async def test_liveness_detects_stale_cycle_and_stop_drops_readiness():
+    clock = FakeClock()
+    monitor = HealthMonitor(
+        checks=[HealthCheck("database", database_probe(engine), interval=5)],
+        timeout=2,
+        stale_after=30,
+        clock=clock,
+    )
+    await monitor.start()
+    for _ in range(100):
+        if monitor.last_cycle_at is not None:
+            break
+        await asyncio.sleep(0.01)
+    assert monitor.live()[0]
+    assert monitor.ready()[0]
+    assert "saturation" in monitor.report()["checks"]["database"]
+
+    clock.now = 31
+    assert not monitor.live()[0]
+
+    await monitor.stop()
+    assert monitor.ready() == (False, monitor.report())
+    assert monitor.status() == "stopping"
+
+
+@pytest.mark.asyncio
+async def test_probe_endpoints_answer_without_running_monitor(client):
+    assert (await client.get("/livez")).status_code == 200
+    assert (await client.get("/readyz")).status_code == 200
@@ -0,0 +1,56 @@
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from app.core.logging import ContextQueueHandler, JsonFormatter, request_id_var
+
+
+def _record(**extra) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, "saved %s", ("sms",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_queue_handler_captures_request_id_and_formats_exceptions():
+    log_queue = queue.SimpleQueue()
+    handler = ContextQueueHandler(log_queue)
+    token = request_id_var.set("req-1")
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("app.test", logging.ERROR, __file__, 1, "failed %s", ("x",), None)
+            record.exc_info = sys.exc_info()
+            handler.handle(record)
+    finally:
+        request_id_var.reset(token)
+
+    queued = log_queue.get_nowait()
+    assert queued.request_id == "req-1"
+    assert queued.msg == "failed x" and queued.args is None
+    assert queued.exc_info is None and "ValueError: boom" in queued.exc_text
+
+
+def test_json_formatter_emits_extra_fields():
+    line = JsonFormatter().format(_record(request_id="req-2", provider_message_id="SM1", batch_size=3))
+    entry = json.loads(line)
+
+    assert entry["message"] == "saved sms"
+    assert entry["logger"] == "app.test"
+    assert entry["request_id"] == "req-2"
+    assert entry["provider_message_id"] == "SM1"
+    assert entry["batch_size"] == 3
+    assert entry["ts"].endswith("Z")
+
+
+@pytest.mark.asyncio
+async def test_request_id_header_is_echoed_or_generated(client):
+    response = await client.get("/api/v1/sms/987654321", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["x-request-id"] == "abc-123"
+
+    response = await client.get("/api/v1/sms/987654321", headers={"X-Request-ID": "x" * 500})
+    assert response.headers["x-request-id"] != "x" * 500
+    assert len(response.headers["x-request-id"]) == 36
@@ -0,0 +1,67 @@
+import httpx
+import pytest
+from prometheus_client import CollectorRegistry, REGISTRY
+
+from app.core.http_clients import build_http_client
+from app.core.metrics import StatsCollector, sql_operation
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_sql_operation_uses_first_keyword():
+    assert sql_operation("SELECT incoming_sms.id FROM incoming_sms") == "SELECT"
+    assert sql_operation("\n  with due AS (SELECT 1) UPDATE outbound_sms") == "WITH"
+    assert sql_operation("SAVEPOINT sa_savepoint_1") == "OTHER"
+    assert sql_operation("") == "OTHER"
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template(client):
+    route = "/api/v1/sms/{sms_id}"
+    before = _sample("http_requests_total", method="GET", route=route, status="404")
+    unmatched_before = _sample("http_requests_total", method="GET", route="<unmatched>", status="404")
+
+    await client.get("/api/v1/sms/987654321")
+    await client.get("/api/v1/sms/987654322")
+    await client.get("/no/such/path")
+
+    assert _sample("http_requests_total", method="GET", route=route, status="404") == before + 2
+    assert _sample("http_requests_total", method="GET", route="<unmatched>", status="404") == unmatched_before + 1
+    assert _sample("db_query_duration_seconds_count", operation="SELECT") > 0
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'route="/api/v1/sms/{sms_id}"' in response.text
+
+
+@pytest.mark.asyncio
+async def test_provider_client_records_latency():
+    labels = {"provider": "test-provider", "method": "GET", "status": "503"}
+    before = _sample("provider_request_duration_seconds_count", **labels)
+    transport = httpx.MockTransport(lambda request: httpx.Response(503))
+    async with build_http_client(
+        base_url="https://provider.test",
+        timeout=1.0,
+        connect_timeout=1.0,
+        max_connections=1,
+        max_keepalive_connections=1,
+        keepalive_expiry=1.0,
+        transport=transport,
+        provider="test-provider",
+    ) as client:
+        await client.get("/balance")
+
+    assert _sample("provider_request_duration_seconds_count", **labels) == before + 1
+
+
+def test_stats_collector_exports_numeric_stats_and_skips_broken_sources():
+    collector = StatsCollector()
+    collector.register("cache", lambda: {"hits": 3, "enabled": "yes", "nested": {"a": 1}})
+    collector.register("broken", lambda: 1 / 0)
+    registry = CollectorRegistry()
+    registry.register(collector)
+
+    assert registry.get_sample_value("app_component_stat", {"component": "cache", "stat": "hits"}) == 3
+    assert registry.get_sample_value("app_component_stat", {"component": "cache", "stat": "enabled"}) is None
@@ -0,0 +1,30 @@
+import pytest
+
+from app.core.config import get_settings
+from app.services.otp import OtpExtractor, get_otp_extractor
+
+
+@pytest.mark.parametrize(
+    ("text", "code", "sender"),
+    [
+        ("Your code 1234", "1234", None),
+        ("[Google] G-код: 482 913", "482913", "Google"),
+        ("Telegram code 55123. Do not share it", "55123", "Telegram"),
+        ("Ваш пароль: 907311", "907311", None),
+        ("731-002 is your Instagram code", "731002", None),
+    ],
+)
+def test_default_patterns_extract_code(text, code, sender):
+    otp = get_otp_extractor().extract(text)
+    assert otp is not None
+    assert otp.code == code
+    assert otp.sender == sender
+
+
+def test_no_code_in_plain_text():
+    assert get_otp_extractor().extract("Meeting moved to room 12, see you there") is None
+
+
+def test_pattern_without_code_group_is_rejected():
+    with pytest.raises(ValueError):
+        OtpExtractor([r"\d+"], get_settings().otp_sender_patterns)
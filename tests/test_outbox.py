@@ -0,0 +1,169 @@
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete
+
+from app.core.config import get_settings
+from app.core.db import AsyncSessionLocal
+from app.core.rate_limit import TokenBucket
+from app.models.outbound_sms import OutboundSms
+from app.services.outbox import OutboxService, OutboxWorkerPool, retry_delay
+from app.services.twilio_client import TwilioService
+
+
+@pytest_asyncio.fixture
+async def outbox(db_session):
+    await db_session.execute(delete(OutboundSms))
+    await db_session.commit()
+    return OutboxService(db=db_session)
+
+
+def test_retry_delay_grows_exponentially_and_is_capped():
+    assert 1 <= retry_delay(1, base=2, cap=100) <= 2
+    assert 8 <= retry_delay(4, base=2, cap=100) <= 16
+    assert 50 <= retry_delay(20, base=2, cap=100) <= 100
+
+
+@pytest.mark.asyncio
+async def test_claim_hands_out_disjoint_batches(outbox):
+    await outbox.enqueue(
+        [{"to_number": f"+1555000000{i}", "body": "hi"} for i in range(3)],
+        max_attempts=3,
+    )
+    async with AsyncSessionLocal() as other_session:
+        first, second = await asyncio.gather(
+            outbox.claim(batch_size=2, lease=60),
+            OutboxService(db=other_session).claim(batch_size=2, lease=60),
+        )
+    ids = [m.id for m in first + second]
+    assert len(ids) == 3 and len(set(ids)) == 3
+    assert all(m.status == "sending" and m.attempts == 1 for m in first + second)
+    assert await outbox.claim(batch_size=10, lease=60) == []
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed_until_max_attempts(outbox):
+    [message] = await outbox.enqueue([{"to_number": "+15550000001", "body": "hi"}], max_attempts=2)
+
+    # Воркер забирает строку и падает, не записав результат: аренда истекает
+    for attempt in (1, 2):
+        outbox.db.expunge_all()
+        [claimed] = await outbox.claim(batch_size=10, lease=0)
+        assert claimed.id == message.id and claimed.attempts == attempt
+
+    assert await outbox.claim(batch_size=10, lease=0) == []
+    outbox.db.expunge_all()
+    failed = await outbox.get(message.id)
+    assert failed.status == "failed" and failed.attempts == 2
+    assert failed.last_error == "lease expired after the last attempt"
+
+
+@pytest.mark.asyncio
+async def test_workers_send_retry_and_give_up(outbox):
+    calls: dict[str, int] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        to = parse_qs(request.content.decode())["To"][0]
+        calls[to] = calls.get(to, 0) + 1
+        if to == "+15550000001" and calls[to] == 1:
+            return httpx.Response(503, json={"message": "Service unavailable"})
+        if to == "+15550000002":
+            return httpx.Response(400, json={"code": 21211, "message": "Invalid 'To' Phone Number"})
+        return httpx.Response(201, json={"sid": f"SM{to}", "status": "queued", "to": to, "from": "+1", "body": "hi"})
+
+    settings = get_settings().model_copy(update={"twilio_phone_number": "+15550009999"})
+    service = TwilioService(settings=settings, transport=httpx.MockTransport(handler))
+    pool = OutboxWorkerPool(
+        session_factory=AsyncSessionLocal,
+        service=service,
+        limiter=TokenBucket(rate=1000, capacity=100),
+        workers=2,
+        batch_size=10,
+        poll_interval=0.02,
+        lease=60,
+        backoff_base=0.05,
+        backoff_max=0.05,
+    )
+    created = await outbox.enqueue(
+        [{"to_number": f"+1555000000{i}", "body": "hi"} for i in range(3)],
+        max_attempts=3,
+    )
+
+    await pool.start()
+    try:
+        async with asyncio.timeout(5):
+            while True:
+                await asyncio.sleep(0.05)
+                rows = [
+                    await outbox.db.get(OutboundSms, m.id, populate_existing=True)
+                    for m in created
+                ]
+                if all(r.status in ("sent", "failed") for r in rows):
+                    break
+    finally:
+        await pool.stop()
+        await service.close()
+
+    by_number = {r.to_number: r for r in rows}
+    assert by_number["+15550000000"].status == "sent"
+    assert by_number["+15550000000"].provider_message_id == "SM+15550000000"
+    assert by_number["+15550000001"].status == "sent"
+    assert by_number["+15550000001"].attempts == 2
+    assert by_number["+15550000002"].status == "failed"
+    assert by_number["+15550000002"].attempts == 1
+    assert "21211" in by_number["+15550000002"].last_error
+
+
+@pytest.mark.asyncio
+async def test_rows_waiting_for_rate_limiter_are_sent_once_across_pools(outbox):
+    # Пачка ждет лимитера дольше аренды: второй пул забирает ее строки повторно
+    calls: dict[str, int] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        to = parse_qs(request.content.decode())["To"][0]
+        calls[to] = calls.get(to, 0) + 1
+        return httpx.Response(201, json={"sid": f"SM{to}", "status": "queued", "to": to, "from": "+1", "body": "hi"})
+
+    settings = get_settings().model_copy(update={"twilio_phone_number": "+15550009999"})
+    service = TwilioService(settings=settings, transport=httpx.MockTransport(handler))
+    pools = [
+        OutboxWorkerPool(
+            session_factory=AsyncSessionLocal,
+            service=service,
+            limiter=TokenBucket(rate=10, capacity=1),
+            workers=1,
+            batch_size=10,
+            poll_interval=0.02,
+            lease=0.2,
+            backoff_base=0.05,
+            backoff_max=0.05,
+        )
+        for _ in range(2)
+    ]
+    created = await outbox.enqueue(
+        [{"to_number": f"+1555000010{i}", "body": "hi"} for i in range(8)],
+        max_attempts=20,
+    )
+
+    for pool in pools:
+        await pool.start()
+    try:
+        async with asyncio.timeout(10):
+            while True:
+                await asyncio.sleep(0.05)
+                rows = [
+                    await outbox.db.get(OutboundSms, m.id, populate_existing=True)
+                    for m in created
+                ]
+                if all(r.status in ("sent", "failed") for r in rows):
+                    break
+    finally:
+        for pool in pools:
+            await pool.stop()
+        await service.close()
+
+    assert all(r.status == "sent" for r in rows)
+    assert calls == {m.to_number: 1 for m in created}
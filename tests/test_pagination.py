@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    received_at = datetime(2025, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(received_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (received_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor.__name__])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
@@ -0,0 +1,111 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.db import AsyncSessionLocal
+from app.core.replicas import ReplicaLagError, build_replica_router, replica_lag
+from app.schemas.sms import TwilioWebhookPayload
+from app.services.sms_service import SmsService
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _replica_settings(replicas: int = 1, max_lag: float = 5.0):
+    # «Реплики» — та же локальная БД: она не в recovery, отставание 0
+    return get_settings().model_copy(
+        update={
+            "db_replicas": [get_settings().database_url] * replicas,
+            "db_replica_max_lag": max_lag,
+            "db_read_your_writes_window": 10.0,
+        }
+    )
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest_asyncio.fixture
+async def replicas(clock):
+    router = build_replica_router(_replica_settings(replicas=2), clock=clock)
+    yield router
+    await router.dispose()
+
+
+@pytest.mark.asyncio
+async def test_replicas_receive_reads_only_after_successful_check(replicas):
+    assert replicas.read_session() is None
+
+    details = await replicas.check(replicas.replicas[0])
+    assert details == {"lag_seconds": 0.0, "in_recovery": False}
+    sessions = [replicas.read_session() for _ in range(3)]
+    assert all(session is not None for session in sessions)
+    assert replicas.stats()["available"] == 1
+
+    await replicas.check(replicas.replicas[1])
+    binds = {session.bind for session in [replicas.read_session() for _ in range(4)]}
+    assert binds == {replica.engine for replica in replicas.replicas}
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_is_taken_out_of_rotation():
+    router = build_replica_router(_replica_settings(max_lag=-1.0))
+    try:
+        with pytest.raises(ReplicaLagError):
+            await router.check(router.replicas[0])
+        assert router.read_session() is None
+        assert router.replica_stats(router.replicas[0])["failures"] == 1
+    finally:
+        await router.dispose()
+
+
+def test_replica_lag_requires_streaming_receiver():
+    assert replica_lag(in_recovery=False, streaming=False, caught_up=None, replay_delay=None) == 0.0
+    # Реплика догнала primary, тот давно без записей
+    assert replica_lag(in_recovery=True, streaming=True, caught_up=True, replay_delay=120.0) == 0.0
+    assert replica_lag(in_recovery=True, streaming=True, caught_up=False, replay_delay=3.5) == 3.5
+    # WAL receiver отключен: receive LSN застыл и равен replay LSN, но реплика отстает
+    assert replica_lag(in_recovery=True, streaming=False, caught_up=True, replay_delay=120.0) == 120.0
+    assert replica_lag(in_recovery=True, streaming=False, caught_up=True, replay_delay=None) is None
+
+
+def _payload(to_number: str) -> TwilioWebhookPayload:
+    return TwilioWebhookPayload(
+        MessageSid=f"SM{uuid.uuid4().hex}",
+        AccountSid="AC-replica-test",
+        From="+15550001111",
+        To=to_number,
+        Body="Your code is 246810",
+    )
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_falls_back_to_primary(db_session, replicas, clock):
+    # Отстающая реплика: снимок REPEATABLE READ снят до записи и новых строк не видит
+    stale = AsyncSessionLocal()
+    await stale.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    await stale.execute(text("SELECT 1"))
+    to_number = f"+1666{uuid.uuid4().int % 10**7:07d}"
+    service = SmsService(db=db_session, read_db=stale, replicas=replicas)
+    try:
+        sms = await service.save_incoming_sms(payload=_payload(to_number), raw_payload={})
+
+        items, total = await service.list_sms(to_number=to_number)
+        assert [row.id for row in items] == [sms.id] and total == 1
+        assert (await service.get_sms_by_id(sms.id)).id == sms.id
+
+        clock.now += 11
+        items, total = await service.list_sms(to_number=to_number)
+        assert items == [] and total == 0
+    finally:
+        await service.close()
@@ -0,0 +1,188 @@
+import asyncio
+import io
+import subprocess
+import uuid
+from collections import Counter
+from pathlib import Path
+
+import asyncpg
+import pytest
+import pytest_asyncio
+from sqlalchemy.engine import make_url
+
+from app.core.config import get_settings
+from app.core.sharding import SHARD_ID_BITS, ConsistentHashRing, build_shard_router, prepare_shard
+from app.schemas.sms import TwilioWebhookPayload
+from app.services.otp import get_otp_extractor
+from app.services.sms_import import SmsImporter, iter_records
+from app.services.sms_service import ShardedSmsService
+
+SHARD_DATABASES = 2
+
+
+def test_hash_ring_is_stable_and_balanced():
+    ring = ConsistentHashRing(["shard0", "shard1", "shard2", "shard3"])
+    keys = [f"+1666{i:07d}" for i in range(10_000)]
+    owners = Counter(ring.node_for(key) for key in keys)
+    assert set(owners) == {"shard0", "shard1", "shard2", "shard3"}
+    assert all(1_500 < count < 3_500 for count in owners.values())
+    assert [ring.node_for(key) for key in keys[:100]] == [
+        ConsistentHashRing(["shard0", "shard1", "shard2", "shard3"]).node_for(key) for key in keys[:100]
+    ]
+
+
+def test_adding_shard_moves_only_its_share_of_numbers():
+    before = ConsistentHashRing(["shard0", "shard1", "shard2", "shard3"])
+    after = ConsistentHashRing(["shard0", "shard1", "shard2", "shard3", "shard4"])
+    keys = [f"+1666{i:07d}" for i in range(10_000)]
+    moved = [key for key in keys if before.node_for(key) != after.node_for(key)]
+    assert all(after.node_for(key) == "shard4" for key in moved)
+    assert 1_200 < len(moved) < 2_800
+
+
+@pytest.fixture(scope="module")
+def shard_urls() -> list[str]:
+    """
+    Локальные БД <db_name>_shard1.. со схемой из миграций.
+    """
+    settings = get_settings()
+    base = make_url(settings.database_url)
+    names = [f"{settings.db_name}_shard{index}" for index in range(1, SHARD_DATABASES + 1)]
+
+    async def create_databases() -> None:
+        connection = await asyncpg.connect(settings.asyncpg_dsn)
+        try:
+            existing = {row["datname"] for row in await connection.fetch("SELECT datname FROM pg_database")}
+            for name in names:
+                if name not in existing:
+                    await connection.execute(f'CREATE DATABASE "{name}"')
+        finally:
+            await connection.close()
+
+    try:
+        asyncio.run(create_databases())
+    except (OSError, asyncpg.PostgresError) as exc:
+        pytest.skip(f"cannot create shard databases: {exc}")
+
+    urls = [base.set(database=name).render_as_string(hide_password=False) for name in names]
+    for url in urls:
+        subprocess.run(
+            ["alembic", "-x", f"url={url}", "upgrade", "head"],
+            cwd=Path(__file__).parent.parent,
+            check=True,
+            capture_output=True,
+        )
+    return urls
+
+
+@pytest_asyncio.fixture
+async def router(shard_urls):
+    router = build_shard_router(get_settings().model_copy(update={"db_shards": shard_urls}))
+    for shard in router.shards:
+        await prepare_shard(shard)
+    yield router
+    for shard in router.shards[1:]:
+        await shard.engine.dispose()
+
+
+def _payload(to_number: str, from_number: str, body: str) -> TwilioWebhookPayload:
+    return TwilioWebhookPayload(
+        MessageSid=f"SM{uuid.uuid4().hex}",
+        AccountSid="AC-shard-test",
+        From=from_number,
+        To=to_number,
+        Body=body,
+    )
+
+
+def _numbers_on_every_shard(router) -> list[str]:
+    numbers: dict[str, str] = {}
+    while len(numbers) < len(router.shards):
+        number = f"+1777{uuid.uuid4().int % 10**7:07d}"
+        numbers.setdefault(router.for_number(number).name, number)
+    return list(numbers.values())
+
+
+@pytest.mark.asyncio
+async def test_writes_go_to_owning_shard_and_reads_merge(router):
+    sender = f"+1888{uuid.uuid4().int % 10**7:07d}"
+    numbers = _numbers_on_every_shard(router)
+    primary = router.shards[0].session_factory()
+    service = ShardedSmsService(router=router, db=primary)
+    try:
+        saved = []
+        for round_ in range(2):
+            for number in numbers:
+                sms = await service.save_incoming_sms(
+                    _payload(number, sender, f"Your code is {round_}{len(saved):05d}"), {}
+                )
+                saved.append(sms)
+        batch = await service.save_incoming_sms_batch(
+            [(_payload(number, sender, "Batched message"), {}) for number in numbers]
+        )
+        saved.extend(batch.values())
+
+        for sms in saved:
+            first, last = router.for_number(sms.to_number).id_range
+            assert first <= sms.id <= last
+            assert sms.id >> SHARD_ID_BITS == router.for_number(sms.to_number).index
+            assert (await service.get_sms_by_id(sms.id)).to_number == sms.to_number
+
+        expected = sorted(saved, key=lambda sms: (-sms.received_at.timestamp(), sms.id))
+        page, total = await service.list_sms(limit=4, from_number=sender)
+        assert total == len(saved)
+        assert [row.id for row in page] == [sms.id for sms in expected[:4]]
+
+        rest, _ = await service.list_sms(
+            limit=100, from_number=sender, cursor=(page[-1].received_at, page[-1].id)
+        )
+        assert [row.id for row in page + rest] == [sms.id for sms in expected]
+        by_offset, _ = await service.list_sms(limit=3, offset=2, from_number=sender)
+        assert [row.id for row in by_offset] == [sms.id for sms in expected[2:5]]
+
+        own, own_total = await service.list_sms(to_number=numbers[1], from_number=sender)
+        assert own_total == 3
+        assert {row.to_number for row in own} == {numbers[1]}
+
+        exported = [row.id async for rows in service.stream_sms(from_number=sender, fetch_size=2) for row in rows]
+        assert exported == [sms.id for sms in reversed(expected)]
+
+        otp = await service.get_latest_otp(to_number=numbers[-1])
+        assert otp.to_number == numbers[-1] and otp.otp_code is not None
+    finally:
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_routes_rows_to_owning_shard(router):
+    prefix = f"SMSHIMP{uuid.uuid4().hex[:12]}"
+    numbers = _numbers_on_every_shard(router)
+    lines = ["Sid,From,To,Body,DateSent"] + [
+        f"{prefix}{index},+15550001111,{number},Code {index:06d},2024-01-05T10:00:00Z"
+        for index, number in enumerate(numbers * 2)
+    ]
+    connections = [await asyncpg.connect(shard.asyncpg_dsn) for shard in router.shards]
+    try:
+        importer = SmsImporter(
+            connections,
+            get_otp_extractor(),
+            batch_size=2,
+            route=lambda to_number: router.for_number(to_number).index,
+        )
+        progress = await importer.import_records(iter_records(io.StringIO("\n".join(lines)), "csv"))
+        stored = [
+            await connection.fetch(
+                "SELECT id, to_number FROM incoming_sms WHERE provider_message_id LIKE $1",
+                f"{prefix}%",
+            )
+            for connection in connections
+        ]
+    finally:
+        for connection in connections:
+            await connection.close()
+
+    assert progress.inserted == len(numbers) * 2
+    for shard, rows in zip(router.shards, stored):
+        assert len(rows) == 2
+        assert {router.for_number(row["to_number"]).index for row in rows} == {shard.index}
+        assert all(row["id"] >> SHARD_ID_BITS == shard.index for row in rows)
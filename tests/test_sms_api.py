@@ -1,6 +1,14 @@
+import csv
+import io
+import json
+import uuid
+
 import pytest
 
 from app.core.config import get_settings
+from app.core.twilio_auth import TwilioSignatureValidator
+from app.schemas.sms import SmsListItem, SmsListResponse, SmsSearchItem, SmsSearchResponse, TwilioWebhookPayload
+from app.services.sms_service import SmsService
 
 
 @pytest.mark.asyncio
@@ -13,34 +21,257 @@ async def test_health(client):
 
 @pytest.mark.asyncio
 async def test_webhook_creates_sms(client):
-    settings = get_settings()
-
-    payload = {
-        "user_id": "u1",
-        "country_code": "7",
-        "number": "+70000000000",
-        "sender": "BANK",
-        "message": "Your code 1234",
-        "time_start": "2025-01-01T12:00:00Z",
-        "time_left": "300",
-        "operation_id": "op-1",
-        "webhook_type": "receiving_sms",
-        "code": "sms-test-1",
+    url = "http://test/api/v1/webhooks/twilio/sms"
+    params = {
+        "MessageSid": f"SM{uuid.uuid4().hex}",
+        "AccountSid": "AC-test",
+        "From": "+15550001111",
+        "To": "+15550003333",
+        "Body": "Your code 1234",
     }
-
-    resp = await client.post(
-        f"/api/v1/webhooks/onlinesim/new-sms?token={settings.webhook_secret}",
-        json=payload,
+    signature = TwilioSignatureValidator(get_settings().twilio_auth_token).compute_signature(
+        url, params.items()
     )
+
+    resp = await client.post(url, data=params, headers={"X-Twilio-Signature": signature})
     assert resp.status_code == 201
     data = resp.json()
-    assert data["provider_message_id"] == "sms-test-1"
-    assert data["to_number"] == "+70000000000"
-    assert data["from_number"] == "BANK"
+    assert data["provider_message_id"] == params["MessageSid"]
+    assert data["to_number"] == "+15550003333"
+    assert data["from_number"] == "+15550001111"
+
+    # повтор webhook'а возвращает ту же запись
+    retry = await client.post(url, data=params, headers={"X-Twilio-Signature": signature})
+    assert retry.status_code == 201
+    assert retry.json()["id"] == data["id"]
 
     # список
-    list_resp = await client.get("/api/v1/sms?limit=10")
+    list_resp = await client.get("/api/v1/sms", params={"to_number": "+15550003333", "limit": 10})
     assert list_resp.status_code == 200
     list_data = list_resp.json()
     assert list_data["total"] >= 1
-    assert any(i["provider_message_id"] == "sms-test-1" for i in list_data["items"])
\ No newline at end of file
+    assert any(i["provider_message_id"] == params["MessageSid"] for i in list_data["items"])
+
+
+@pytest.mark.asyncio
+async def test_get_sms_returns_etag_and_304(client, db_session):
+    payload = TwilioWebhookPayload(
+        MessageSid=f"SM{uuid.uuid4().hex}",
+        AccountSid="AC-test",
+        From="+15550001111",
+        To="+15550002222",
+        Body="Your code 1234",
+    )
+    sms = await SmsService(db=db_session).save_incoming_sms(
+        payload=payload,
+        raw_payload=payload.model_dump(),
+    )
+
+    resp = await client.get(f"/api/v1/sms/{sms.id}")
+    assert resp.status_code == 200
+    assert resp.json()["provider_message_id"] == payload.MessageSid
+    etag = resp.headers["etag"]
+    assert "max-age" in resp.headers["cache-control"]
+
+    cached = await client.get(f"/api/v1/sms/{sms.id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_export_streams_ndjson_and_csv(client, db_session):
+    to_number = f"+1{uuid.uuid4().int % 10**10:010d}"
+    service = SmsService(db=db_session)
+    for _ in range(3):
+        payload = TwilioWebhookPayload(
+            MessageSid=f"SM{uuid.uuid4().hex}",
+            AccountSid="AC-test",
+            From="+15550001111",
+            To=to_number,
+            Body="Your code 1234",
+        )
+        await service.save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+
+    resp = await client.get("/api/v1/sms/export", params={"to_number": to_number})
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(lines) == 3
+    assert all(line["to_number"] == to_number for line in lines)
+
+    listed = (await client.get("/api/v1/sms", params={"to_number": to_number})).json()["items"]
+    received_at = {item["id"]: item["received_at"] for item in listed}
+    assert all(line["received_at"] == received_at[line["id"]] for line in lines)
+    assert all(value.endswith("Z") for value in received_at.values())
+
+    resp = await client.get("/api/v1/sms/export", params={"to_number": to_number, "format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == 3
+    assert rows[0]["to_number"] == to_number
+    assert all(row["received_at"] == received_at[int(row["id"])] for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_list_filters_by_payload_fields(client, db_session):
+    country = f"X{uuid.uuid4().hex[:6]}"
+    payload = TwilioWebhookPayload(
+        MessageSid=f"SM{uuid.uuid4().hex}",
+        AccountSid="AC-test",
+        From="+15550001111",
+        To="+15550002222",
+        Body="Your code 1234",
+        FromCountry=country,
+    )
+    await SmsService(db=db_session).save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+
+    resp = await client.get("/api/v1/sms", params={"payload": json.dumps({"FromCountry": country})})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total"] == 1
+    assert data["items"][0]["provider_message_id"] == payload.MessageSid
+
+    estimated = await client.get(
+        "/api/v1/sms",
+        params={"payload": json.dumps({"FromCountry": country}), "total": "estimated"},
+    )
+    assert estimated.status_code == 200
+    assert estimated.json()["total"] >= 0
+    assert [item["provider_message_id"] for item in estimated.json()["items"]] == [payload.MessageSid]
+
+    bad = await client.get("/api/v1/sms", params={"payload": "[1, 2]"})
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_and_pages(client, db_session):
+    word = f"token{uuid.uuid4().hex[:8]}"
+    to_number = f"+1{uuid.uuid4().int % 10**10:010d}"
+    service = SmsService(db=db_session)
+    for body in (f"{word} one", f"{word} {word} two", "unrelated"):
+        payload = TwilioWebhookPayload(
+            MessageSid=f"SM{uuid.uuid4().hex}",
+            AccountSid="AC-test",
+            From="BANK",
+            To=to_number,
+            Body=body,
+        )
+        await service.save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+
+    resp = await client.get("/api/v1/sms/search", params={"q": word, "order": "rank", "limit": 1})
+    assert resp.status_code == 200
+    first = resp.json()
+    assert first["items"][0]["text"] == f"{word} {word} two"
+
+    resp = await client.get(
+        "/api/v1/sms/search",
+        params={"q": word, "order": "rank", "limit": 1, "cursor": first["next_cursor"]},
+    )
+    assert resp.json()["items"][0]["text"] == f"{word} one"
+
+    resp = await client.get("/api/v1/sms/search", params={"q": word, "to_number": to_number})
+    assert len(resp.json()["items"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_list_and_search_bodies_match_response_schemas(client, db_session):
+    # Ответы собираются без response_model — сверяем их с тем, что отдал бы Pydantic
+    word = f"schema{uuid.uuid4().hex[:8]}"
+    to_number = f"+1{uuid.uuid4().int % 10**10:010d}"
+    service = SmsService(db=db_session)
+    for index in range(3):
+        payload = TwilioWebhookPayload(
+            MessageSid=f"SM{uuid.uuid4().hex}",
+            AccountSid="AC-test",
+            From="+15550001111",
+            To=to_number,
+            Body=f"{word} code {123450 + index}",
+        )
+        await service.save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+
+    pages = [
+        (await client.get("/api/v1/sms", params={"to_number": to_number, "limit": 2})).json(),
+        (await client.get("/api/v1/sms/search", params={"q": word, "limit": 2})).json(),
+    ]
+    pages.append((await client.get(
+        "/api/v1/sms", params={"to_number": to_number, "limit": 2, "cursor": pages[0]["next_cursor"]}
+    )).json())
+    schemas = [
+        (SmsListResponse, SmsListItem),
+        (SmsSearchResponse, SmsSearchItem),
+        (SmsListResponse, SmsListItem),
+    ]
+
+    for body, (response_schema, item_schema) in zip(pages, schemas):
+        assert set(body) == set(response_schema.model_fields)
+        assert body == response_schema.model_validate(body).model_dump(mode="json")
+        for item in body["items"]:
+            assert set(item) == set(item_schema.model_fields)
+            assert item["received_at"].endswith("Z")
+            assert item["otp_code"] is not None
+
+    first, search, last = pages
+    assert first["total"] == 3 and len(first["items"]) == 2
+    assert first["next_cursor"] is not None
+    assert len(search["items"]) == 2 and search["next_cursor"] is not None
+    assert len(last["items"]) == 1 and last["next_cursor"] is None
+    assert {item["id"] for item in first["items"] + last["items"]} == {
+        item["id"] for item in (await client.get("/api/v1/sms", params={"to_number": to_number})).json()["items"]
+    }
+
+
+@pytest.mark.asyncio
+async def test_latest_otp_returns_newest_code(client, db_session):
+    to_number = f"+1{uuid.uuid4().int % 10**10:010d}"
+    service = SmsService(db=db_session)
+    for sender, body in (
+        ("+15550001111", "[Google] G-123456 is your code"),
+        ("TELEGRAM", "Telegram code 55123"),
+        ("+15550001111", "See you at 10"),
+    ):
+        payload = TwilioWebhookPayload(
+            MessageSid=f"SM{uuid.uuid4().hex}",
+            AccountSid="AC-test",
+            From=sender,
+            To=to_number,
+            Body=body,
+        )
+        await service.save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+
+    resp = await client.get("/api/v1/sms/otp/latest", params={"to_number": to_number})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["otp_code"] == "55123"
+    assert data["otp_sender"] == "Telegram"
+
+    resp = await client.get("/api/v1/sms/otp/latest", params={"to_number": to_number, "sender": "Google"})
+    assert resp.json()["otp_code"] == "123456"
+
+    missing = await client.get("/api/v1/sms/otp/latest", params={"to_number": "+10000000000"})
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_twilio_webhook_validates_full_parameter_set(client):
+    url = "http://test/api/v1/webhooks/twilio/sms"
+    params = {
+        "MessageSid": f"SM{uuid.uuid4().hex}",
+        "AccountSid": "AC-test",
+        "From": "+15550001111",
+        "To": "+15550002222",
+        "Body": "Your code 1234",
+        "FromCountry": "US",
+        "ApiVersion": "2010-04-01",
+    }
+    signature = TwilioSignatureValidator(get_settings().twilio_auth_token).compute_signature(
+        url, params.items()
+    )
+
+    resp = await client.post(url, data=params, headers={"X-Twilio-Signature": signature})
+    assert resp.status_code == 201
+    assert resp.json()["provider_message_id"] == params["MessageSid"]
+
+    found = await client.get("/api/v1/sms", params={"payload": json.dumps({"FromCountry": "US", "MessageSid": params["MessageSid"]})})
+    assert found.json()["total"] == 1
+
+    tampered = {**params, "Body": "changed"}
+    resp = await client.post(url, data=tampered, headers={"X-Twilio-Signature": signature})
+    assert resp.status_code == 401
@@ -0,0 +1,60 @@
+import io
+import uuid
+from datetime import datetime, timezone
+
+import asyncpg
+import pytest
+
+from app.core.config import get_settings
+from app.services.otp import get_otp_extractor
+from app.services.sms_import import SmsImporter, detect_format, iter_records, parse_timestamp
+
+
+def test_parse_timestamp_accepts_iso_and_twilio_formats():
+    expected = datetime(2010, 8, 18, 20, 1, 40, tzinfo=timezone.utc)
+    assert parse_timestamp("2010-08-18T20:01:40Z") == expected
+    assert parse_timestamp("Wed, 18 Aug 2010 20:01:40 +0000") == expected
+    assert parse_timestamp("2010-08-18 20:01:40") == expected
+
+
+def test_detect_format_by_extension():
+    assert detect_format("export.csv.gz") == "csv"
+    assert detect_format("webhooks.ndjson") == "ndjson"
+    with pytest.raises(ValueError):
+        detect_format("export.txt")
+
+
+@pytest.mark.asyncio
+async def test_import_merges_duplicates_and_rejects_invalid_rows():
+    prefix = f"SMIMP{uuid.uuid4().hex[:12]}"
+    csv_data = "\n".join([
+        "Sid,From,To,Body,DateSent,Status",
+        f"{prefix}1,+15550001111,+15550008888,Your code is 482913,2024-01-05T10:00:00Z,received",
+        f"{prefix}2,BANK,+15550008888,Hello,2024-01-05T10:01:00Z,received",
+        f"{prefix}1,+15550001111,+15550008888,Duplicate in file,2024-01-05T10:02:00Z,received",
+        f"{prefix}3,,+15550008888,No sender,2024-01-05T10:03:00Z,received",
+        f"{prefix}4,+15550001111,+15550008888,Bad date,yesterday,received",
+    ])
+    connection = await asyncpg.connect(get_settings().asyncpg_dsn)
+    try:
+        importer = SmsImporter([connection], get_otp_extractor(), batch_size=2)
+        first = await importer.import_records(iter_records(io.StringIO(csv_data), "csv"))
+        again = await importer.import_records(iter_records(io.StringIO(csv_data), "csv"))
+        rows = await connection.fetch(
+            "SELECT provider_message_id, text, otp_code, otp_sender, raw_payload->>'Sid' AS sid "
+            "FROM incoming_sms WHERE provider_message_id LIKE $1 ORDER BY provider_message_id",
+            f"{prefix}%",
+        )
+    finally:
+        await connection.close()
+
+    assert first.as_dict() | {"rows_per_second": 0} == {
+        "read": 5, "inserted": 2, "duplicates": 1, "rejected": 2, "batches": 2, "rows_per_second": 0,
+    }
+    assert again.inserted == 0 and again.duplicates == 3
+
+    assert [row["provider_message_id"] for row in rows] == [f"{prefix}1", f"{prefix}2"]
+    assert rows[0]["text"] == "Your code is 482913"
+    assert rows[0]["otp_code"] == "482913"
+    assert rows[0]["otp_sender"] == "+15550001111"
+    assert rows[0]["sid"] == f"{prefix}1"
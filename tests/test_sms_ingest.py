@@ -0,0 +1,44 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.core.db import AsyncSessionLocal
+from app.schemas.sms import TwilioWebhookPayload
+from app.services.sms_ingest import IngestQueueFullError, SmsIngestQueue
+
+
+def _payload(sid: str) -> TwilioWebhookPayload:
+    return TwilioWebhookPayload(
+        MessageSid=sid,
+        AccountSid="AC-test",
+        From="+15550001111",
+        To="+15550002222",
+        Body="Your code 4321",
+    )
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_batches_and_dedups():
+    queue = SmsIngestQueue(
+        session_factory=AsyncSessionLocal,
+        batch_size=10,
+        flush_interval=0.05,
+        max_size=100,
+        enqueue_timeout=1.0,
+    )
+    await queue.start()
+
+    sids = [f"SM{uuid.uuid4().hex}" for _ in range(3)]
+    payloads = [_payload(sid) for sid in sids] + [_payload(sids[0])]
+    saved = await asyncio.gather(
+        *(queue.submit(payload=p, raw_payload=p.model_dump()) for p in payloads)
+    )
+    await queue.stop()
+
+    assert [sms.provider_message_id for sms in saved] == sids + [sids[0]]
+    assert saved[0].id == saved[3].id
+    assert len({sms.id for sms in saved}) == 3
+
+    with pytest.raises(IngestQueueFullError):
+        await queue.submit(payload=payloads[0], raw_payload={})
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+import pytest_asyncio
+
+from app.api.v1.sms import _sse_events
+from app.core.config import get_settings
+from app.schemas.sms import TwilioWebhookPayload
+from app.services.sms_notifier import SmsNotifier, sms_event_payload, sms_notifier
+from app.services.sms_service import SmsService
+
+
+@pytest_asyncio.fixture
+async def notifier():
+    await sms_notifier.start()
+    assert await sms_notifier.wait_listening(timeout=5)
+    yield sms_notifier
+    await sms_notifier.stop()
+
+
+def _payload(to_number: str, body: str = "Your code 4321") -> TwilioWebhookPayload:
+    return TwilioWebhookPayload(
+        MessageSid=f"SM{uuid.uuid4().hex}",
+        AccountSid="AC-test",
+        From="+15550001111",
+        To=to_number,
+        Body=body,
+    )
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_sms_pushed_by_notify(client, db_session, notifier):
+    to_number = f"+1{uuid.uuid4().int % 10**10:010d}"
+    waiting = asyncio.create_task(
+        client.get("/api/v1/sms/wait", params={"to_number": to_number, "timeout": 5})
+    )
+    while notifier.stats()["subscribers"] == 0:
+        await asyncio.sleep(0.01)
+
+    service = SmsService(db=db_session, notify_channel=get_settings().sms_notify_channel)
+    payload = _payload(to_number)
+    sms = await service.save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+
+    resp = await waiting
+    assert resp.status_code == 200
+    assert resp.json()["id"] == sms.id
+    assert resp.json()["otp_code"] == "4321"
+
+    # уже пришедшая SMS отдается сразу по after_id, без ожидания
+    resp = await client.get("/api/v1/sms/wait", params={"to_number": to_number, "after_id": sms.id - 1})
+    assert resp.json()["id"] == sms.id
+
+    resp = await client.get("/api/v1/sms/wait", params={"to_number": to_number, "timeout": 0.1})
+    assert resp.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_sse_replays_missed_messages_after_last_event_id(db_session, notifier):
+    to_number = f"+1{uuid.uuid4().int % 10**10:010d}"
+    service = SmsService(db=db_session)
+    saved = []
+    for _ in range(3):
+        payload = _payload(to_number)
+        saved.append(await service.save_incoming_sms(payload=payload, raw_payload=payload.model_dump()))
+
+    events = _sse_events(notifier, service, to_number, saved[0].id, get_settings())
+    replayed = [await anext(events), await anext(events)]
+    await events.aclose()
+    assert [int(m.split(b"\n")[0].removeprefix(b"id: ")) for m in replayed] == [s.id for s in saved[1:]]
+
+
+@pytest.mark.asyncio
+async def test_event_payload_drops_oversized_text(db_session):
+    payload = _payload("+15550003333", body="x" * 9000)
+    sms = await SmsService(db=db_session).save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+    event = json.loads(sms_event_payload(sms))
+    assert event["truncated"] is True
+    assert "text" not in event
+
+
+@pytest.mark.asyncio
+async def test_unexpected_connect_error_is_retried(caplog):
+    # ClientConfigurationError — не OSError и не PostgresError
+    notifier = SmsNotifier(dsns=[f"{get_settings().asyncpg_dsn}?sslmode=bogus"], channel="test", queue_size=1)
+    await notifier.start()
+    try:
+        await asyncio.sleep(0.1)
+        assert notifier.running
+        assert not notifier.listening
+    finally:
+        await notifier.stop()
+    assert "SMS notifier connection failed unexpectedly" in caplog.messages
@@ -0,0 +1,71 @@
+import uuid
+
+import pytest
+
+from app.schemas.sms import TotalMode, TwilioWebhookPayload
+from app.services.sms_dedup import SmsDedupCache
+from app.services.sms_service import SmsService
+
+
+def _payload(sid: str) -> TwilioWebhookPayload:
+    return TwilioWebhookPayload(
+        MessageSid=sid,
+        AccountSid="AC-test",
+        From="+15550001111",
+        To="+15550002222",
+        Body="Your code 4321",
+    )
+
+
+@pytest.mark.asyncio
+async def test_save_incoming_sms_uses_dedup_cache(db_session):
+    dedup = SmsDedupCache(cache_size=100, ttl=60, bloom_capacity=1000, bloom_error_rate=0.01)
+    service = SmsService(db=db_session, dedup=dedup)
+    payload = _payload(f"SM{uuid.uuid4().hex}")
+
+    first = await service.save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+    retry = await service.save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+
+    assert retry.id == first.id
+    stats = dedup.stats()
+    assert stats["bloom_negatives"] == 1
+    assert stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_list_sms_keyset_pages_match_offset_pages(db_session):
+    service = SmsService(db=db_session)
+    to_number = f"+1{uuid.uuid4().int % 10**10:010d}"
+    for _ in range(5):
+        payload = _payload(f"SM{uuid.uuid4().hex}")
+        payload.To = to_number
+        await service.save_incoming_sms(payload=payload, raw_payload=payload.model_dump())
+
+    by_offset, total = await service.list_sms(limit=10, to_number=to_number)
+    assert total == 5
+
+    first, _ = await service.list_sms(limit=2, to_number=to_number)
+    second, _ = await service.list_sms(
+        limit=2,
+        to_number=to_number,
+        cursor=(first[-1].received_at, first[-1].id),
+    )
+    assert [s.id for s in first + second] == [s.id for s in by_offset[:4]]
+
+
+@pytest.mark.asyncio
+async def test_number_counters_match_count(db_session):
+    service = SmsService(db=db_session)
+    to_number = f"+1{uuid.uuid4().int % 10**10:010d}"
+    payloads = [_payload(f"SM{uuid.uuid4().hex}") for _ in range(3)]
+    for payload in payloads:
+        payload.To = to_number
+    await service.save_incoming_sms_batch([(p, p.model_dump()) for p in payloads])
+    await service.save_incoming_sms(payload=payloads[0], raw_payload=payloads[0].model_dump())
+
+    _, exact = await service.list_sms(to_number=to_number, total_mode=TotalMode.exact)
+    _, none = await service.list_sms(to_number=to_number, total_mode=TotalMode.none)
+    estimated = await service.count_sms(mode=TotalMode.estimated, to_number=to_number)
+    assert exact == 3
+    assert none is None
+    assert estimated >= 0
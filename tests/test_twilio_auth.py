@@ -0,0 +1,29 @@
+from twilio.request_validator import RequestValidator
+
+from app.core.twilio_auth import TwilioSignatureValidator
+
+URL = "https://sms.example.com/api/v1/webhooks/twilio/sms?tenant=a"
+PARAMS = [
+    ("MessageSid", "SM1"),
+    ("From", "+15550001111"),
+    ("To", "+15550002222"),
+    ("Body", "Your code 1234"),
+    ("FromCountry", "US"),
+    ("ApiVersion", "2010-04-01"),
+]
+
+
+def test_signature_matches_twilio_sdk():
+    expected = RequestValidator("secret").compute_signature(URL, dict(PARAMS))
+    validator = TwilioSignatureValidator("secret")
+    assert validator.compute_signature(URL, PARAMS) == expected
+    assert validator.validate(URL, PARAMS, expected)
+
+
+def test_signature_covers_all_params_and_port_variants():
+    validator = TwilioSignatureValidator("secret")
+    signature = validator.compute_signature(URL, PARAMS)
+    assert not validator.validate(URL, PARAMS[:-1], signature)
+    with_port = URL.replace("sms.example.com", "sms.example.com:443")
+    assert validator.validate(with_port, PARAMS, signature)
+    assert not TwilioSignatureValidator("other").validate(URL, PARAMS, signature)
@@ -0,0 +1,81 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from app.core.config import get_settings
+from app.core.rate_limit import TokenBucket
+from app.main import app
+from app.services.twilio_batch import get_twilio_rate_limiter
+from app.services.twilio_client import TwilioService, get_twilio_service
+
+
+def test_token_bucket_refills_at_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    now[0] = 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_send_batch_streams_results_with_bounded_concurrency(client):
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        form = parse_qs(request.content.decode())
+        if form["To"][0] == "+15550000003":
+            return httpx.Response(400, json={"code": 21211, "message": "Invalid 'To' Phone Number"})
+        return httpx.Response(
+            201,
+            json={"sid": f"SM{form['To'][0]}", "status": "queued", "to": form["To"][0], "from": "+1", "body": form["Body"][0]},
+        )
+
+    settings = get_settings().model_copy(update={"twilio_phone_number": "+15550009999"})
+    service = TwilioService(settings=settings, transport=httpx.MockTransport(handler))
+    limiter = TokenBucket(rate=1000, capacity=10)
+    app.dependency_overrides[get_twilio_service] = lambda: service
+    app.dependency_overrides[get_twilio_rate_limiter] = lambda: limiter
+    concurrency = get_settings().twilio_send_concurrency
+    get_settings().twilio_send_concurrency = 2
+    try:
+        resp = await client.post(
+            "/api/v1/twilio/sms/send-batch",
+            json={
+                "templates": {"default": "Code $code", "promo": "Hi $name"},
+                "recipients": [
+                    {"to": f"+1555000000{i}", "params": {"code": str(i)}} for i in range(5)
+                ] + [{"to": "+15550000009", "template": "promo"}],
+            },
+        )
+    finally:
+        app.dependency_overrides.clear()
+        get_settings().twilio_send_concurrency = concurrency
+        await service.close()
+
+    assert resp.status_code == 200
+    results = {r["index"]: r for r in map(json.loads, resp.text.splitlines())}
+    assert len(results) == 6
+    assert results[0]["status"] == "sent"
+    assert results[3]["error_code"] == 21211
+    assert results[5]["error"].startswith("Template error")
+    assert peak <= 2
+
+
+@pytest.mark.asyncio
+async def test_send_batch_rejects_unknown_template(client):
+    resp = await client.post(
+        "/api/v1/twilio/sms/send-batch",
+        json={"templates": {"default": "x"}, "recipients": [{"to": "+1", "template": "nope"}]},
+    )
+    assert resp.status_code == 422
@@ -0,0 +1,67 @@
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from app.core.config import get_settings
+from app.services.twilio_client import TwilioApiError, TwilioService
+
+
+def _service(handler) -> TwilioService:
+    settings = get_settings().model_copy(update={"twilio_phone_number": "+15550009999"})
+    return TwilioService(settings=settings, transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_send_sms_posts_form_to_messages_endpoint():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        form = parse_qs(request.content.decode())
+        return httpx.Response(
+            201,
+            json={"sid": "SM1", "status": "queued", "to": form["To"][0], "from": form["From"][0], "body": form["Body"][0]},
+        )
+
+    service = _service(handler)
+    result = await service.send_sms(to="+15550001111", body="hi")
+    await service.send_sms(to="+15550001111", body="again")
+    await service.close()
+
+    assert result == {"sid": "SM1", "status": "queued", "to": "+15550001111", "from": "+15550009999", "body": "hi"}
+    sid = get_settings().twilio_account_sid
+    assert seen[0].url.path == f"/2010-04-01/Accounts/{sid}/Messages.json"
+    assert seen[0].headers["authorization"].startswith("Basic ")
+
+
+@pytest.mark.asyncio
+async def test_api_error_is_raised_with_twilio_code():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, json={"code": 21211, "message": "Invalid 'To' Phone Number", "status": 400})
+
+    service = _service(handler)
+    with pytest.raises(TwilioApiError) as exc_info:
+        await service.send_sms(to="bad", body="hi")
+    await service.close()
+    assert exc_info.value.code == 21211
+
+
+@pytest.mark.asyncio
+async def test_account_lookup_is_cached_and_shared():
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"sid": "AC1", "status": "active", "type": "Full"})
+
+    service = _service(handler)
+    results = await asyncio.gather(*(service.get_account_balance() for _ in range(5)))
+    await service.get_account_balance()
+    await service.close()
+
+    assert calls == 1
+    assert all(r == {"account_sid": "AC1", "status": "active", "type": "Full"} for r in results)